@@ -1,27 +1,177 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-import numpy as np
 import project_map
+import metric_charts
+import pareto
+import lcos
+import dispatch
+import capacity_fade
+import figure_cache
+import metric_filters
+import site_sizing
+import memory_budget
+import taxonomy
+import similarity
+import uploads
+import derived_metrics
+import data_files
 import base64
+import os
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 # Set default view to wide
 st.set_page_config(layout="wide", page_title="Long Duration Energy Storage Evaluation & Tracking Tool", page_icon="cropped-SNL_thunderbird.png")
 
-csv_url = "ldes_real_data_v1.csv"
-projects_url = "LDES project tracking list v4.csv"
+csv_url = data_files.METRICS_PATH
+projects_url = data_files.PROJECTS_PATH
 
 # ==================== CACHED FUNCTIONS ====================
 @st.cache_data(ttl=3600)  # Cache for 1 hour
-def load_metrics_data():
-    """Load and cache metrics data"""
-    return pd.read_csv(csv_url)
+def load_metrics_data(version):
+    """Load and cache metrics data (one entry per dataset version)"""
+    return data_files.read_metrics(csv_url)
+
+@st.cache_data
+def load_hover_data(version):
+    """Hover strings shared by every metric chart, built once per dataset version"""
+    return metric_charts.build_hover_data(load_metrics_data(version))
+
+@st.cache_data
+def load_filter_catalog(version):
+    """Column bounds, distinct values and histograms read by the filter widgets, built once per dataset version"""
+    return metric_filters.filter_catalog(load_metrics_data(version), metric_charts.RANGE_METRICS)
+
+@st.cache_data(show_spinner=False)
+def load_derived_columns(version, name):
+    """Low/high columns of one derived metric over the whole dataset, computed the first time a filter or chart needs them"""
+    return derived_metrics.compute(load_metrics_data(version), metric_charts.RANGE_METRICS, name)
+
+@st.cache_data(show_spinner=False)
+def load_derived_catalog(version, name):
+    """Filter catalog entries for one derived metric, built the first time it is picked as a filter"""
+    return metric_filters.filter_catalog(load_derived_columns(version, name), {name: derived_metrics.DERIVED_RANGE_METRICS[name]})
+
+@st.cache_resource(max_entries=2)
+def load_similarity_index(version):
+    """Normalized feature vectors and their KD-tree, built once per dataset version and shared read-only by every session"""
+    return similarity.build_index(
+        load_metrics_data(version), metric_charts.RANGE_METRICS, list(metric_charts.CATEGORY_CHARTS.values())
+    )
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def filter_mask(version, spec):
+    """Row mask for one filter setting, cached so previews and reruns only AND masks together"""
+    df = derived_metrics.frame_for_spec(
+        load_metrics_data(version), spec, metric_charts.RANGE_METRICS, lambda name: load_derived_columns(version, name)
+    )
+    return metric_filters.filter_mask(df, spec)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def compute_pareto_front(filter_key, options_key, _filtered_df):
+    """Pareto frontier mask, cached per filter fingerprint and frontier settings"""
+    metrics, directions, mode, range_metrics = options_key
+    return pareto.pareto_front(_filtered_df, dict(range_metrics), list(metrics), dict(directions), mode)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_lcos_monte_carlo(filter_key, options_key, _filtered_df):
+    """Monte Carlo LCOS summary, cached per filter fingerprint and run settings"""
+    n_samples, seed, assumptions = options_key
+    return lcos.monte_carlo_lcos(
+        _filtered_df, metric_charts.RANGE_METRICS, n_samples, seed, dict(assumptions),
+        workers=lcos.default_workers(n_samples)
+    )
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_lcos_sweep(filter_key, options_key, _filtered_df):
+    """Cheapest technology per duration x cycles cell, cached per filter fingerprint and grid settings"""
+    points, scenario, cycles_range, assumptions = options_key
+    durations, cycles = lcos.sweep_axes(_filtered_df, metric_charts.RANGE_METRICS, points, cycles_range)
+    return lcos.sweep_lcos(_filtered_df, metric_charts.RANGE_METRICS, durations, cycles, scenario, dict(assumptions))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_site_sizing(filter_key, options_key, _filtered_df):
+    """Per-technology land/cost envelopes and best mixes, cached per filter fingerprint and site"""
+    power_mw, energy_mwh, land_acres, capex_basis, max_size, step = options_key
+    envelopes = site_sizing.technology_envelopes(
+        _filtered_df, metric_charts.RANGE_METRICS, power_mw, energy_mwh, land_acres, capex_basis
+    )
+    portfolios, stats = site_sizing.search_portfolios(
+        _filtered_df, metric_charts.RANGE_METRICS, power_mw, energy_mwh, land_acres, capex_basis,
+        max_size=max_size, step=step
+    )
+    return {"envelopes": envelopes, "portfolios": portfolios, "stats": stats}
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def run_dispatch(filter_key, options_key, _filtered_df, _profiles):
+    """Hourly dispatch results, cached per filter fingerprint, profile hash and settings"""
+    profile_key, kind, assumptions = options_key
+    unit_hours = 2 * len(_filtered_df) * _profiles.size
+    return dispatch.simulate_dispatch(
+        _filtered_df, metric_charts.RANGE_METRICS, _profiles, kind, dict(assumptions),
+        workers=dispatch.default_workers(unit_hours)
+    )
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_capacity_fade(filter_key, options_key, _filtered_df):
+    """Downsampled fade trajectories and end-of-life table, cached per filter fingerprint and settings"""
+    settings = dict(options_key)
+    projection = capacity_fade.project_fade(_filtered_df, metric_charts.RANGE_METRICS, settings)
+    return {
+        "plot": capacity_fade.downsample(projection),
+        "table": capacity_fade.end_of_life_table(projection, settings["cycles_per_year"]),
+    }
+
+@st.cache_resource
+def shared_figure_cache():
+    """Built figures shared by every session and the background precomputer"""
+    return figure_cache.FigureCache()
+
+@st.cache_resource
+def memory_ledger():
+    """Per-session memory accounting; over budget it sheds figures, then the run caches"""
+    ledger = memory_budget.MemoryLedger(memory_budget.configured_budget(), memory_budget.configured_idle_seconds())
+    ledger.register_shedder("figure cache", shared_figure_cache().clear)
+    for cached in (run_lcos_monte_carlo, run_lcos_sweep, run_site_sizing, run_dispatch, run_capacity_fade, compute_pareto_front, filter_mask):
+        ledger.register_shedder(cached.__name__, cached.clear)
+    return ledger
+
+def csv_export(frame, ledger, session_id, name):
+    """Deferred CSV download: the bytes are built, and accounted, only when clicked"""
+    def build():
+        data = frame.to_csv(index=False).encode('utf-8')
+        ledger.record(session_id, "exports", name, len(data))
+        return data
+    return build
 
 @st.cache_data(ttl=3600)
-def load_projects_data():
-    """Load and cache projects data"""
-    return pd.read_csv(projects_url)
+def load_projects_data(version):
+    """Load, normalize and cache projects data (one entry per dataset version)"""
+    return data_files.read_projects(projects_url)
+
+@st.cache_data
+def load_technology_index(metrics_version, projects_version):
+    """Taxonomy ids, sidebar options and the projects-to-metric-ranges join, built once per pair of dataset versions"""
+    return taxonomy.build_index(
+        load_metrics_data(metrics_version), load_projects_data(projects_version), metric_charts.RANGE_METRICS
+    )
+
+@st.cache_resource
+def session_uploads():
+    """Custom datasets uploaded by each session, with their derived artifacts; evicted when the session ends"""
+    return uploads.SessionUploads()
+
+def technology_index_for(metrics_upload, projects_upload):
+    """Taxonomy index for this session's datasets: shared for the built-in files, in the upload's namespace otherwise"""
+    metrics_version = metrics_upload.version if metrics_upload else data_files.data_version(csv_url)
+    projects_version = projects_upload.version if projects_upload else data_files.data_version(projects_url)
+    if metrics_upload is None and projects_upload is None:
+        return load_technology_index(metrics_version, projects_version)
+    metrics_df = metrics_upload.frame if metrics_upload else load_metrics_data(metrics_version)
+    projects_df = projects_upload.frame if projects_upload else load_projects_data(projects_version)
+    return (metrics_upload or projects_upload).artifact(
+        ("technology_index", metrics_version, projects_version),
+        lambda: taxonomy.build_index(metrics_df, projects_df, metric_charts.RANGE_METRICS)
+    )
 
 @st.cache_data
 def get_logo_base64():
@@ -57,8 +207,64 @@ qp = st.query_params.get("p", None)
 if qp and key_pages.get(qp, "") != st.session_state.page:
     st.session_state.page = key_pages.get(qp, "Documentation")
 
+# Hidden admin view, only when LDES_ADMIN_TOKEN is set and passed as ?token=
+admin_token = os.environ.get("LDES_ADMIN_TOKEN")
+if admin_token and qp == "admin" and st.query_params.get("token") == admin_token:
+    st.session_state.page = "Admin"
+
 current_page = st.session_state.page
 
+# Account this session and shed idle sessions' artifacts if over budget
+run_ctx = get_script_run_ctx()
+session_id = run_ctx.session_id if run_ctx else "local"
+ledger = memory_ledger()
+ledger.touch(session_id, current_page)
+ledger.enforce(shared_figure_cache())
+
+# Uploads of sessions that have ended go with everything built from them
+upload_store = session_uploads()
+if runtime.exists():
+    app_runtime = runtime.get_instance()
+    for ended in upload_store.evict_inactive(lambda sid: sid == session_id or app_runtime.is_active_session(sid)):
+        shared_figure_cache().evict_owner(ended)
+        ledger.forget(ended)
+
+def custom_data_uploader(kind, label):
+    """Sidebar upload of a custom dataset; returns the session's parsed upload, or None to use the built-in data"""
+    rejected_key = f"upload_{kind}_rejected"
+    with st.sidebar.expander("Use Your Own Data", expanded=upload_store.get(session_id, kind) is not None):
+        file = st.file_uploader(label, type="csv", key=f"upload_{kind}")
+        if file is None:
+            upload_store.drop(session_id, kind)
+            st.session_state.pop(rejected_key, None)
+            return None
+        current = upload_store.get(session_id, kind)
+        if current is not None and current.file_id == file.file_id:
+            st.caption(f"Using {file.name}: {len(current.frame):,} rows")
+            return current
+
+        # A rejected file is reported again without being parsed again
+        rejected = st.session_state.get(rejected_key)
+        if rejected is None or rejected[0] != file.file_id:
+            upload_store.drop(session_id, kind)
+            progress = st.progress(0.0, text="Waiting for another upload to finish...")
+            with upload_store.parse_slots:
+                frame, issues = uploads.read_upload(
+                    file, kind, metric_charts.RANGE_METRICS,
+                    progress=lambda done: progress.progress(min(done / max(file.size, 1), 1.0), text=f"Checking {file.name}...")
+                )
+            progress.empty()
+            if not issues:
+                dataset = uploads.UploadedDataset(kind, file.name, file.file_id, frame, metric_charts.RANGE_METRICS)
+                upload_store.put(session_id, dataset)
+                st.session_state.pop(rejected_key, None)
+                st.caption(f"Using {file.name}: {len(frame):,} rows")
+                return dataset
+            rejected = st.session_state[rejected_key] = (file.file_id, issues)
+        st.error(f"{file.name} was not loaded; the built-in data is shown instead.")
+        st.markdown("\n".join(f"- {issue}" for issue in rejected[1]))
+        return None
+
 # Build nav anchor links — each changes ?p= which triggers a Streamlit rerun
 def nav_link(label, active):
     key = page_keys[label]
@@ -332,416 +538,459 @@ elif st.session_state.page == "Metric Visualization":
     
     try:
         # Use cached data loading
+        metrics_upload = custom_data_uploader("metrics", "Metrics CSV (same columns as the built-in data)")
         with st.spinner("Loading data..."):
-            df = load_metrics_data()
+            if metrics_upload is None:
+                metrics_version = data_files.data_version(csv_url)
+                df = load_metrics_data(metrics_version)
+                hover_data = load_hover_data(metrics_version)
+                filter_catalog = load_filter_catalog(metrics_version)
+            else:
+                metrics_version = metrics_upload.version
+                df = metrics_upload.frame
+                hover_data = metrics_upload.artifact("hover", lambda: metric_charts.build_hover_data(df))
+                filter_catalog = metrics_upload.artifact("catalog", lambda: metric_filters.filter_catalog(df, metric_charts.RANGE_METRICS))
+                ledger.record(session_id, "frames", "Uploaded metrics", metrics_upload.frame_bytes)
+            technology_index = technology_index_for(metrics_upload, None)
+
+        # Switching datasets starts the filters and row pickers over
+        if st.session_state.get("filters_version", metrics_version) != metrics_version:
+            metric_filters.reset_filter_state()
+            st.session_state.pop("similar_reference", None)
+        st.session_state.filters_version = metrics_version
         
         # Sidebar filters
         st.sidebar.header("Metric Visualization Filters")
         
-        # Define the mapping of combined metrics to their low/high column names
-        range_metrics = {
-            "Duration (hr)": ("Duration - Low (hr)", "Duration - High (hr)"),
-            "RTE (%)": ("RTE - Low (%)", "RTE - High (%)"),
-            "Degradation (%/cycle)": ("Degradation - Low (%/cycle)", "Degradation - High (%/cycle)"),
-            "Cycle Life (#)": ("Cycle Life - Low (#)", "Cycle Life - High (#)"),
-            "Ramp Rate (% rated power/sec)": ("Ramp Rate - Low (% rated power/sec)", "Ramp Rate - High (% rated power/sec)"),
-            "Response Time (s)": ("Response Time - Low (s)", "Response Time - High (s)"),
-            "Energy Density (acre/MWhe)": ("Energy Density - Low (acre/MWhe)", "Energy Density - High (acre/MWhe)"),
-            "Power Density (acre/MW)": ("Power Density - Low (acre/MW)", "Power Density - High (acre/MW)"),
-            "CAPEX Energy Basis ($/kWhe)": ("CAPEX Energy Basis - Low ($/kWhe)", "CAPEX Energy Basis - High ($/kWhe)"),
-            "CAPEX Power Basis ($/kWe)": ("CAPEX Power Basis - Low ($/kWe)", "CAPEX Power Basis - High ($/kWe)"),
-            "OPEX ($/kW-year)": ("OPEX - Low ($/kW-year)", "OPEX - High ($/kW-year)")
-        }
-
-        # Create list of available filter options (excluding Detailed Technology)
-        available_filters = []
-        
-        for metric_name, (low_col, high_col) in range_metrics.items():
-            if low_col in df.columns and high_col in df.columns:
-                available_filters.append(metric_name)
-        
-        single_value_columns = ["TRL", "ARL", "MRL"]
-        for col in single_value_columns:
-            if col in df.columns:
-                available_filters.append(col)
-        
-        # Add categorical filters to available options
-        categorical_filters = {
-            "Geological Req.": "Geological Feature Requirement",
-            "Fire Incidents": "Historical Fire Events",
-            "Environmental Impact": "Environmental Impact",
-            "Off-Gassing ": "Off-Gassing"
-        }
-        
-        for col, display_name in categorical_filters.items():
-            if col in df.columns:
-                available_filters.append(display_name)
-        
-        filter_columns = st.sidebar.multiselect("Select data to filter by", options=available_filters)
+        # Mapping of combined metrics to their low/high column names, with the
+        # derived metrics this dataset's columns support. Derived columns are
+        # only computed when a filter or chart asks for them.
+        range_metrics = derived_metrics.with_derived(df, metric_charts.RANGE_METRICS)
+        if metrics_upload is None:
+            derived_columns = lambda name: load_derived_columns(metrics_version, name)
+            derived_catalog = lambda name: load_derived_catalog(metrics_version, name)
+        else:
+            derived_columns = metrics_upload.derived_columns
+            derived_catalog = lambda name: metrics_upload.artifact(("derived_catalog", name), lambda: metric_filters.filter_catalog(
+                metrics_upload.derived_columns(name), {name: derived_metrics.DERIVED_RANGE_METRICS[name]}
+            ))
+
+        def mask_for(spec):
+            if metrics_upload is not None:
+                return metrics_upload.mask_for(spec)
+            return filter_mask(metrics_version, spec)
+
+        # Batched mode draws the filters in a fragment: edits rerun only the
+        # sidebar (with a row-count preview) until they are applied.
+        batch_filters = st.sidebar.toggle(
+            "Batch filter changes", key="batch_filters",
+            help="Hold filter edits until you click Apply, instead of redrawing the page on every change."
+        )
+        if batch_filters:
+            auto_apply = st.sidebar.checkbox("Apply automatically after a pause", key="batch_auto_apply")
+            filter_panel = st.fragment(metric_filters.batched_filter_panel)
+            with st.sidebar:
+                filter_panel(df, range_metrics, mask_for, technology_index["metric_options"], filter_catalog, auto_apply, derived_catalog)
+            filter_specs, applied_ranges = st.session_state.applied_filters
+            active_filter_ranges = dict(applied_ranges)
+        else:
+            with st.sidebar:
+                filter_specs, active_filter_ranges = metric_filters.draw_filter_widgets(
+                    df, range_metrics, mask_for, technology_index["metric_options"], filter_catalog, derived_catalog
+                )
+            st.session_state.applied_filters = (filter_specs, tuple(sorted(active_filter_ranges.items())))
 
-        active_filter_ranges = {}
+        filtered_rows = metric_filters.combined_mask(len(df), filter_specs, mask_for)
+        filtered_df = df[filtered_rows]
+        ledger.record(session_id, "frames", "Filtered metrics", memory_budget.estimate_bytes(filtered_df))
 
-        # Create sliders/pills for selected filter columns immediately after the multiselect
-        filtered_df = df.copy()
-        
-        # Extract boolean from Off-Gassing strings (Yes/No at start)
-        def extract_offgassing_bool(value):
-            if pd.isna(value):
-                return None
-            value_str = str(value).strip()
-            if value_str.startswith("Yes"):
-                return "Yes"
-            elif value_str.startswith("No"):
-                return "No"
-            return None
-        
-        # Mapping of display names to actual column names for categorical filters
-        categorical_filter_mapping = {
-            "Geological Feature Requirement": "Geological Req.",
-            "Historical Fire Events": "Fire Incidents",
-            "Environmental Impact": "Environmental Impact",
-            "Off-Gassing": "Off-Gassing "
-        }
-        
-        for filter_col in filter_columns:
-            # Check if it's a categorical filter
-            if filter_col in categorical_filter_mapping:
-                actual_col = categorical_filter_mapping[filter_col]
-                
-                if actual_col in df.columns:
-                    # Special handling for Off-Gassing
-                    if filter_col == "Off-Gassing":
-                        unique_values = ["No", "Yes"]  # Ordered: No -> Yes
-                        selected_values = st.sidebar.pills(
-                            f"Filter by {filter_col}",
-                            options=unique_values,
-                            default=unique_values,
-                            selection_mode="multi",
-                            key=f"filter_{actual_col}"
-                        )
-                        # Filter by extracted boolean while preserving full string
-                        mask = filtered_df[actual_col].apply(
-                            lambda x: extract_offgassing_bool(x) in selected_values if pd.notna(x) else False
-                        )
-                        filtered_df = filtered_df[mask]
-                    elif filter_col == "Geological Feature Requirement":
-                        # Order: No -> Yes
-                        unique_values = ["No", "Yes"]
-                        available_values = [v for v in unique_values if v in filtered_df[actual_col].dropna().unique()]
-                        selected_values = st.sidebar.pills(
-                            f"Filter by {filter_col}",
-                            options=available_values,
-                            default=available_values,
-                            selection_mode="multi",
-                            key=f"filter_{actual_col}"
-                        )
-                        filtered_df = filtered_df[filtered_df[actual_col].isin(selected_values)]
-                    elif filter_col in ["Historical Fire Events", "Environmental Impact"]:
-                        # Order: Low -> Medium -> High
-                        ordered_values = ["Low", "Medium", "High"]
-                        available_values = [v for v in ordered_values if v in filtered_df[actual_col].dropna().unique()]
-                        selected_values = st.sidebar.pills(
-                            f"Filter by {filter_col}",
-                            options=available_values,
-                            default=available_values,
-                            selection_mode="multi",
-                            key=f"filter_{actual_col}"
-                        )
-                        filtered_df = filtered_df[filtered_df[actual_col].isin(selected_values)]
-                    else:
-                        # Regular categorical filter using pills (sorted alphabetically)
-                        unique_values = sorted(filtered_df[actual_col].dropna().unique())
-                        selected_values = st.sidebar.pills(
-                            f"Filter by {filter_col}",
-                            options=unique_values,
-                            default=unique_values,
-                            selection_mode="multi",
-                            key=f"filter_{actual_col}"
-                        )
-                        filtered_df = filtered_df[filtered_df[actual_col].isin(selected_values)]
-            
-            elif filter_col in range_metrics:
-                low_col, high_col = range_metrics[filter_col]
-                
-                all_low_values = df[low_col].dropna()
-                all_high_values = df[high_col].dropna()
-                
-                if len(all_low_values) > 0 and len(all_high_values) > 0:
-                    overall_min = min(all_low_values.min(), all_high_values.min())
-                    overall_max = max(all_low_values.max(), all_high_values.max())
-                    
-                    selected_range = st.sidebar.slider(
-                        f"Filter by {filter_col}", 
-                        min_value=float(overall_min), 
-                        max_value=float(overall_max), 
-                        value=(float(overall_min), float(overall_max)),
-                        key=f"slider_{filter_col}"
+        # Fingerprint of the current filter state; keys every per-filter cache.
+        filter_key = metric_charts.filter_fingerprint(metrics_version, filtered_df, active_filter_ranges)
+
+        # Derived metric columns, attached here on the script thread: the
+        # figure builders (also run by the background precomputer) then only
+        # read plain columns and never call the cached loaders.
+        derived_df = derived_metrics.attach(
+            filtered_df, metric_charts.RANGE_METRICS, [m for m in range_metrics if m in derived_metrics.DERIVED_METRICS], derived_columns
+        )
+
+        # Stop any speculative builds for a filter state that no longer applies
+        figures = shared_figure_cache()
+        if "figure_precomputer" not in st.session_state:
+            st.session_state.figure_precomputer = figure_cache.Precomputer(figures, session_id)
+        precomputer = st.session_state.figure_precomputer
+        precomputer.cancel_if_stale(filter_key)
+
+        # Chart picker, per-chart controls and the figure run as one fragment:
+        # interacting with them reruns only this area, not the sidebar
+        # filters and the data table below.
+        @st.fragment
+        def render_chart_area():
+            # Move chart selection BEFORE figure construction so only the
+            # selected figure is built on each rerun.
+            selected_chart = st.selectbox("Select Graph to View:", metric_charts.CHART_NAMES)
+
+            # Per-chart controls (only shown for the charts that need them)
+            chart_options = {}
+            options_key = ()
+            if selected_chart == metric_charts.PARETO_CHART:
+                pareto_choices = pareto.pareto_metrics(derived_df, range_metrics)
+                metrics_col, mode_col = st.columns([3, 1])
+                with metrics_col:
+                    pareto_selected = st.multiselect(
+                        "Metrics to trade off",
+                        options=pareto_choices,
+                        default=[m for m in metric_charts.DEFAULT_PARETO_METRICS if m in pareto_choices],
+                        key="pareto_metrics"
                     )
-                    
-                    active_filter_ranges[filter_col] = selected_range
-                    
-                    mask = (
-                        (filtered_df[low_col] <= selected_range[1]) & 
-                        (filtered_df[high_col] >= selected_range[0])
+                with mode_col:
+                    pareto_mode = st.radio(
+                        "Use range ends",
+                        options=pareto.MODES,
+                        format_func=lambda m: "Optimistic (best end)" if m == "optimistic" else "Pessimistic (worst end)",
+                        key="pareto_mode"
                     )
-                    filtered_df = filtered_df[mask]
-                    
-            elif filter_col in ["TRL", "ARL", "MRL"] and filter_col in df.columns:
-                if df[filter_col].dtype in [int, float]:
-                    min_val = df[filter_col].min()
-                    max_val = df[filter_col].max()
-                    selected_range = st.sidebar.slider(
-                        f"Filter by {filter_col}", 
-                        min_value=float(min_val), 
-                        max_value=float(max_val), 
-                        value=(float(min_val), float(max_val)),
-                        key=f"slider_{filter_col}"
+                pareto_directions = {}
+                if pareto_selected:
+                    direction_cols = st.columns(len(pareto_selected))
+                    for col, metric in zip(direction_cols, pareto_selected):
+                        with col:
+                            pareto_directions[metric] = st.radio(
+                                metric,
+                                options=["max", "min"],
+                                index=0 if pareto.DEFAULT_DIRECTIONS.get(metric) == "max" else 1,
+                                format_func=lambda d: "Higher is better" if d == "max" else "Lower is better",
+                                key=f"pareto_dir_{metric}"
+                            )
+                options_key = (tuple(pareto_selected), tuple(pareto_directions.items()), pareto_mode, tuple(range_metrics.items()))
+                chart_options[selected_chart] = {
+                    "metrics": pareto_selected,
+                    "directions": pareto_directions,
+                    "mode": pareto_mode,
+                    "front": compute_pareto_front(filter_key, options_key, derived_df),
+                }
+
+            # Range trade-off axes: any two range metrics, derived ones included
+            if selected_chart == metric_charts.RECTANGLE_CHART:
+                rectangle_choices = [m for m in metric_filters.available_filters(df, range_metrics) if m in range_metrics]
+                rectangle_defaults = metric_charts.default_rectangle_options()
+                x_col, y_col = st.columns(2)
+                with x_col:
+                    rectangle_x = st.selectbox(
+                        "Horizontal axis", rectangle_choices,
+                        index=rectangle_choices.index(rectangle_defaults["x"]) if rectangle_defaults["x"] in rectangle_choices else 0,
+                        key="rectangle_x"
+                    )
+                with y_col:
+                    rectangle_y = st.selectbox(
+                        "Vertical axis", rectangle_choices,
+                        index=rectangle_choices.index(rectangle_defaults["y"]) if rectangle_defaults["y"] in rectangle_choices else 0,
+                        key="rectangle_y"
+                    )
+                options_key = (rectangle_x, rectangle_y)
+                chart_options[selected_chart] = {"x": rectangle_x, "y": rectangle_y}
+
+            # Financial assumptions shared by the LCOS charts (same widget keys,
+            # so switching between the two charts keeps the values)
+            def lcos_financial_controls(rate_col, basis_col):
+                defaults = lcos.DEFAULT_ASSUMPTIONS
+                with rate_col:
+                    rate = st.number_input("Discount rate (%)", min_value=0.0, value=defaults["discount_rate"] * 100, step=0.5, key="lcos_rate")
+                    life = st.number_input("Project life (years)", min_value=1.0, value=defaults["project_life_years"], step=1.0, key="lcos_life")
+                with basis_col:
+                    price = st.number_input("Charging price ($/MWh)", min_value=0.0, value=defaults["charge_price"], step=5.0, key="lcos_price")
+                    basis = st.radio(
+                        "CAPEX basis",
+                        options=["energy", "power"],
+                        format_func=lambda b: "Energy ($/kWhe x duration)" if b == "energy" else "Power ($/kWe)",
+                        key="lcos_basis"
+                    )
+                return {
+                    "discount_rate": float(rate) / 100,
+                    "project_life_years": float(life),
+                    "charge_price": float(price),
+                    "capex_basis": basis,
+                }
+
+            # Monte Carlo LCOS controls
+            if selected_chart == metric_charts.LCOS_CHART:
+                defaults = lcos.DEFAULT_ASSUMPTIONS
+                run_cols = st.columns(4)
+                with run_cols[0]:
+                    lcos_samples = st.selectbox(
+                        "Samples per technology",
+                        options=[10_000, 100_000, 1_000_000],
+                        format_func=lambda n: f"{n:,}",
+                        key="lcos_samples"
+                    )
+                    lcos_seed = st.number_input("Random seed", min_value=0, value=42, step=1, key="lcos_seed")
+                with run_cols[1]:
+                    lcos_duration = st.number_input("Duration (hr)", min_value=0.5, value=defaults["duration_hr"], step=0.5, key="lcos_duration")
+                    lcos_cycles = st.number_input("Cycles per year", min_value=1.0, value=defaults["cycles_per_year"], step=10.0, key="lcos_cycles")
+                lcos_assumptions = {
+                    "duration_hr": float(lcos_duration),
+                    "cycles_per_year": float(lcos_cycles),
+                    **lcos_financial_controls(run_cols[2], run_cols[3]),
+                }
+                options_key = (int(lcos_samples), int(lcos_seed), tuple(lcos_assumptions.items()))
+                with st.spinner("Running Monte Carlo..."):
+                    lcos_result = run_lcos_monte_carlo(filter_key, options_key, filtered_df)
+                chart_options[selected_chart] = {
+                    "n_samples": int(lcos_samples),
+                    "seed": int(lcos_seed),
+                    "assumptions": lcos_assumptions,
+                    "result": lcos_result,
+                }
+
+            # Duration x cycles LCOS sweep controls
+            if selected_chart == metric_charts.SWEEP_CHART:
+                sweep_cols = st.columns(4)
+                with sweep_cols[0]:
+                    sweep_points = st.selectbox("Grid points per axis", options=[50, 100, 250, 500], index=1, key="sweep_points")
+                    sweep_scenario = st.radio(
+                        "Parameter values",
+                        options=["midpoint", "optimistic", "pessimistic"],
+                        format_func=lambda v: {"midpoint": "Range midpoint", "optimistic": "Cheapest end", "pessimistic": "Dearest end"}[v],
+                        key="sweep_scenario"
+                    )
+                with sweep_cols[1]:
+                    sweep_cycles = st.slider("Annual cycles", min_value=1, max_value=1000, value=(10, 730), key="sweep_cycles")
+                sweep_assumptions = lcos_financial_controls(sweep_cols[2], sweep_cols[3])
+                options_key = (int(sweep_points), sweep_scenario, tuple(sweep_cycles), tuple(sweep_assumptions.items()))
+                with st.spinner("Evaluating LCOS grid..."):
+                    sweep_result = run_lcos_sweep(filter_key, options_key, filtered_df)
+                chart_options[selected_chart] = {
+                    "points": int(sweep_points),
+                    "scenario": sweep_scenario,
+                    "cycles_range": tuple(sweep_cycles),
+                    "assumptions": sweep_assumptions,
+                    "result": sweep_result,
+                }
+
+            # Site sizing controls
+            if selected_chart == metric_charts.SIZING_CHART:
+                site = site_sizing.DEFAULT_REQUIREMENT
+                site_cols = st.columns(4)
+                with site_cols[0]:
+                    site_power = st.number_input("Power (MW)", min_value=0.1, value=site["power_mw"], step=10.0, key="site_power")
+                    site_energy = st.number_input("Energy (MWh)", min_value=0.1, value=site["energy_mwh"], step=100.0, key="site_energy")
+                with site_cols[1]:
+                    site_land = st.number_input("Available land (acres)", min_value=0.1, value=site["land_acres"], step=5.0, key="site_land")
+                with site_cols[2]:
+                    site_mix = st.radio("Mix up to", options=[2, 3], index=1, format_func=lambda k: f"{k} technologies", key="site_mix")
+                    site_step = st.selectbox("Split granularity", options=[0.25, 0.1, 0.05], index=1, format_func=lambda v: f"{v:.0%}", key="site_step")
+                with site_cols[3]:
+                    site_basis = st.radio(
+                        "CAPEX basis",
+                        options=["energy", "power"],
+                        format_func=lambda b: "Energy ($/kWhe)" if b == "energy" else "Power ($/kWe)",
+                        key="site_basis"
+                    )
+                options_key = (float(site_power), float(site_energy), float(site_land), site_basis, int(site_mix), float(site_step))
+                with st.spinner("Screening sites..."):
+                    sizing_result = run_site_sizing(filter_key, options_key, filtered_df)
+                chart_options[selected_chart] = {
+                    "power_mw": float(site_power),
+                    "energy_mwh": float(site_energy),
+                    "land_acres": float(site_land),
+                    "capex_basis": site_basis,
+                    "envelopes": sizing_result["envelopes"],
+                }
+
+            # Hourly dispatch controls
+            if selected_chart == metric_charts.DISPATCH_CHART:
+                defaults = dispatch.DEFAULT_ASSUMPTIONS
+                dispatch_cols = st.columns(4)
+                with dispatch_cols[0]:
+                    profile_file = st.file_uploader(
+                        "Hourly profile (CSV)", type=["csv"], key="dispatch_file",
+                        help="One row per hour; every numeric column is simulated as a separate profile."
+                    )
+                    sample_years = st.selectbox("Sample profile years", options=[1, 2, 5], key="dispatch_years", disabled=profile_file is not None)
+                with dispatch_cols[1]:
+                    dispatch_kind = st.radio(
+                        "Profile type",
+                        options=dispatch.PROFILE_KINDS,
+                        format_func=lambda k: "Price ($/MWh)" if k == "price" else "Load (MW)",
+                        key="dispatch_kind"
+                    )
+                    dispatch_rating = st.number_input(
+                        "Storage rating (MW)", min_value=0.1, value=defaults["power_mw"], step=1.0, key="dispatch_rating",
+                        disabled=dispatch_kind == "price"
+                    )
+                with dispatch_cols[2]:
+                    dispatch_soc = st.slider("State of charge limits (%)", min_value=0, max_value=100, value=(5, 95), key="dispatch_soc")
+                with dispatch_cols[3]:
+                    dispatch_window = st.radio(
+                        "Scheduling window",
+                        options=[24, 168],
+                        format_func=lambda h: "Daily" if h == 24 else "Weekly",
+                        key="dispatch_window"
                     )
-                    filtered_df = filtered_df[
-                        (filtered_df[filter_col] >= selected_range[0]) & 
-                        (filtered_df[filter_col] <= selected_range[1])
-                    ]
-
-        # Filter by "Technology Type"
-        if "Technology Type" in df.columns:
-            technology_types = df["Technology Type"].unique()
-            selected_technology_types = []
-            for tech_type in technology_types:
-                if st.sidebar.checkbox(tech_type, value=True):
-                    selected_technology_types.append(tech_type)
-            filtered_df = filtered_df[
-                filtered_df["Technology Type"].isin(selected_technology_types)
-            ]
 
+                profiles = None
+                if profile_file is not None:
+                    try:
+                        profiles = dispatch.read_profiles(profile_file)
+                    except ValueError as e:
+                        st.error(f"Could not read profile: {e}")
+                if profiles is None:
+                    profiles = dispatch.sample_profile(int(sample_years))
+                    if dispatch_kind == "load":
+                        st.info("The sample profile is a price series; upload a load profile to estimate peak reduction.")
+
+                dispatch_assumptions = {
+                    "soc_min": dispatch_soc[0] / 100,
+                    "soc_max": dispatch_soc[1] / 100,
+                    "window_hours": int(dispatch_window),
+                    "power_mw": float(dispatch_rating),
+                }
+                options_key = (
+                    dispatch.profile_fingerprint(profiles, dispatch_kind), dispatch_kind, tuple(dispatch_assumptions.items())
+                )
+                with st.spinner("Simulating dispatch..."):
+                    dispatch_result = run_dispatch(filter_key, options_key, filtered_df, profiles)
+                chart_options[selected_chart] = {
+                    "profiles": profiles,
+                    "kind": dispatch_kind,
+                    "assumptions": dispatch_assumptions,
+                    "result": dispatch_result,
+                }
+
+            # Capacity fade controls
+            if selected_chart == metric_charts.FADE_CHART:
+                defaults = capacity_fade.DEFAULT_SETTINGS
+                fade_cols = st.columns(4)
+                with fade_cols[0]:
+                    fade_axis = st.radio("Time axis", options=["cycles", "years"], format_func=str.title, key="fade_axis")
+                with fade_cols[1]:
+                    fade_cycles_per_year = st.number_input(
+                        "Cycles per year", min_value=1.0, value=defaults["cycles_per_year"], step=10.0, key="fade_cycles_per_year"
+                    )
+                with fade_cols[2]:
+                    fade_horizon = st.number_input(
+                        "Horizon (cycles, 0 = longest cycle life)", min_value=0, value=0, step=1000, key="fade_horizon"
+                    )
+                with fade_cols[3]:
+                    fade_threshold = st.slider("End-of-life capacity (%)", min_value=50, max_value=95, value=80, key="fade_threshold")
+                fade_settings = {
+                    "horizon_cycles": int(fade_horizon) or None,
+                    "steps": defaults["steps"],
+                    "eol_threshold": fade_threshold / 100,
+                    "cycles_per_year": float(fade_cycles_per_year),
+                }
+                fade_result = run_capacity_fade(filter_key, tuple(fade_settings.items()), filtered_df)
+                chart_options[selected_chart] = {**fade_settings, "axis": fade_axis, "result": fade_result["plot"]}
+
+            # Lazy figure builders: only the selected chart is built on a rerun.
+            # Hover payloads come precomputed from hover_data.
+            figure_builders = metric_charts.make_figure_builders(derived_df, active_filter_ranges, hover_data, chart_options)
+
+            # The shared figure cache returns the figure when the chart name, the
+            # filter fingerprint and the chart options are unchanged, so
+            # re-selecting a chart is instant.
+            selected_figure = figures.get_or_build(
+                (selected_chart, filter_key, options_key), figure_builders[selected_chart], session_id
+            )
+            st.plotly_chart(selected_figure, width="stretch", config={'displayModeBar': True, 'responsive': True})
+
+            # Once the filters settle, build the remaining static charts in the
+            # background, starting with the ones after the selected chart.
+            static_charts = metric_charts.STATIC_CHARTS
+            start = static_charts.index(selected_chart) + 1 if selected_chart in static_charts else 0
+            precomputer.schedule(filter_key, figure_builders, static_charts[start:] + static_charts[:start])
+
+            if selected_chart == metric_charts.PARETO_CHART and chart_options[selected_chart]["metrics"]:
+                frontier = filtered_df.loc[chart_options[selected_chart]["front"], "Detailed Technology"]
+                st.caption(f"Non-dominated technologies ({len(frontier)}): {', '.join(frontier)}")
+            elif selected_chart == metric_charts.RECTANGLE_CHART:
+                st.caption(
+                    "Each rectangle spans a technology's low-high range on both metrics, clipped to the active slider filters; "
+                    "the dot at its center shows the technology on hover. Technologies missing either range are omitted."
+                )
+            elif selected_chart == metric_charts.LCOS_CHART:
+                st.caption(
+                    "Each input is drawn uniformly from its low/high range. Whiskers show P5-P95, boxes P25-P75. "
+                    "Technologies missing CAPEX, OPEX, RTE or cycle life are omitted; missing degradation is treated as no fade."
+                )
+            elif selected_chart == metric_charts.SWEEP_CHART:
+                st.caption(
+                    "Each cell shows the technology with the lowest LCOS at that discharge duration and annual cycle count. "
+                    "A technology only competes inside its own Duration - Low/High range; blank cells have no feasible technology."
+                )
+            elif selected_chart == metric_charts.DISPATCH_CHART:
+                st.caption(
+                    "Each technology is a 1 MW unit with its duration in MWh, dispatched hour by hour against the profile. "
+                    "Bars span the worse and better ends of its duration, RTE, degradation, ramp rate and response time ranges; "
+                    "multi-year profiles carry capacity fade from year to year."
+                )
+                st.dataframe(dispatch_result.round(2), hide_index=True, width="stretch")
+            elif selected_chart == metric_charts.FADE_CHART:
+                st.caption(
+                    "Capacity fades geometrically at the Degradation (%/cycle) rate until the rated cycle life, where the line ends. "
+                    "End of life is whichever comes first: the capacity threshold or the rated cycle life."
+                )
+                st.dataframe(fade_result["table"].round(1), hide_index=True, width="stretch")
+            elif selected_chart == metric_charts.SIZING_CHART:
+                st.caption(
+                    "Bars span the land needed at the low and high density. Separate power and energy blocks add their footprints; "
+                    "integrated systems use the larger of the two."
+                )
+                st.subheader("Cheapest Technology Mixes That Fit")
+                if len(sizing_result["portfolios"]):
+                    st.dataframe(sizing_result["portfolios"].round(2), hide_index=True, width="stretch")
+                else:
+                    st.info("No mix of the filtered technologies fits this site.")
+                stats = sizing_result["stats"]
+                st.caption(
+                    f"Searched {stats['combinations']:,} combinations: {stats['pruned_land']:,} ruled out by the land bound, "
+                    f"{stats['pruned_cost']:,} by the cost bound, {stats['evaluated']:,} evaluated across {stats['splits']:,} splits each. "
+                    "Land uses the high density; cost is the CAPEX range midpoint."
+                )
 
-        # Filter by "Detailed Technology" using pills organized by category
-        if "Detailed Technology" in df.columns:
-            # Define categories and their technologies (alphabetically ordered)
-            tech_categories = {
-                "Electrochemical": ["Iron-Flow", "Lead-acid", "Lithium-ion", "Organic-Solid Flow", "Sodium-ion", "Vanadium-Flow", "Zinc-Anode"],
-                "Thermal": ["Molten Salt TES ", "Solid Media TES - Pumped TES", "Solid Media TES - TPV ", "Thermochemical "],
-                "Mechanical": ["Compressed Air Energy Storage (Caverns)", "Compressed Gas Energy Storage", "Gravitational Storage (Blocks)", "Gravitational Storage (Railcars)", "Liquid Air", "Pumped Storage Hydropower (PSH)"],
-                "Chemical": ["Hydrogen"]
-            }
-            
-            # Collect all selected detailed technologies based on active technology types
-            all_selected_detailed = []
-            
-            for tech_type in selected_technology_types:
-                if tech_type in tech_categories:
-                    st.sidebar.markdown(f"**{tech_type}**")
-                    
-                    # Get available technologies for this category
-                    available_techs = [t for t in tech_categories[tech_type] if t in df["Detailed Technology"].unique()]
-                    
-                    if available_techs:
-                        selected_techs = st.sidebar.pills(
-                            f"{tech_type}_detailed",
-                            options=available_techs,
-                            default=available_techs,
-                            selection_mode="multi",
-                            label_visibility="collapsed"
-                        )
-                        all_selected_detailed.extend(selected_techs)
-            
-            # Filter dataframe by selected detailed technologies
-            if all_selected_detailed:
-                filtered_df = filtered_df[
-                    filtered_df["Detailed Technology"].isin(all_selected_detailed)
-                ]
+        render_chart_area()
 
+        # Nearest neighbors in the normalized metric space; the KD-tree keeps
+        # each lookup to a few leaves however large the catalog grows.
+        @st.fragment
+        def render_similar_technologies():
+            st.header("Similar Technologies")
+            if metrics_upload is None:
+                similarity_index = load_similarity_index(metrics_version)
             else:
-                # If no detailed technologies selected, show empty dataframe
-                df = df[df["Detailed Technology"].isin([])]
-
-        # Function to create range bars with clipping
-        def create_range_bar(df, x_col, y_low_col, y_high_col, title):
-            if len(df) == 0:
-                fig = go.Figure()
-                fig.update_layout(title=title, xaxis_title=x_col)
-                return fig
-                
-            fig = go.Figure()
-            
-            clip_range = None
-            metric_name = None
-            
-            for metric, (low_col, high_col) in range_metrics.items():
-                if low_col == y_low_col and high_col == y_high_col:
-                    metric_name = metric
-                    if metric in active_filter_ranges:
-                        clip_range = active_filter_ranges[metric]
-                    break
-            
-            for i, row in df.iterrows():
-                # Skip rows with NaN values
-                if pd.isna(row[y_low_col]) or pd.isna(row[y_high_col]):
-                    continue
-                    
-                low_val = row[y_low_col]
-                high_val = row[y_high_col]
-                
-                rte_low = row.get("RTE - Low (%)", "N/A")
-                rte_high = row.get("RTE - High (%)", "N/A")
-                trl = row.get("TRL", "N/A")
-                capex_low = row.get("CAPEX Energy Basis - Low ($/kWhe)", "N/A")
-                capex_high = row.get("CAPEX Energy Basis - High ($/kWhe)", "N/A")
-                
-                hover_text = f"<b>{row[x_col]}</b><br><br>"
-                hover_text += f"RTE: {rte_low} - {rte_high}%<br>" if rte_low != "N/A" else "RTE: N/A<br>"
-                hover_text += f"TRL: {trl}<br>"
-                hover_text += f"CAPEX: ${capex_low} - ${capex_high}/kWhe<br>" if capex_low != "N/A" else "CAPEX: N/A<br>"
-                hover_text += "<extra></extra>"
-                
-                if clip_range:
-                    clipped_low = max(low_val, clip_range[0])
-                    clipped_high = min(high_val, clip_range[1])
-                    
-                    if clipped_low <= clipped_high:
-                        fig.add_trace(go.Bar(
-                            x=[row[x_col]],
-                            y=[clipped_high - clipped_low],
-                            base=[clipped_low],
-                            name=row[x_col],
-                            hovertemplate=hover_text
-                        ))
-                else:
-                    fig.add_trace(go.Bar(
-                        x=[row[x_col]],
-                        y=[high_val - low_val],
-                        base=[low_val],
-                        name=row[x_col],
-                        hovertemplate=hover_text
-                    ))
-            
-            fig.update_layout(title=title, barmode='group')
-            return fig
-
-        def set_figure_size(fig):
-            fig.update_layout(
-                height=800,
-                margin=dict(l=50, r=50, t=80, b=50),
-                font=dict(size=12),
-                showlegend=False
-            )
-            return fig
-        
-        def set_figure_size_with_legend(fig):
-            fig.update_layout(
-                height=800,
-                margin=dict(l=50, r=50, t=80, b=50),
-                font=dict(size=12),
-            )
-            return fig
-
-        # Lazy figure builders: each entry is a zero-argument function that
-        # constructs ONE figure. Only the builder for the selected chart is
-        # ever called, so a rerun rebuilds 1 figure instead of all 19.
-        figure_builders = {
-            "Duration Range (hr)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "Duration - Low (hr)", "Duration - High (hr)", "Duration Range (hr)")),
-            "Round-Trip Efficiency (RTE) Range (%)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "RTE - Low (%)", "RTE - High (%)", "Round-Trip Efficiency (RTE) Range (%)")),
-            "Degradation Rate Range (%/cycle)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "Degradation - Low (%/cycle)", "Degradation - High (%/cycle)", "Degradation Rate Range (%/cycle)")),
-            "Cycle Life Range (#)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "Cycle Life - Low (#)", "Cycle Life - High (#)", "Cycle Life Range (#)")),
-            "Ramp Rate Range (% rated power/sec)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "Ramp Rate - Low (% rated power/sec)", "Ramp Rate - High (% rated power/sec)", "Ramp Rate Range (% rated power/sec)")),
-            "Response Time Range (s)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "Response Time - Low (s)", "Response Time - High (s)", "Response Time Range (s)")),
-            "Energy Density Range (acre/MWhe)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "Energy Density - Low (acre/MWhe)", "Energy Density - High (acre/MWhe)", "Energy Density Range (acre/MWhe)")),
-            "Power Density Range (acre/MW)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "Power Density - Low (acre/MW)", "Power Density - High (acre/MW)", "Power Density Range (acre/MW)")),
-            "CAPEX Energy Basis Range ($/kWhe)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "CAPEX Energy Basis - Low ($/kWhe)", "CAPEX Energy Basis - High ($/kWhe)", "CAPEX Energy Basis Range ($/kWhe)")),
-            "CAPEX Power Basis Range ($/kWe)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "CAPEX Power Basis - Low ($/kWe)", "CAPEX Power Basis - High ($/kWe)", "CAPEX Power Basis Range ($/kWe)")),
-            "OPEX Range ($/kW-year)": lambda: set_figure_size(create_range_bar(filtered_df, "Detailed Technology", "OPEX - Low ($/kW-year)", "OPEX - High ($/kW-year)", "OPEX Range ($/kW-year)")),
-            "Technology Readiness Level (TRL)": lambda: set_figure_size(px.bar(filtered_df, x="Detailed Technology", y="TRL", title="Technology Readiness Level (TRL)", color="Detailed Technology")),
-            "Application Readiness Level (ARL)": lambda: set_figure_size(px.bar(filtered_df, x="Detailed Technology", y="ARL", title="Application Readiness Level (ARL)", color="Detailed Technology")),
-            "Manufacturing Readiness Level (MRL)": lambda: set_figure_size(px.bar(filtered_df, x="Detailed Technology", y="MRL", title="Manufacturing Readiness Level (MRL)", color="Detailed Technology")),
-            "Geological Feature Requirement": lambda: set_figure_size_with_legend(px.bar(filtered_df, x="Detailed Technology", color="Geological Req.", title="Geological Feature Requirement")),
-            "Historical Fire Events": lambda: set_figure_size_with_legend(px.bar(filtered_df, x="Detailed Technology", color="Fire Incidents", title="Historical Fire Events")),
-            "Environmental Impact": lambda: set_figure_size_with_legend(px.bar(filtered_df, x="Detailed Technology", color="Environmental Impact", title="Environmental Impact")),
-            "Separate Power & Energy": lambda: set_figure_size_with_legend(px.bar(filtered_df, x="Detailed Technology", color="Separate Power & Energy ", title="Separate Power & Energy")),
-            "Off-Gassing": lambda: create_offgassing_chart(filtered_df),
-        }
-        
-        # Create custom Off-Gassing chart with Yes/No colors and hover details
-        def create_offgassing_chart(df):
-            if len(df) == 0:
-                # Return empty figure if no data
-                fig = go.Figure()
-                fig.update_layout(
-                    title="Off-Gassing",
-                    xaxis_title="Detailed Technology",
-                    yaxis_title="Count"
+                similarity_index = metrics_upload.artifact("similarity", lambda: similarity.build_index(
+                    df, metric_charts.RANGE_METRICS, list(metric_charts.CATEGORY_CHARTS.values())
+                ))
+            names = similarity_index["names"]
+            col1, col2, col3 = st.columns([3, 1, 1])
+            with col1:
+                # Only the filtered rows are offered, so the options sent to
+                # the browser stay as short as the filtered table
+                reference = st.selectbox(
+                    "Technologies that behave like:", filtered_rows.nonzero()[0].tolist(), format_func=lambda row: names[row],
+                    key="similar_reference"
                 )
-                return fig
-            
-            # Create a new column for Yes/No display
-            df_offgassing = df.copy()
-            df_offgassing["Off-Gassing Display"] = df_offgassing["Off-Gassing "].apply(
-                lambda x: "Yes" if pd.notna(x) and str(x).strip().startswith("Yes") else "No"
+            with col2:
+                neighbors = st.number_input("Matches", min_value=1, max_value=50, value=5, key="similar_count")
+            with col3:
+                within_filters = st.checkbox("Only filtered technologies", value=True, key="similar_within_filters")
+            if reference is None:
+                st.info("No technologies match the current filters.")
+                return
+            matches = similarity.similar_technologies(
+                similarity_index, reference, int(neighbors), filtered_rows if within_filters else None
             )
-            
-            # Define colors for Yes/No
-            color_map = {"Yes": "#EF553B", "No": "#00CC96"}  # Plotly default colors
-            
-            # Track which legend items we've added
-            legend_added = set()
-            
-            # Create figure with custom hover
-            fig = go.Figure()
-            
-            for i, row in df_offgassing.iterrows():
-                offgassing_full = row.get("Off-Gassing ", "")
-                offgassing_display = row["Off-Gassing Display"]
-                
-                # Create hover text with full explanation
-                hover_text = f"<b>{row['Detailed Technology']}</b><br><br>"
-                hover_text += f"Off-Gassing: {offgassing_display}<br>"
-                hover_text += f"Details: {offgassing_full}<br>"
-                hover_text += "<extra></extra>"
-                
-                # Only show legend for first occurrence of each Yes/No
-                show_legend = offgassing_display not in legend_added
-                if show_legend:
-                    legend_added.add(offgassing_display)
-                
-                fig.add_trace(go.Bar(
-                    x=[row["Detailed Technology"]],
-                    y=[1],
-                    name=offgassing_display,
-                    legendgroup=offgassing_display,
-                    showlegend=show_legend,
-                    marker_color=color_map[offgassing_display],
-                    hovertemplate=hover_text
-                ))
-            
-            fig.update_layout(
-                title="Off-Gassing",
-                yaxis_title="Count",
-                xaxis_title="Detailed Technology",
-                margin=dict(l=50, r=50, t=80, b=50),
-                font=dict(size=12),
-                autosize=True,
-                barmode='group'
+            if len(matches) == 0:
+                st.info("No other technologies match the current filters.")
+                return
+            st.dataframe(matches.drop(columns="Row").round(2), hide_index=True, width="stretch")
+            st.caption(
+                "Distance is measured over range-metric midpoints (log scale for metrics spanning orders of magnitude), "
+                "readiness levels and categorical attributes, each normalized so one metric's full span counts 1. "
+                "The % columns split each match's squared distance by metric."
             )
-            return fig
-        
-        # Cache wrapper: returns the figure for one chart. Streamlit reuses the
-        # cached figure when the chart name, the filtered data, and the active
-        # slider ranges are all unchanged, so re-selecting a chart is instant.
-        # The df / ranges arguments exist purely to form the cache key; the
-        # builder lambdas read the current filtered_df and active_filter_ranges.
-        @st.cache_data(show_spinner=False)
-        def build_selected_figure(chart_name, _filtered_df_key, _active_ranges_key):
-            return figure_builders[chart_name]()
-
-        # Move chart selection BEFORE figure construction so only the
-        # selected figure is built on each rerun.
-        selected_chart = st.selectbox("Select Graph to View:", list(figure_builders.keys()))
-
-        # Hashable snapshot of active slider ranges for cache invalidation.
-        active_ranges_key = tuple(sorted(
-            (k, float(v[0]), float(v[1])) for k, v in active_filter_ranges.items()
-        ))
-
-        selected_figure = build_selected_figure(selected_chart, filtered_df, active_ranges_key)
-        st.plotly_chart(selected_figure, width="stretch", config={'displayModeBar': True, 'responsive': True})
+
+        render_similar_technologies()
 
         # Display the filtered data
         st.header("Filtered Data")
@@ -773,7 +1022,7 @@ elif st.session_state.page == "Metric Visualization":
 
         st.download_button(
             label="Download Filtered Data as CSV",
-            data=filtered_df.to_csv(index=False).encode('utf-8'),
+            data=csv_export(filtered_df, ledger, session_id, "Filtered metrics CSV"),
             file_name='ldes_filtered_metrics.csv',
             mime='text/csv',
         )
@@ -790,16 +1039,22 @@ elif st.session_state.page == "Project Tracking":
     
     try:
         # Use cached data loading
-        projects_df = load_projects_data()
+        projects_upload = custom_data_uploader("projects", "Project tracking CSV (same columns as the built-in list)")
+        if projects_upload is None:
+            projects_df = load_projects_data(data_files.data_version(projects_url))
+        else:
+            projects_df = projects_upload.frame
+            ledger.record(session_id, "frames", "Uploaded projects", projects_upload.frame_bytes)
+        technology_index = technology_index_for(None, projects_upload)
+        project_tech_categories = technology_index["project_options"]
         
         # Sidebar filters for Project Tracking
         st.sidebar.header("Project Tracking Filters")
         
         # Filter by "Technology Type"
         if "Technology Type" in projects_df.columns:
-            technology_types = projects_df["Technology Type"].unique()
             selected_technology_types = []
-            for tech_type in technology_types:
+            for tech_type in project_tech_categories:
                 if st.sidebar.checkbox(f"{tech_type}", value=True, key=f"project_tech_{tech_type}"):
                     selected_technology_types.append(tech_type)
             filtered_projects_df = projects_df[projects_df["Technology Type"].isin(selected_technology_types)]
@@ -807,33 +1062,23 @@ elif st.session_state.page == "Project Tracking":
             filtered_projects_df = projects_df
 
         # Filter by "Detailed Technology" using pills organized by category
+        # (options come from the taxonomy index, built once per dataset version)
         if "Detailed Technology" in projects_df.columns:
-            # Define categories and their technologies for project tracking (alphabetically ordered)
-            project_tech_categories = {
-                "Electrochemical": ["Iron Flow", "Lead-Acid", "Lithium-ion", "Sodium-ion", "Vanadium Flow"],
-                "Mechanical": ["Compressed Air Storage", "Geopressured Geothermal System (GGS)", "Pumped Hydro Storage"],
-                "Thermal": ["Latent Heat TES", "Molten Salt TES", "Sensible Heat TES", "Sodium-Sulfur TES"]
-            }
-            
             # Collect all selected detailed technologies based on active technology types
             all_selected_project_detailed = []
             
             for tech_type in selected_technology_types:
-                if tech_type in project_tech_categories:
+                available_techs = project_tech_categories.get(tech_type, [])
+                if available_techs:
                     st.sidebar.markdown(f"**{tech_type}**")
-                    
-                    # Get available technologies for this category
-                    available_techs = [t for t in project_tech_categories[tech_type] if t in projects_df["Detailed Technology"].unique()]
-                    
-                    if available_techs:
-                        selected_techs = st.sidebar.pills(
-                            f"project_{tech_type}_detailed",
-                            options=available_techs,
-                            default=available_techs,
-                            selection_mode="multi",
-                            label_visibility="collapsed"
-                        )
-                        all_selected_project_detailed.extend(selected_techs)
+                    selected_techs = st.sidebar.pills(
+                        f"project_{tech_type}_detailed",
+                        options=available_techs,
+                        default=available_techs,
+                        selection_mode="multi",
+                        label_visibility="collapsed"
+                    )
+                    all_selected_project_detailed.extend(selected_techs)
             
             # Filter dataframe by selected detailed technologies
             if all_selected_project_detailed:
@@ -846,6 +1091,8 @@ elif st.session_state.page == "Project Tracking":
                     filtered_projects_df["Detailed Technology"].isin([])
                 ]
 
+        ledger.record(session_id, "frames", "Filtered projects", memory_budget.estimate_bytes(filtered_projects_df))
+
         # Display basic statistics
         st.subheader("Project Overview")
         col1, col2 = st.columns(2)
@@ -856,13 +1103,14 @@ elif st.session_state.page == "Project Tracking":
 
         # Render the project map
         with st.spinner("Loading map..."):
-            project_map.render_project_map(filtered_projects_df)    
+            project_map.render_project_map(filtered_projects_df, technology_index["project_ranges"])    
         
         # Display the full dataframe
         st.subheader("All Projects")
         st.caption("Double-click on any cell to see its full content")
 
-        project_column_config = {}
+        # Hide the precomputed display columns
+        project_column_config = {col: None for col in project_map.DISPLAY_COLUMNS}
         
         st.data_editor(
             filtered_projects_df,
@@ -876,7 +1124,7 @@ elif st.session_state.page == "Project Tracking":
         # Option to download the data
         st.download_button(
             label="Download Project Data as CSV",
-            data=filtered_projects_df.to_csv(index=False).encode('utf-8'),
+            data=csv_export(project_map.public_columns(filtered_projects_df), ledger, session_id, "Project CSV"),
             file_name='ldes_project_tracking.csv',
             mime='text/csv',
         )
@@ -887,6 +1135,37 @@ elif st.session_state.page == "Project Tracking":
             "If the problem persists, contact ndmart@sandia.gov."
         )
 
+# ==================== ADMIN PAGE ====================
+elif st.session_state.page == "Admin":
+    st.title("Memory Usage")
+
+    figures = shared_figure_cache()
+    rss = memory_budget.process_rss()
+    budget = ledger.budget_bytes
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Process RSS", f"{rss / 1e6:,.0f} MB" if rss else "N/A")
+    with col2:
+        st.metric("Budget", f"{budget / 1e6:,.0f} MB" if budget else "None")
+    with col3:
+        st.metric("Cached Figures", len(figures))
+
+    if not budget:
+        st.info(f"Set {memory_budget.BUDGET_ENV} to shed idle sessions' artifacts when the process grows past it.")
+    st.caption(
+        f"Sessions idle for over {ledger.idle_seconds:,.0f} s lose their cached figures first when over budget; "
+        "if that is not enough, the shared figure and result caches are cleared. "
+        "Frames are the filtered data of each session's last run; exports count CSVs actually downloaded."
+    )
+    st.dataframe(ledger.snapshot(figures).round(2), hide_index=True, width="stretch")
+
+    if st.button("Shed now", disabled=not budget):
+        ledger.enforce(figures, force=True)
+    for when, action in reversed(ledger.history):
+        st.text(f"{when}  {action}")
+
+ledger.record(session_id, "state", "Session state", memory_budget.estimate_bytes(dict(st.session_state)))
+
 # ==================== PERSISTENT FOOTER (APPEARS ON ALL PAGES) ====================
 st.divider()
 st.markdown(
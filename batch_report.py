@@ -0,0 +1,252 @@
+"""
+Headless HTML reports for saved filter presets.
+
+    python batch_report.py presets.json -o report --workers 4
+
+presets.json holds a list of {"name": ..., "filters": {...}} entries, with
+filters keyed by the sidebar names (see metric_filters.preset_specs). Each
+preset gets one page with every metric chart and the project map; the
+pages share a single plotly.min.js written next to them.
+"""
+import argparse
+import functools
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from plotly.offline import get_plotlyjs
+
+import data_files
+import derived_metrics
+import metric_charts
+import metric_filters
+import project_map
+import taxonomy
+
+
+MAP_CHART = "Project Map"
+
+PLOTLY_JS = "plotly.min.js"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{scripts}
+<style>
+body {{ font-family: sans-serif; margin: 2em; color: #222; }}
+table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #ccc; padding: 4px 8px; text-align: left; }}
+.error {{ color: #b00020; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# Loaded once per worker process by load_data
+_data = {}
+
+
+def load_data(metrics_path=data_files.METRICS_PATH, projects_path=data_files.PROJECTS_PATH):
+    """
+    Read both datasets and the shared lookups into this process.
+    """
+    metrics = data_files.read_metrics(metrics_path)
+    projects = data_files.read_projects(projects_path)
+    _data.update(
+        metrics=metrics,
+        projects=projects,
+        hover=metric_charts.build_hover_data(metrics),
+        index=taxonomy.build_index(metrics, projects, metric_charts.RANGE_METRICS),
+        # Derived metric columns, computed the first time a preset needs them
+        derived=functools.lru_cache(maxsize=None)(lambda name: derived_metrics.compute(metrics, metric_charts.RANGE_METRICS, name)),
+    )
+
+
+def read_presets(path):
+    """
+    Presets from a JSON file: a list of {"name", "filters"} entries, or an
+    object holding that list under "presets".
+    """
+    with open(path) as f:
+        presets = json.load(f)
+    if isinstance(presets, dict):
+        presets = presets.get("presets", [])
+    for i, preset in enumerate(presets):
+        if not isinstance(preset, dict) or not isinstance(preset.get("filters", {}), dict):
+            raise ValueError(f"Preset {i + 1} must be an object with a 'filters' object")
+    return presets
+
+
+def page_name(position, name):
+    slug = re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-") or "preset"
+    return f"{position + 1:03d}-{slug[:60]}.html"
+
+
+def _figure_html(fig, div_id):
+    return fig.to_html(full_html=False, include_plotlyjs=False, div_id=div_id, config={"displaylogo": False})
+
+
+def build_preset(task):
+    """
+    Filter the data for one preset, build its figures and write its page.
+    Returns a summary row for the index page. A preset that cannot be
+    built, such as one with a malformed filter, gets a row with its Error
+    and no page, and the other presets carry on.
+    """
+    position, preset, out_dir, charts = task
+    start = time.perf_counter()
+    name = preset.get("name") or f"Preset {position + 1}"
+    try:
+        return _write_preset_page(position, name, preset, out_dir, charts, start)
+    except Exception as e:
+        return {
+            "Preset": name,
+            "Page": None,
+            "Technologies": 0,
+            "Projects": 0,
+            "Failed Charts": 0,
+            "Error": str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}",
+            "Seconds": time.perf_counter() - start,
+        }
+
+
+def _write_preset_page(position, name, preset, out_dir, charts, start):
+    metrics, projects, index = _data["metrics"], _data["projects"], _data["index"]
+    range_metrics = derived_metrics.with_derived(metrics, metric_charts.RANGE_METRICS)
+    specs, active_filter_ranges = metric_filters.preset_specs(metrics, range_metrics, preset.get("filters", {}), name)
+    mask = metric_filters.combined_mask(len(metrics), specs, lambda spec: metric_filters.filter_mask(
+        derived_metrics.frame_for_spec(metrics, spec, metric_charts.RANGE_METRICS, _data["derived"]), spec
+    ))
+    filtered_df = metrics[mask]
+
+    # Projects whose technology (by taxonomy id) survived the preset; all of
+    # them when the preset filters nothing
+    if specs:
+        kept_ids = set(index["metric_ids"][mask].dropna())
+        filtered_projects = projects[index["project_ids"].isin(kept_ids).fillna(False).to_numpy()]
+    else:
+        filtered_projects = projects
+
+    builders = metric_charts.make_figure_builders(filtered_df, active_filter_ranges, _data["hover"], derived_columns=_data["derived"])
+    builders[MAP_CHART] = lambda: project_map.create_choropleth_map(project_map.prepare_map_data(filtered_projects)[0])
+
+    sections = []
+    errors = 0
+    for i, chart in enumerate(charts):
+        try:
+            content = _figure_html(builders[chart](), f"fig-{i}")
+        except Exception as e:
+            errors += 1
+            content = f'<p class="error">Could not build this chart: {html.escape(str(e))}</p>'
+        sections.append(f"<h2>{html.escape(chart)}</h2>\n{content}")
+
+    filter_rows = "".join(
+        f"<tr><th>{html.escape(str(k))}</th><td>{html.escape(json.dumps(v))}</td></tr>"
+        for k, v in preset.get("filters", {}).items()
+    ) or '<tr><td colspan="2">No filters</td></tr>'
+    body = (
+        f'<p><a href="index.html">All presets</a></p>\n<h1>{html.escape(name)}</h1>\n'
+        f"<table>{filter_rows}</table>\n"
+        f"<p>{len(filtered_df)} of {len(metrics)} technologies, {len(filtered_projects)} of {len(projects)} projects</p>\n"
+        + "\n".join(sections)
+    )
+    file_name = page_name(position, name)
+    with open(os.path.join(out_dir, file_name), "w", encoding="utf-8") as f:
+        f.write(PAGE_TEMPLATE.format(title=html.escape(name), scripts=f'<script src="{PLOTLY_JS}"></script>', body=body))
+
+    return {
+        "Preset": name,
+        "Page": file_name,
+        "Technologies": len(filtered_df),
+        "Projects": len(filtered_projects),
+        "Failed Charts": errors,
+        "Error": None,
+        "Seconds": time.perf_counter() - start,
+    }
+
+
+def _index_row(row):
+    if row["Error"]:
+        return (
+            f'<tr><td>{html.escape(row["Preset"])}</td>'
+            f'<td colspan="3" class="error">Could not build this preset: {html.escape(row["Error"])}</td></tr>'
+        )
+    return (
+        f'<tr><td><a href="{row["Page"]}">{html.escape(row["Preset"])}</a></td>'
+        f'<td>{row["Technologies"]}</td><td>{row["Projects"]}</td><td>{row["Failed Charts"]}</td></tr>'
+    )
+
+
+def write_index(out_dir, rows, elapsed):
+    links = "".join(_index_row(row) for row in rows)
+    body = (
+        "<h1>LDES Screening Report</h1>\n"
+        f"<p>{len(rows)} presets, generated {time.strftime('%Y-%m-%d %H:%M')} in {elapsed:.0f} s</p>\n"
+        "<table><tr><th>Preset</th><th>Technologies</th><th>Projects</th><th>Failed Charts</th></tr>"
+        f"{links}</table>"
+    )
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(PAGE_TEMPLATE.format(title="LDES Screening Report", scripts="", body=body))
+
+
+def build_report(presets, out_dir, charts=None, workers=None, metrics_path=data_files.METRICS_PATH, projects_path=data_files.PROJECTS_PATH):
+    """
+    Write index.html, plotly.min.js and one page per preset into out_dir.
+    With workers, presets are built across a process pool, each worker
+    loading the data once. Returns the index rows.
+    """
+    charts = list(charts or metric_charts.CHART_NAMES + [MAP_CHART])
+    unknown = [c for c in charts if c not in metric_charts.CHART_NAMES and c != MAP_CHART]
+    if unknown:
+        raise ValueError(f"Unknown charts: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, PLOTLY_JS), "w", encoding="utf-8") as f:
+        f.write(get_plotlyjs())
+
+    tasks = [(i, preset, out_dir, charts) for i, preset in enumerate(presets)]
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=load_data, initargs=(metrics_path, projects_path)) as executor:
+            rows = list(executor.map(build_preset, tasks))
+    else:
+        load_data(metrics_path, projects_path)
+        rows = [build_preset(task) for task in tasks]
+
+    write_index(out_dir, rows, time.perf_counter() - start)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a static HTML report of every chart for each filter preset.")
+    parser.add_argument("presets", help="JSON file of filter presets")
+    parser.add_argument("-o", "--out", default="report", help="output directory (default: report)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--charts", nargs="+", help="only these charts, by title")
+    parser.add_argument("--metrics", default=data_files.METRICS_PATH, help="metrics CSV")
+    parser.add_argument("--projects", default=data_files.PROJECTS_PATH, help="project tracking CSV")
+    args = parser.parse_args(argv)
+
+    rows = build_report(read_presets(args.presets), args.out, args.charts, args.workers, args.metrics, args.projects)
+    failed = sum(row["Failed Charts"] for row in rows)
+    failed_presets = [row for row in rows if row["Error"]]
+    problems = [f"{failed} charts failed"] if failed else []
+    problems += [f"{len(failed_presets)} presets failed"] if failed_presets else []
+    print(
+        f"Wrote {len(rows) - len(failed_presets)} preset pages to {os.path.join(args.out, 'index.html')}"
+        + (f" ({', '.join(problems)})" if problems else "")
+    )
+    for row in failed_presets:
+        print(f"  {row['Preset']}: {row['Error']}")
+
+
+if __name__ == "__main__":
+    main()
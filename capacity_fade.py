@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_SETTINGS = {
+    "horizon_cycles": None,  # None: the longest cycle life among the technologies
+    "steps": 5000,
+    "eol_threshold": 0.8,  # remaining capacity fraction treated as end of life
+    "cycles_per_year": 300.0,
+}
+
+# Points per trajectory kept for plotting
+PLOT_POINTS = 250
+
+
+def fade_bounds(df, range_metrics):
+    """
+    Per-technology degradation (fraction per cycle) and cycle life, each a
+    (2, n) array with the pessimistic end (fast fade, short life) in row 0
+    and the optimistic end in row 1.
+
+    Missing degradation means no fade and missing cycle life means no
+    cycle limit, as in the LCOS model; technologies missing both are
+    dropped. Returns (technologies, degradation, cycle_life).
+    """
+    def bounds(metric):
+        low_col, high_col = range_metrics[metric]
+        low = df[low_col].to_numpy(dtype=float)
+        high = df[high_col].to_numpy(dtype=float)
+        return np.minimum(low, high), np.maximum(low, high)
+
+    deg_low, deg_high = bounds("Degradation (%/cycle)")
+    life_low, life_high = bounds("Cycle Life (#)")
+    valid = ~(np.isnan(deg_low) & np.isnan(life_low))
+
+    degradation = np.nan_to_num(np.vstack([deg_high, deg_low])) / 100
+    cycle_life = np.nan_to_num(np.vstack([life_low, life_high]), nan=np.inf)
+    return df["Detailed Technology"].to_numpy()[valid], degradation[:, valid], cycle_life[:, valid]
+
+
+def end_of_life(degradation, cycle_life, threshold):
+    """
+    Cycles until capacity falls to `threshold` or the rated cycle life is
+    reached, whichever comes first.
+    """
+    with np.errstate(divide="ignore"):
+        to_threshold = np.where(degradation > 0, np.log(threshold) / np.log1p(-np.minimum(degradation, 1 - 1e-12)), np.inf)
+    return np.minimum(to_threshold, cycle_life)
+
+
+def trajectories(degradation, cycle_life, cycles):
+    """
+    Remaining capacity fraction at each cycle count, broadcast over
+    (technology, bound, time): geometric fade per cycle, NaN once the
+    rated cycle life is exceeded.
+    """
+    d = degradation.T[:, :, None]
+    life = cycle_life.T[:, :, None]
+    t = np.asarray(cycles, dtype=float)[None, None, :]
+    return np.where(t <= life, np.exp(t * np.log1p(-d)), np.nan)
+
+
+def project_fade(df, range_metrics, settings=None):
+    """
+    Capacity-fade trajectories for every technology at both bounds.
+
+    Returns a dict with "technologies", the "cycles" axis, "capacity" as a
+    (technology, bound, step) array and "end_of_life" cycles as a
+    (technology, bound) array, plus the remaining "capacity_at_life" at the
+    rated cycle life; bound 0 is pessimistic, 1 optimistic.
+    """
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    technologies, degradation, cycle_life = fade_bounds(df, range_metrics)
+
+    horizon = settings["horizon_cycles"]
+    if not horizon:
+        finite = cycle_life[np.isfinite(cycle_life)]
+        horizon = finite.max() if len(finite) else 10_000
+    cycles = np.linspace(0, horizon, int(settings["steps"]) + 1)
+
+    return {
+        "technologies": technologies,
+        "cycles": cycles,
+        "capacity": trajectories(degradation, cycle_life, cycles),
+        "end_of_life": end_of_life(degradation, cycle_life, settings["eol_threshold"]).T,
+        "capacity_at_life": np.where(np.isfinite(cycle_life), np.exp(cycle_life * np.log1p(-degradation)), np.nan).T,
+    }
+
+
+def downsample(projection, points=PLOT_POINTS):
+    """
+    Evenly strided copy of a projection for plotting. Each technology's
+    retirement cycle is added to the axis, so curves still end where the
+    full-resolution ones do.
+    """
+    cycles = projection["cycles"]
+    stride = max(1, int(np.ceil(len(cycles) / points)))
+    keep = np.unique(np.r_[np.arange(0, len(cycles), stride), len(cycles) - 1])
+    last_finite = np.isfinite(projection["capacity"]).cumsum(axis=2).argmax(axis=2)
+    keep = np.unique(np.r_[keep, last_finite.ravel()])
+    return {**projection, "cycles": cycles[keep], "capacity": projection["capacity"][:, :, keep]}
+
+
+def end_of_life_table(projection, cycles_per_year):
+    """
+    End-of-life cycles and years per technology, low and high.
+    """
+    eol = projection["end_of_life"]
+    at_life = projection["capacity_at_life"]
+    return pd.DataFrame({
+        "Detailed Technology": projection["technologies"],
+        "End of Life - Low (cycles)": eol[:, 0],
+        "End of Life - High (cycles)": eol[:, 1],
+        "End of Life - Low (years)": eol[:, 0] / cycles_per_year,
+        "End of Life - High (years)": eol[:, 1] / cycles_per_year,
+        "Capacity at Cycle Life - Low (%)": at_life[:, 0] * 100,
+        "Capacity at Cycle Life - High (%)": at_life[:, 1] * 100,
+    })
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+
+# Histogram resolution per numeric column; columns with at most this many
+# distinct values keep exact per-value counts instead
+HISTOGRAM_BINS = 64
+
+
+def numeric_stats(series):
+    """
+    Bounds, null count and histogram of a numeric column. The histogram
+    has one bin per distinct value ("edges" is None) when there are few.
+    """
+    values = series.to_numpy(dtype=float)
+    finite = values[~np.isnan(values)]
+    distinct, counts = np.unique(finite, return_counts=True)
+    edges = None
+    if len(distinct) > HISTOGRAM_BINS:
+        counts, edges = np.histogram(finite, bins=HISTOGRAM_BINS)
+    return {
+        "kind": "numeric",
+        "nulls": int(len(values) - len(finite)),
+        "min": float(distinct[0]) if len(distinct) else None,
+        "max": float(distinct[-1]) if len(distinct) else None,
+        "values": distinct if edges is None else None,
+        "counts": counts,
+        "edges": edges,
+        "cumulative": np.r_[0, np.cumsum(counts)],
+    }
+
+
+def categorical_stats(series):
+    """
+    Sorted distinct values, their counts and per-row value codes (-1 for
+    nulls) of a text column.
+    """
+    codes, values = pd.factorize(series, sort=True)
+    return {
+        "kind": "categorical",
+        "nulls": int((codes < 0).sum()),
+        "values": tuple(values),
+        "counts": np.bincount(codes[codes >= 0], minlength=len(values)),
+        "codes": codes,
+    }
+
+
+def column_stats(series):
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return numeric_stats(series)
+    return categorical_stats(series)
+
+
+def build_catalog(df, range_metrics, derived=None):
+    """
+    Statistics for every column, computed once per dataset version.
+
+    Returns a dict with the row count, per-column stats ("columns"), the
+    combined low/high bounds of each range metric ("ranges") and stats of
+    the derived series passed in (keyed as given, under "derived"), so
+    widgets can read bounds and options without scanning the frame.
+    """
+    columns = {col: column_stats(df[col]) for col in df.columns}
+
+    ranges = {}
+    for metric, (low_col, high_col) in range_metrics.items():
+        ends = [columns.get(low_col), columns.get(high_col)]
+        if all(e is not None and e["kind"] == "numeric" and e["min"] is not None for e in ends):
+            ranges[metric] = (min(e["min"] for e in ends), max(e["max"] for e in ends))
+
+    derived = {key: column_stats(series) for key, series in (derived or {}).items()}
+    return {"rows": len(df), "columns": columns, "ranges": ranges, "derived": derived}
+
+
+def count_below(stats, x, inclusive=False):
+    """
+    Non-null values below x (or at most x): exact from per-value counts,
+    otherwise interpolated within histogram bins.
+    """
+    if len(stats["counts"]) == 0:
+        return 0.0
+    if stats["edges"] is None:
+        return float(stats["cumulative"][np.searchsorted(stats["values"], x, side="right" if inclusive else "left")])
+    return float(np.interp(x, stats["edges"], stats["cumulative"]))
+
+
+def count_between(stats, low, high):
+    """
+    Non-null values in [low, high].
+    """
+    return max(count_below(stats, high, inclusive=True) - count_below(stats, low), 0.0)
+
+
+def count_values(stats, values):
+    """
+    Exact count of rows holding any of values (categorical stats).
+    """
+    lookup = dict(zip(stats["values"], stats["counts"]))
+    return float(sum(lookup.get(v, 0) for v in set(values)))
+
+
+def count_overlapping(low_stats, high_stats, rows, low, high):
+    """
+    Estimated rows whose [low_col, high_col] interval overlaps [low, high]:
+    rows with both ends known, less those starting above the window and
+    those ending below it.
+    """
+    known = rows - max(low_stats["nulls"], high_stats["nulls"])
+    starts_above = low_stats["cumulative"][-1] - count_below(low_stats, high, inclusive=True)
+    ends_below = count_below(high_stats, low)
+    return max(known - starts_above - ends_below, 0.0)
+
+
+def present_values(catalog, col, mask):
+    """
+    Distinct non-null values of col among the rows in mask, in sorted order.
+    """
+    stats = catalog["columns"][col]
+    codes = np.unique(stats["codes"][mask])
+    return [stats["values"][c] for c in codes if c >= 0]
@@ -0,0 +1,33 @@
+import os
+
+import pandas as pd
+
+import project_map
+
+
+# Built-in datasets, relative to the working directory
+METRICS_PATH = "ldes_real_data_v1.csv"
+PROJECTS_PATH = "LDES project tracking list v4.csv"
+
+
+def data_version(path):
+    """
+    Cheap fingerprint of a data file; changes whenever the file is replaced.
+    Every cache keyed on a dataset (the app's, the query service's) uses it.
+    """
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def read_metrics(path=METRICS_PATH):
+    """
+    The technology metrics sheet, as read everywhere.
+    """
+    return pd.read_csv(path)
+
+
+def read_projects(path=PROJECTS_PATH):
+    """
+    The project tracking list, normalized for the map and the taxonomy join.
+    """
+    return project_map.normalize_projects_data(pd.read_csv(path))
@@ -0,0 +1,139 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+import site_sizing
+
+
+# Discharge duration the land-per-MWh metric sizes its site for
+LAND_DURATION_HOURS = 10
+
+
+def _land_per_mwh(df, energy_density, power_density):
+    # 1 MWh delivered over LAND_DURATION_HOURS, sized as the site screener does
+    return site_sizing.land_required(1 / LAND_DURATION_HOURS, 1.0, power_density, energy_density, site_sizing.separate_flags(df))
+
+
+# Derived range metric -> (inputs, formula). Inputs map each source range
+# metric to +1 when the derived value rises with it and -1 when it falls;
+# formula(df, *input arrays) is evaluated over all rows at once.
+DERIVED_METRICS = {
+    "CAPEX per Lifetime Throughput ($/kWh cycled)": (
+        {"CAPEX Energy Basis ($/kWhe)": 1, "Cycle Life (#)": -1},
+        lambda df, capex, cycles: capex / cycles,
+    ),
+    "Effective CAPEX after RTE Losses ($/kWh delivered)": (
+        {"CAPEX Energy Basis ($/kWhe)": 1, "RTE (%)": -1},
+        lambda df, capex, rte: capex / (rte / 100),
+    ),
+    f"Land per MWh at {LAND_DURATION_HOURS:g} h (acre/MWh)": (
+        {"Energy Density (acre/MWhe)": 1, "Power Density (acre/MW)": 1},
+        _land_per_mwh,
+    ),
+}
+
+
+def _split_unit(name):
+    match = re.fullmatch(r"(.*) \((.*)\)", name)
+    return match.groups() if match else (name, None)
+
+
+def range_columns(name):
+    """
+    (low, high) column names for a derived metric, spelled like the source
+    columns: "Cost ($/kWh)" -> ("Cost - Low ($/kWh)", "Cost - High ($/kWh)").
+    """
+    base, unit = _split_unit(name)
+    suffix = f" ({unit})" if unit else ""
+    return f"{base} - Low{suffix}", f"{base} - High{suffix}"
+
+
+def range_title(name):
+    """
+    Chart title for a derived metric, named like the source range charts.
+    """
+    base, unit = _split_unit(name)
+    return f"{base} Range ({unit})" if unit else f"{base} Range"
+
+
+# Derived metric -> its low/high columns, as in metric_charts.RANGE_METRICS
+DERIVED_RANGE_METRICS = {name: range_columns(name) for name in DERIVED_METRICS}
+
+# Derived column -> derived metric
+DERIVED_COLUMNS = {col: name for name, cols in DERIVED_RANGE_METRICS.items() for col in cols}
+
+
+def available(df, range_metrics):
+    """
+    Entries to add to range_metrics for the derived metrics whose inputs
+    are all in df.
+    """
+    def present(metric):
+        return metric in range_metrics and all(col in df.columns for col in range_metrics[metric])
+    return {name: DERIVED_RANGE_METRICS[name] for name, (inputs, _) in DERIVED_METRICS.items() if all(map(present, inputs))}
+
+
+def with_derived(df, range_metrics):
+    """
+    range_metrics plus the derived metrics df can provide.
+    """
+    return {**range_metrics, **available(df, range_metrics)}
+
+
+def compute(df, range_metrics, name):
+    """
+    Low and high columns of one derived metric, as a DataFrame on df's index.
+
+    Every formula is monotone in each input, so the low end is the formula
+    at the input ends that minimize it (low ends of +1 inputs, high ends of
+    -1 inputs) and the high end at the opposite ends. Rows missing an input,
+    or where the formula is undefined (e.g. zero cycle life), get NaN.
+    """
+    inputs, formula = DERIVED_METRICS[name]
+    low_col, high_col = DERIVED_RANGE_METRICS[name]
+    if name not in available(df, range_metrics):
+        return pd.DataFrame({low_col: np.nan, high_col: np.nan}, index=df.index)
+
+    at_low, at_high = [], []
+    for metric, direction in inputs.items():
+        low, high = (df[col].to_numpy(dtype=float) for col in range_metrics[metric])
+        at_low.append(low if direction > 0 else high)
+        at_high.append(high if direction > 0 else low)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ends = [np.asarray(formula(df, *args), dtype=float) for args in (at_low, at_high)]
+    for values in ends:
+        values[~np.isfinite(values)] = np.nan
+    return pd.DataFrame({low_col: ends[0], high_col: ends[1]}, index=df.index)
+
+
+def attach(df, range_metrics, names, provider=None):
+    """
+    df with the columns of the named derived metrics added, where missing.
+
+    provider(name), when given, returns the metric's columns for the whole
+    dataset (from a per-version cache), aligned here to df's rows; without
+    it they are computed from df. df is returned as is when nothing is
+    missing.
+    """
+    missing = [name for name in dict.fromkeys(names) if not all(col in df.columns for col in DERIVED_RANGE_METRICS[name])]
+    if not missing:
+        return df
+    parts = [provider(name).reindex(df.index) if provider else compute(df, range_metrics, name) for name in missing]
+    return pd.concat([df, *parts], axis=1)
+
+
+def spec_metrics(spec):
+    """
+    Derived metrics read by a metric_filters filter spec.
+    """
+    if spec[0] != "range":
+        return []
+    return list(dict.fromkeys(DERIVED_COLUMNS[col] for col in spec[1:3] if col in DERIVED_COLUMNS))
+
+
+def frame_for_spec(df, spec, range_metrics, provider=None):
+    """
+    df with whatever derived columns spec filters on attached.
+    """
+    return attach(df, range_metrics, spec_metrics(spec), provider)
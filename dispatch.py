@@ -0,0 +1,268 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+import worker_pool
+
+
+HOURS_PER_YEAR = 8760
+
+PROFILE_KINDS = ["price", "load"]
+
+DEFAULT_ASSUMPTIONS = {
+    "soc_min": 0.05,  # fraction of current energy capacity
+    "soc_max": 0.95,
+    "window_hours": 24,  # charge/discharge hours are picked within each window
+    "power_mw": 1.0,  # rated power; revenue is reported per kW of it
+}
+
+# (hour x technology-case) elements above which a run fans out across the shared worker pool
+PARALLEL_THRESHOLD = 5_000_000
+
+
+def read_profiles(buffer):
+    """
+    Hourly profiles from a CSV: every numeric column is one profile, one
+    row per hour. Rows past the last whole day are dropped.
+    """
+    raw = pd.read_csv(buffer)
+    profiles = raw.apply(pd.to_numeric, errors="coerce").dropna(axis=1, how="all")
+    profiles = profiles.interpolate(limit_direction="both")
+    hours = len(profiles) // 24 * 24
+    if hours == 0 or profiles.shape[1] == 0:
+        raise ValueError("Profile needs at least 24 hourly rows of numeric data")
+    return profiles.iloc[:hours].reset_index(drop=True)
+
+
+def sample_profile(years=1, seed=0):
+    """
+    Synthetic hourly price profile ($/MWh) with morning and evening peaks,
+    a midday solar dip, seasonal swing and occasional scarcity spikes.
+    """
+    rng = np.random.default_rng(seed)
+    hours = np.arange(HOURS_PER_YEAR * years)
+    hour_of_day = hours % 24
+    day_of_year = hours // 24 % 365
+    daily = (
+        12 * np.exp(-((hour_of_day - 8) ** 2) / 8)
+        + 25 * np.exp(-((hour_of_day - 19) ** 2) / 6)
+        - 15 * np.exp(-((hour_of_day - 13) ** 2) / 10)
+    )
+    seasonal = 1 + 0.35 * np.cos(2 * np.pi * (day_of_year - 200) / 365)
+    price = 35 + daily * seasonal + rng.normal(0, 4, len(hours))
+    spikes = rng.random(len(hours)) < 0.002
+    price[spikes] += rng.uniform(100, 800, spikes.sum())
+    return pd.DataFrame({"Sample price ($/MWh)": price})
+
+
+def profile_fingerprint(profiles, kind):
+    """
+    Stable hash of the profile values, column names and kind used to key
+    cached simulation results.
+    """
+    digest = hashlib.sha1(kind.encode())
+    digest.update("\0".join(map(str, profiles.columns)).encode())
+    digest.update(np.ascontiguousarray(profiles.to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def case_parameters(df, range_metrics):
+    """
+    Pessimistic and optimistic dispatch parameters per technology.
+
+    Returns (technologies, params) where each params entry is a (2, n)
+    array: row 0 takes the worse end of every range (short duration, low
+    RTE, fast fade, slow ramp and response) and row 1 the better end.
+    Technologies missing duration or RTE are dropped; missing degradation
+    means no fade, a missing ramp rate or response time means no limit.
+    """
+    def bounds(metric, fill=None):
+        low_col, high_col = range_metrics[metric]
+        low = df[low_col].to_numpy(dtype=float)
+        high = df[high_col].to_numpy(dtype=float)
+        if fill is not None:
+            low, high = np.where(np.isnan(low), fill, low), np.where(np.isnan(high), fill, high)
+        return np.minimum(low, high), np.maximum(low, high)
+
+    duration = bounds("Duration (hr)")
+    rte = bounds("RTE (%)")
+    degradation = bounds("Degradation (%/cycle)", fill=0.0)
+    ramp = bounds("Ramp Rate (% rated power/sec)", fill=np.inf)
+    response = bounds("Response Time (s)", fill=0.0)
+
+    valid = ~(np.isnan(duration[0]) | np.isnan(rte[0])) & (duration[0] > 0) & (rte[0] > 0)
+    params = {
+        "duration": np.vstack(duration),
+        "rte": np.vstack(rte) / 100,
+        "degradation": np.vstack(degradation[::-1]) / 100,
+        "ramp": np.vstack(ramp),
+        "response": np.vstack(response[::-1]),
+    }
+    params = {k: v[:, valid] for k, v in params.items()}
+    return df["Detailed Technology"].to_numpy()[valid], params
+
+
+def schedule(signal, duration, rte, window_hours):
+    """
+    Hourly charge (+1) / discharge (-1) intent per unit, as an
+    (hours, units) int8 array.
+
+    Within each window the i-th dearest hour is paired with the i-th
+    cheapest, and a unit trades the pairs whose spread covers its
+    round-trip losses, up to ceil(duration) discharge hours and
+    ceil(duration / rte) charge hours.
+    """
+    window_hours = min(window_hours, len(signal))
+    windows = len(signal) // window_hours
+    hours = windows * window_hours
+    blocks = signal[:hours].reshape(windows, window_hours)
+    ordered = np.sort(blocks, axis=1)
+
+    half = window_hours // 2
+    cheap = ordered[:, :half, None]
+    dear = ordered[:, ::-1][:, :half, None]
+    profitable = (dear * rte > cheap).sum(axis=1)  # (windows, units)
+    k_discharge = np.minimum(np.ceil(duration).astype(np.int64), profitable)
+    k_charge = np.minimum(np.ceil(k_discharge / rte).astype(np.int64), half)
+    worthwhile = k_discharge > 0
+    rows = np.arange(windows)[:, None]
+    charge_at = ordered[rows, np.maximum(k_charge - 1, 0)]
+    discharge_at = ordered[rows, window_hours - np.maximum(k_discharge, 1)]
+
+    intent = np.zeros((len(signal), len(duration)), dtype=np.int8)
+    values = blocks[:, :, None]
+    body = intent[:hours].reshape(windows, window_hours, len(duration))
+    body[(values <= charge_at[:, None, :]) & worthwhile[:, None, :]] = 1
+    body[(values >= discharge_at[:, None, :]) & worthwhile[:, None, :]] = -1
+    return intent
+
+
+def simulate(signal, params, assumptions):
+    """
+    Step every unit (a technology at one parameter case) through the
+    profile hour by hour, vectorized across units.
+
+    Units are 1 MW with `duration` MWh of capacity. Charging p MW for an
+    hour stores p * rte MWh; discharging removes p MWh. State of charge
+    stays between soc_min and soc_max of the current capacity, which fades
+    by `degradation` of its initial value per full discharge. Power can
+    move at most ramp * 3600 % of rating per hour, and a unit starting
+    from idle loses its response time from that hour.
+
+    Returns the (hours, units) net power array (+ discharge, - charge) and
+    the final capacity as a fraction of the initial one.
+    """
+    duration, rte, degradation = params["duration"], params["rte"], params["degradation"]
+    ramp_step = np.minimum(params["ramp"] * 36, 2.0)
+    response_derate = 1 - np.minimum(params["response"], 3600) / 3600
+    ramp_binding = (ramp_step < 2).any()
+
+    intent = schedule(signal, duration, rte, assumptions["window_hours"])
+    capacity = duration.copy()
+    soc = capacity * assumptions["soc_min"]
+    previous = np.zeros_like(capacity)
+    net = np.empty(intent.shape)
+    for hour in range(len(signal)):
+        want = intent[hour]
+        room = (assumptions["soc_max"] * capacity - soc) / rte
+        available = soc - assumptions["soc_min"] * capacity
+        target = np.where(want < 0, np.minimum(1.0, available), 0.0) - np.where(want > 0, np.minimum(1.0, room), 0.0)
+        if ramp_binding:
+            target = np.clip(target, previous - ramp_step, previous + ramp_step)
+        target = np.where(previous == 0, target * response_derate, target)
+
+        discharge = np.maximum(target, 0.0)
+        soc += np.maximum(-target, 0.0) * rte - discharge
+        capacity = np.maximum(capacity - discharge * degradation, 0.0)
+        soc = np.clip(soc, 0.0, assumptions["soc_max"] * capacity)
+        net[hour] = target
+        previous = target
+    return net, capacity / duration
+
+
+def _summarize(signal, net, kind, assumptions):
+    # Per-unit annual figures, averaged over the profile's years
+    years = len(signal) / HOURS_PER_YEAR
+    rating = assumptions["power_mw"]
+    discharged = np.maximum(net, 0.0).sum(axis=0)
+    summary = {"discharged": discharged / years}
+    if kind == "price":
+        # $/MW-year per MW of rating is numerically $/kW-year x 1000
+        summary["revenue"] = signal @ net / years / 1000
+    else:
+        day = 24
+        days = len(signal) // day
+        load = signal[:days * day].reshape(days, day)
+        shaved = load[:, :, None] - rating * net[:days * day].reshape(days, day, -1)
+        summary["peak_reduction"] = (load.max(axis=1)[:, None] - shaved.max(axis=1)).mean(axis=0)
+    return summary
+
+
+def _run_task(task):
+    signal, params, kind, assumptions = task
+    net, capacity = simulate(signal, params, assumptions)
+    summary = _summarize(signal, net, kind, assumptions)
+    summary["capacity"] = capacity
+    return summary
+
+
+def default_workers(unit_hours):
+    """
+    Workers for a run: the shared pool's size, or None (in-process) below
+    PARALLEL_THRESHOLD or on a single-CPU host.
+    """
+    if unit_hours < PARALLEL_THRESHOLD:
+        return None
+    return worker_pool.pool_size()
+
+
+def simulate_dispatch(df, range_metrics, profiles, kind="price", assumptions=None, workers=None):
+    """
+    Dispatch every filtered technology against each hourly profile.
+
+    Each technology runs at its pessimistic and optimistic parameter case;
+    both cases of every technology step through the profile together.
+    Profiles longer than a year run as one continuous multi-year
+    simulation, so capacity fade carries over. With `workers`, each
+    profile's units are split into chunks that run on the shared
+    worker_pool processes.
+
+    Returns a DataFrame with one row per (profile, technology): the low/
+    high annual revenue ($/kW-year, price profiles) or average daily peak
+    reduction (MW, load profiles), annual equivalent full cycles and
+    capacity left at the end.
+    """
+    assumptions = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    technologies, params = case_parameters(df, range_metrics)
+    n = len(technologies)
+    if n == 0 or profiles.shape[1] == 0:
+        return pd.DataFrame()
+
+    flat = {k: v.reshape(-1) for k, v in params.items()}  # [pessimistic..., optimistic...]
+    chunks = min(workers or 1, 2 * n)
+    bounds = np.linspace(0, 2 * n, chunks + 1).astype(int)
+    tasks = []
+    for name in profiles.columns:
+        signal = profiles[name].to_numpy(dtype=float)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            tasks.append((signal, {k: v[start:stop] for k, v in flat.items()}, kind, assumptions))
+
+    results = worker_pool.run_tasks(_run_task, tasks, parallel=bool(workers))
+
+    value_key, value_label = ("revenue", "Revenue ($/kW-year)") if kind == "price" else ("peak_reduction", "Peak Reduction (MW)")
+    frames = []
+    for i, name in enumerate(profiles.columns):
+        parts = results[i * chunks:(i + 1) * chunks]
+        merged = {k: np.concatenate([p[k] for p in parts]).reshape(2, n) for k in parts[0]}
+        columns = {
+            value_label: merged[value_key],
+            "Cycles per Year": merged["discharged"] / params["duration"],
+            "End Capacity (%)": merged["capacity"] * 100,
+        }
+        frame = pd.DataFrame({"Profile": name, "Detailed Technology": technologies})
+        for label, values in columns.items():
+            frame[f"{label} - Low"] = values.min(axis=0)
+            frame[f"{label} - High"] = values.max(axis=0)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
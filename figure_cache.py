@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import OrderedDict
+
+import memory_budget
+
+
+# Figures kept across all sessions (one per chart x filter state x options)
+MAX_FIGURES = 256
+
+# Quiet period after the last rerun activity (any session) before a
+# speculative build starts
+SETTLE_SECONDS = 1.0
+
+
+class FigureCache:
+    """
+    Thread-safe LRU of built figures keyed by (chart, filter key, options key).
+
+    A figure being built by one thread is not rebuilt by another: the
+    second caller waits for the first build and reuses its result. Each
+    figure is tagged with the session that built it, so memory can be
+    attributed to sessions and shed per session.
+
+    Background builds take background_slot, so only one runs at a time
+    across all sessions, and wait_until_idle() holds them off while a
+    foreground build is running or a rerun touched the cache recently.
+    """
+
+    def __init__(self, max_figures=MAX_FIGURES):
+        self.max_figures = max_figures
+        self._figures = OrderedDict()
+        self._owners = {}
+        self._sizes = {}
+        self._building = {}
+        self._foreground = 0
+        self._last_active = float("-inf")
+        self._lock = threading.Lock()
+        self.background_slot = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._figures
+
+    def __len__(self):
+        return len(self._figures)
+
+    def touch(self):
+        """
+        Note foreground activity, e.g. a rerun starting.
+        """
+        with self._lock:
+            self._last_active = time.monotonic()
+
+    def wait_until_idle(self, cancel, settle_seconds=SETTLE_SECONDS):
+        """
+        Block until no foreground build is running and settle_seconds have
+        passed since the last foreground activity. False if cancel was set
+        first.
+        """
+        while True:
+            with self._lock:
+                remaining = settle_seconds if self._foreground else self._last_active + settle_seconds - time.monotonic()
+            if remaining <= 0:
+                return not cancel.is_set()
+            if cancel.wait(remaining):
+                return False
+
+    def get_or_build(self, key, builder, owner=None, background=False):
+        if not background:
+            self.touch()
+        while True:
+            with self._lock:
+                if key in self._figures:
+                    self._figures.move_to_end(key)
+                    return self._figures[key]
+                pending = self._building.get(key)
+                if pending is None:
+                    pending = self._building[key] = threading.Event()
+                    break
+            pending.wait()
+
+        if not background:
+            with self._lock:
+                self._foreground += 1
+        try:
+            figure = builder()
+            with self._lock:
+                self._figures[key] = figure
+                self._owners[key] = owner
+                while len(self._figures) > self.max_figures:
+                    self._drop(next(iter(self._figures)))
+            return figure
+        finally:
+            with self._lock:
+                del self._building[key]
+                if not background:
+                    self._foreground -= 1
+                    self._last_active = time.monotonic()
+            pending.set()
+
+    def _drop(self, key):
+        del self._figures[key]
+        self._owners.pop(key, None)
+        self._sizes.pop(key, None)
+
+    def evict_owner(self, owner):
+        """
+        Drop every figure built by one session; returns how many.
+        """
+        with self._lock:
+            keys = [k for k, o in self._owners.items() if o == owner]
+            for key in keys:
+                self._drop(key)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self._owners.clear()
+            self._sizes.clear()
+
+    def bytes_by_owner(self):
+        """
+        Estimated bytes of cached figures per owning session. Sizes are
+        measured on first request and remembered.
+        """
+        with self._lock:
+            entries = [(k, self._figures[k], self._owners.get(k), self._sizes.get(k)) for k in self._figures]
+        totals = {}
+        for key, figure, owner, size in entries:
+            if size is None:
+                # Measured without the lock; only remembered if the figure
+                # was not evicted or replaced meanwhile
+                size = memory_budget.estimate_bytes(figure)
+                with self._lock:
+                    if self._figures.get(key) is figure:
+                        self._sizes[key] = size
+            totals[owner] = totals.get(owner, 0) + size
+        return totals
+
+
+class Precomputer:
+    """
+    Builds the charts a session has not viewed yet in a background thread,
+    so switching charts finds them already in the FigureCache.
+
+    Each schedule() replaces the previous job and checks for cancellation
+    between figures, so rapid filter changes never queue up stale work.
+    Builds go one at a time through the cache's background_slot and only
+    once the cache is idle, so they never compete with a rerun. Builders
+    run outside any script run: they must not call Streamlit, including
+    st.cache_data functions.
+    """
+
+    def __init__(self, cache, owner=None):
+        self.cache = cache
+        self.owner = owner
+        self.filter_key = None
+        self._cancel = threading.Event()
+
+    def cancel_if_stale(self, filter_key):
+        """
+        Called as each rerun starts: marks the cache busy, and cancels the
+        job if it was for another filter state.
+        """
+        self.cache.touch()
+        if filter_key != self.filter_key:
+            self._cancel.set()
+
+    def schedule(self, filter_key, builders, chart_names):
+        """
+        Start building chart_names (in order) for filter_key unless a job
+        for the same filter key is already running.
+        """
+        if filter_key == self.filter_key and not self._cancel.is_set():
+            return
+        self._cancel.set()
+        self._cancel = cancel = threading.Event()
+        self.filter_key = filter_key
+        todo = [name for name in chart_names if (name, filter_key, ()) not in self.cache]
+        if todo:
+            threading.Thread(target=self._run, args=(cancel, filter_key, builders, todo), daemon=True).start()
+
+    def _run(self, cancel, filter_key, builders, chart_names):
+        for name in chart_names:
+            with self.cache.background_slot:
+                if not self.cache.wait_until_idle(cancel):
+                    return
+                self.cache.get_or_build((name, filter_key, ()), builders[name], self.owner, background=True)
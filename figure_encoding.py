@@ -0,0 +1,255 @@
+import argparse
+import base64
+import re
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+
+# Typed array codes understood by plotly.js
+DTYPE_CODES = {
+    "int8": "i1", "uint8": "u1", "int16": "i2", "uint16": "u2",
+    "int32": "i4", "uint32": "u4", "float32": "f4", "float64": "f8",
+}
+
+# Per-point trace properties that may be re-encoded
+ARRAY_PROPERTIES = ["x", "y", "z", "base", "customdata", "lat", "lon", "marker.size"]
+
+# Drawn on an axis, so hover labels use the axis format and float32 is safe
+AXIS_PROPERTIES = {"x", "y", "base"}
+
+# Shorter arrays stay as JSON numbers, which beat the typed array wrapper
+MIN_TYPED_LENGTH = 32
+
+# Largest palette turned into color indices
+MAX_PALETTE = 256
+
+# Category axes with more names than this keep them for hovers only, as
+# every tick label of an array-mode axis is drawn
+MAX_TICK_LABELS = 100
+
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+def typed_array(values):
+    """
+    plotly.js typed array spec (base64 bytes) for a numeric numpy array.
+    """
+    values = np.ascontiguousarray(values)
+    spec = {"dtype": DTYPE_CODES[str(values.dtype)], "bdata": base64.b64encode(values.tobytes()).decode("ascii")}
+    if values.ndim > 1:
+        spec["shape"] = ", ".join(map(str, values.shape))
+    return spec
+
+
+def numeric_array(value):
+    """
+    value as a numeric numpy array, or None when it is not one (scalars,
+    strings, mixed objects, typed array specs already encoded).
+    """
+    if value is None or isinstance(value, (dict, str)):
+        return None
+    try:
+        values = np.asarray(value)
+    except ValueError:
+        # Ragged rows, e.g. hover rows with missing cells left out
+        return None
+    if values.ndim == 0 or values.size == 0 or values.dtype.kind not in "iuf":
+        return None
+    return values
+
+
+def smallest_dtype(values, float32_ok):
+    """
+    Narrowest dtype holding values: the smallest integer type when every
+    value is a whole number, else float32 when allowed and in range.
+    """
+    finite = values[np.isfinite(values)] if values.dtype.kind == "f" else values
+    if values.dtype.kind in "iu" or (len(finite) == len(values.ravel()) and np.all(finite == np.round(finite))):
+        low, high = (finite.min(), finite.max()) if len(finite) else (0, 0)
+        for dtype in (np.int8, np.uint8, np.int16, np.uint16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return dtype
+    if float32_ok and (len(finite) == 0 or np.abs(finite).max() <= FLOAT32_MAX):
+        return np.float32
+    return values.dtype
+
+
+def formatted_everywhere(trace, prop):
+    """
+    Whether every hovertemplate/texttemplate reference to prop carries a
+    d3 format, so reduced precision never shows.
+    """
+    templates = [trace[p] for p in ("hovertemplate", "texttemplate") if _has(trace, p) and isinstance(trace[p], str)]
+    if not templates:
+        return False
+    name = prop.split(".")[-1]
+    references = [m for t in templates for m in re.findall(r"%\{" + re.escape(name) + r"(?:\[\d+\])?(:[^}]*)?\}", t)]
+    return all(references)
+
+
+def _has(trace, prop):
+    try:
+        trace[prop]
+        return True
+    except (KeyError, ValueError):
+        return False
+
+
+def _trim_trailing_gaps(trace):
+    # Line traces whose y ends in NaN (e.g. a technology past its life)
+    # draw the same without the gap points
+    if trace.type != "scatter" or any(_has(trace, p) and numeric_array(trace[p]) is not None for p in ("customdata", "marker.size")):
+        return
+    if _has(trace, "text") and trace["text"] is not None and not isinstance(trace["text"], str):
+        return
+    x, y = numeric_array(trace.x), numeric_array(trace.y)
+    if x is None or y is None or x.ndim != 1 or len(x) != len(y):
+        return
+    finite = np.flatnonzero(np.isfinite(y))
+    end = finite[-1] + 1 if len(finite) else 0
+    if end < len(y):
+        trace.x, trace.y = x[:end], y[:end]
+
+
+def _palette_colors(trace):
+    # Bars colored from a short palette send one byte per bar instead of
+    # a color string, through a stepped colorscale
+    if trace.type != "bar" or trace.marker.colorscale is not None:
+        return
+    colors = trace.marker.color
+    if colors is None or isinstance(colors, str) or numeric_array(colors) is not None:
+        return
+    codes, palette = pd.factorize(pd.Series(list(colors), dtype=object))
+    if len(codes) < MIN_TYPED_LENGTH or len(palette) > MAX_PALETTE or (codes < 0).any():
+        return
+    k = len(palette)
+    scale = []
+    for i, color in enumerate(palette):
+        scale += [[i / k, color], [(i + 1) / k, color]]
+    trace.marker.update(
+        color=typed_array(codes.astype(np.uint8)), colorscale=scale,
+        cmin=-0.5, cmax=k - 0.5, showscale=False
+    )
+
+
+def _category_names(axis, traces):
+    # Names in axis order when every trace on the axis is a vertical bar
+    # with category x, else None
+    if axis.type not in (None, "category") or axis.categoryorder not in (None, "trace", "array"):
+        return None
+    if any(t.type != "bar" or t.orientation == "h" or t.x is None or isinstance(t.x, (str, dict)) for t in traces):
+        return None
+    values = [v for t in traces for v in t.x]
+    if not values or not all(isinstance(v, str) for v in values):
+        return None
+    initial = list(axis.categoryarray) if axis.categoryorder == "array" and axis.categoryarray is not None else []
+    return list(dict.fromkeys(initial + values))
+
+
+def _category_positions(fig):
+    # Bars on a category x axis send integer positions, and the names go
+    # once per axis as tick labels, which plotly.js also shows for %{x}
+    # in hovers
+    by_axis = {}
+    for trace in fig.data:
+        if _has(trace, "xaxis"):
+            by_axis.setdefault(trace.xaxis or "x", []).append(trace)
+    for axis_id, traces in by_axis.items():
+        axis = fig.layout["xaxis" + axis_id[1:]]
+        names = _category_names(axis, traces)
+        if names is None:
+            continue
+        position = {name: i for i, name in enumerate(names)}
+        for trace in traces:
+            trace.x = np.array([position[v] for v in trace.x])
+        tickvals = np.arange(len(names))
+        axis.update(
+            type="linear", categoryorder=None, categoryarray=None, tickmode="array",
+            tickvals=typed_array(tickvals.astype(smallest_dtype(tickvals, False))) if len(names) >= MIN_TYPED_LENGTH else tickvals.tolist(),
+            ticktext=names
+        )
+        if len(names) > MAX_TICK_LABELS:
+            axis.showticklabels = False
+
+
+def compact_figure(fig):
+    """
+    Shrink a figure's payload in place and return it.
+
+    Numeric per-point arrays are sent as base64 typed arrays: whole
+    numbers in the smallest integer type, other values as float32 where
+    they only reach the user through an axis or a formatted template
+    (float64 otherwise). Trailing NaN runs are dropped from line traces
+    and palette-colored bars send color indices. Bars on category axes
+    send integer positions, with each axis's names sent once as tick
+    labels (hidden beyond MAX_TICK_LABELS; hovers still show them).
+    """
+    _category_positions(fig)
+    for trace in fig.data:
+        _trim_trailing_gaps(trace)
+        _palette_colors(trace)
+        for prop in ARRAY_PROPERTIES:
+            if not _has(trace, prop):
+                continue
+            values = numeric_array(trace[prop])
+            if values is None or values.size < MIN_TYPED_LENGTH:
+                continue
+            float32_ok = prop in AXIS_PROPERTIES or formatted_everywhere(trace, prop)
+            trace[prop] = typed_array(values.astype(smallest_dtype(values, float32_ok), copy=False))
+    return fig
+
+
+def payload_bytes(fig):
+    """
+    Bytes of the JSON spec Streamlit sends for a figure.
+    """
+    return len(pio.to_json(fig, validate=False))
+
+
+def size_report(builders):
+    """
+    Payload per figure before and after compact_figure, one row per builder.
+    """
+    rows = []
+    for name, builder in builders.items():
+        fig = builder()
+        before = payload_bytes(fig)
+        after = payload_bytes(compact_figure(fig))
+        rows.append({"Figure": name, "Before (KB)": before / 1e3, "After (KB)": after / 1e3, "Ratio": before / max(after, 1)})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    # Imported here: both modules compact their figures through this one
+    import metric_charts
+    import project_map
+
+    parser = argparse.ArgumentParser(description="Report figure payload sizes before and after compaction.")
+    parser.add_argument("--metrics", default="ldes_real_data_v1.csv", help="metrics CSV")
+    parser.add_argument("--projects", default="LDES project tracking list v4.csv", help="project tracking CSV")
+    parser.add_argument("--scale", type=int, default=1, help="repeat every technology this many times to mimic a larger catalog")
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.metrics)
+    if args.scale > 1:
+        n = len(df)
+        df = pd.concat([df] * args.scale, ignore_index=True)
+        df["Detailed Technology"] = df["Detailed Technology"].str.strip() + " #" + (df.index // n + 1).astype(str)
+    projects = project_map.normalize_projects_data(pd.read_csv(args.projects))
+
+    # Raw builders: make_figure_builders already compacts what it returns
+    builders = metric_charts.make_figure_builders(df, {}, metric_charts.build_hover_data(df), compact=False)
+    builders["Project Map"] = lambda: project_map.create_choropleth_map(project_map.prepare_map_data(projects)[0])
+    report = size_report(builders)
+    totals = report[["Before (KB)", "After (KB)"]].sum()
+    with pd.option_context("display.float_format", "{:,.1f}".format, "display.width", 160):
+        print(f"{len(df)} technologies")
+        print(report.to_string(index=False))
+        print(f"\nTotal: {totals['Before (KB)']:,.0f} KB -> {totals['After (KB)']:,.0f} KB ({totals['Before (KB)'] / totals['After (KB)']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+import numpy as np
+import pandas as pd
+
+import worker_pool
+
+
+# Model inputs -> range metric they are sampled from
+LCOS_INPUTS = {
+    "capex_energy": "CAPEX Energy Basis ($/kWhe)",
+    "capex_power": "CAPEX Power Basis ($/kWe)",
+    "opex": "OPEX ($/kW-year)",
+    "rte": "RTE (%)",
+    "cycle_life": "Cycle Life (#)",
+    "degradation": "Degradation (%/cycle)",
+}
+
+# Direction in which each input lowers LCOS (used for the analytic bounds)
+CHEAPER_END = {
+    "capex_energy": "low",
+    "capex_power": "low",
+    "opex": "low",
+    "rte": "high",
+    "cycle_life": "high",
+    "degradation": "low",
+}
+
+DEFAULT_ASSUMPTIONS = {
+    "duration_hr": 10.0,
+    "cycles_per_year": 300.0,
+    "discount_rate": 0.07,
+    "project_life_years": 20.0,
+    "charge_price": 30.0,  # $/MWh paid for charging energy
+    "capex_basis": "energy",  # "energy": $/kWhe x duration, "power": $/kWe
+}
+
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+HISTOGRAM_BINS = 200
+
+# (sample, technology) values per vectorized chunk; bounds peak memory
+# regardless of run size and of how many technologies are sampled
+MC_BLOCK_ELEMENTS = 524_288
+
+# Runs at least this large fan out across the shared worker pool
+PARALLEL_THRESHOLD = 1_000_000
+
+
+def lcos(capex, opex, rte, cycle_life, degradation, duration_hr, cycles_per_year,
+         discount_rate, project_life_years, charge_price):
+    """
+    Levelized cost of storage in $/MWh discharged for 1 kW of power.
+
+    All arguments broadcast, so one call evaluates any mix of samples,
+    technologies and grid points. capex is $/kW installed, opex $/kW-year,
+    rte and degradation are percentages (degradation per cycle) and
+    charge_price is $/MWh. Life ends at project_life_years or cycle_life,
+    whichever comes first; capacity fades geometrically per cycle.
+    """
+    r = discount_rate
+    life = np.minimum(project_life_years, cycle_life / cycles_per_year)
+
+    # Discounted sum of 1/(1+r)^t over the (possibly fractional) life
+    if r > 0:
+        annuity = (1 - (1 + r) ** -life) / r
+    else:
+        annuity = life
+
+    # Discounted energy: sum over years of fade^(t-1) / (1+r)^t
+    fade = (1 - degradation / 100) ** cycles_per_year
+    ratio = fade / (1 + r)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        energy_factor = np.where(
+            np.isclose(ratio, 1.0),
+            life / (1 + r),
+            (1 - ratio ** life) / ((1 + r) * (1 - ratio))
+        )
+    discharged_kwh = duration_hr * cycles_per_year * energy_factor
+
+    charging = (charge_price / 1000) * discharged_kwh / (rte / 100)
+    return 1000 * (capex + opex * annuity + charging) / discharged_kwh
+
+
+def parameter_bounds(df, range_metrics, capex_basis="energy"):
+    """
+    Low/high arrays (one entry per technology) for each model input.
+
+    Missing degradation is treated as no capacity fade; technologies
+    missing any other input are dropped. Returns (technologies, bounds).
+    """
+    valid, bounds = _input_bounds(df, range_metrics, capex_basis)
+    bounds = {k: (low[valid], high[valid]) for k, (low, high) in bounds.items()}
+    return df["Detailed Technology"].to_numpy()[valid], bounds
+
+
+def _input_bounds(df, range_metrics, capex_basis):
+    # Row-aligned bounds for every input plus the mask of complete rows
+    capex_key = "capex_energy" if capex_basis == "energy" else "capex_power"
+    inputs = [capex_key, "opex", "rte", "cycle_life", "degradation"]
+
+    bounds = {}
+    for key in inputs:
+        low_col, high_col = range_metrics[LCOS_INPUTS[key]]
+        low = df[low_col].to_numpy(dtype=float)
+        high = df[high_col].to_numpy(dtype=float)
+        if key == "degradation":
+            low, high = np.nan_to_num(low), np.nan_to_num(high)
+        bounds[key] = (np.minimum(low, high), np.maximum(low, high))
+
+    valid = np.ones(len(df), dtype=bool)
+    for low, high in bounds.values():
+        valid &= ~(np.isnan(low) | np.isnan(high))
+
+    bounds["capex"] = bounds.pop(capex_key)
+    return valid, bounds
+
+
+def evaluate(params, assumptions):
+    """
+    LCOS for a dict of parameter arrays (capex, opex, rte, cycle_life,
+    degradation) under the given assumptions.
+    """
+    capex = params["capex"]
+    if assumptions["capex_basis"] == "energy":
+        capex = capex * assumptions["duration_hr"]
+    return lcos(
+        capex, params["opex"], params["rte"], params["cycle_life"], params["degradation"],
+        assumptions["duration_hr"], assumptions["cycles_per_year"],
+        assumptions["discount_rate"], assumptions["project_life_years"], assumptions["charge_price"]
+    )
+
+
+def corner_bounds(bounds, assumptions):
+    """
+    LCOS at the cheapest and dearest corner of each technology's box.
+    """
+    capex_key = "capex_energy" if assumptions["capex_basis"] == "energy" else "capex_power"
+    cheap, dear = {}, {}
+    for key, (low, high) in bounds.items():
+        end = CHEAPER_END[capex_key if key == "capex" else key]
+        cheap[key], dear[key] = (low, high) if end == "low" else (high, low)
+    return evaluate(cheap, assumptions), evaluate(dear, assumptions)
+
+
+def _histogram_edges(bounds, assumptions, bins):
+    low, high = corner_bounds(bounds, assumptions)
+    lo, hi = np.minimum(low, high), np.maximum(low, high)
+    # Pad so samples beyond the corners (opex/fade interplay) still land inside
+    pad = np.maximum((hi - lo) * 0.05, np.abs(lo) * 1e-6 + 1e-9)
+    return np.linspace(lo - pad, hi + pad, bins + 1, axis=1)
+
+
+def _run_chunk(task):
+    bounds, n, seed, assumptions, edges = task
+    rng = np.random.default_rng(seed)
+    params = {key: rng.uniform(low, high, size=(n, len(low))) for key, (low, high) in bounds.items()}
+    values = evaluate(params, assumptions)
+
+    # One bincount over (technology, bin) pairs instead of a histogram per column
+    n_tech, bins = edges.shape[0], edges.shape[1] - 1
+    scaled = (values - edges[:, 0]) / (edges[:, -1] - edges[:, 0]) * bins
+    idx = np.clip(scaled.astype(np.int64), 0, bins - 1) + np.arange(n_tech) * bins
+    counts = np.bincount(idx.ravel(), minlength=n_tech * bins).reshape(n_tech, bins)
+    return counts, values.sum(axis=0), values.min(axis=0), values.max(axis=0)
+
+
+def chunk_samples(n_technologies, block_elements=MC_BLOCK_ELEMENTS):
+    """
+    Samples per chunk so one chunk holds at most block_elements
+    (sample, technology) values; fewer samples the more technologies.
+    """
+    return max(1, block_elements // max(n_technologies, 1))
+
+
+def default_workers(n_samples):
+    """
+    Workers for a run: the shared pool's size, or None (in-process) below
+    PARALLEL_THRESHOLD or on a single-CPU host.
+    """
+    if n_samples < PARALLEL_THRESHOLD:
+        return None
+    return worker_pool.pool_size()
+
+
+def histogram_quantiles(counts, edges, quantiles):
+    """
+    Quantiles per row of a histogram by linear interpolation of the CDF.
+    """
+    cdf = np.cumsum(counts, axis=1) / counts.sum(axis=1, keepdims=True)
+    cdf = np.concatenate([np.zeros((len(cdf), 1)), cdf], axis=1)
+    return np.array([[np.interp(q, cdf[i], edges[i]) for q in quantiles] for i in range(len(cdf))])
+
+
+def monte_carlo_lcos(df, range_metrics, n_samples=100_000, seed=42, assumptions=None,
+                     chunk_size=None, workers=None, bins=HISTOGRAM_BINS):
+    """
+    Monte Carlo LCOS distribution per technology.
+
+    Each input is drawn uniformly from its low/high range. Samples are
+    evaluated as (chunk, technology) arrays of at most MC_BLOCK_ELEMENTS
+    values each (chunk_size samples, by default chunk_samples of the
+    technology count), and only histograms and running sums are kept
+    between chunks. Peak memory is a few chunks' worth per process (each
+    pool worker holds one chunk at a time), however many samples or
+    technologies there are. Chunk seeds are spawned from one SeedSequence, so results
+    are identical whether chunks run in-process or, with `workers`, on
+    the shared worker_pool processes.
+
+    Returns a dict with a per-technology "summary" DataFrame ($/MWh) plus
+    the histogram "counts" and "edges" behind it.
+    """
+    assumptions = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    technologies, bounds = parameter_bounds(df, range_metrics, assumptions["capex_basis"])
+    if len(technologies) == 0 or n_samples <= 0:
+        return {"summary": pd.DataFrame(), "counts": np.empty((0, bins)), "edges": np.empty((0, bins + 1))}
+
+    edges = _histogram_edges(bounds, assumptions, bins)
+    chunk_size = chunk_size or chunk_samples(len(technologies))
+    sizes = [min(chunk_size, n_samples - start) for start in range(0, n_samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(bounds, n, s, assumptions, edges) for n, s in zip(sizes, seeds)]
+
+    # Folded in as chunks finish, so only one chunk's histogram is held
+    counts, total = 0, 0
+    minimum = maximum = None
+    for chunk_counts, chunk_total, chunk_min, chunk_max in worker_pool.iter_tasks(_run_chunk, tasks, parallel=bool(workers)):
+        counts = counts + chunk_counts
+        total = total + chunk_total
+        minimum = chunk_min if minimum is None else np.minimum(minimum, chunk_min)
+        maximum = chunk_max if maximum is None else np.maximum(maximum, chunk_max)
+
+    qs = histogram_quantiles(counts, edges, QUANTILES)
+    summary = pd.DataFrame({
+        "Detailed Technology": technologies,
+        "Mean": total / n_samples,
+        "Min": minimum,
+        "Max": maximum,
+    })
+    for i, q in enumerate(QUANTILES):
+        summary[f"P{int(q * 100)}"] = qs[:, i]
+    return {"summary": summary, "counts": counts, "edges": edges}
+
+
+# Technology x grid elements evaluated per broadcast block in a sweep
+SWEEP_BLOCK_ELEMENTS = 4_000_000
+
+
+def scenario_parameters(bounds, assumptions, scenario="midpoint"):
+    """
+    One deterministic value per technology for each input: the range
+    midpoint, or the cheaper ("optimistic") / dearer ("pessimistic") end.
+    """
+    capex_key = "capex_energy" if assumptions["capex_basis"] == "energy" else "capex_power"
+    params = {}
+    for key, (low, high) in bounds.items():
+        cheap_is_low = CHEAPER_END[capex_key if key == "capex" else key] == "low"
+        if scenario == "midpoint":
+            params[key] = (low + high) / 2
+        elif scenario == "optimistic":
+            params[key] = low if cheap_is_low else high
+        else:
+            params[key] = high if cheap_is_low else low
+    return params
+
+
+def duration_limits(df, range_metrics):
+    """
+    Low/high discharge duration per technology (NaN when not reported).
+    """
+    low_col, high_col = range_metrics["Duration (hr)"]
+    return df[low_col].to_numpy(dtype=float), df[high_col].to_numpy(dtype=float)
+
+
+def sweep_lcos(df, range_metrics, durations, cycles, scenario="midpoint", assumptions=None):
+    """
+    Deterministic LCOS over a duration x annual-cycles grid for every
+    technology, and the cheapest technology in each cell.
+
+    Technologies are broadcast as (technology, duration, cycles) arrays in
+    blocks of at most SWEEP_BLOCK_ELEMENTS. A technology only competes for
+    durations inside its `Duration - Low/High (hr)` range.
+
+    Returns a dict with "technologies", the "durations" and "cycles" axes,
+    "cheapest" (index into technologies, -1 where none is feasible) and
+    "cheapest_lcos" ($/MWh, NaN where none is feasible).
+    """
+    assumptions = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    durations = np.asarray(durations, dtype=float)
+    cycles = np.asarray(cycles, dtype=float)
+
+    valid, bounds = _input_bounds(df, range_metrics, assumptions["capex_basis"])
+    bounds = {k: (low[valid], high[valid]) for k, (low, high) in bounds.items()}
+    technologies = df["Detailed Technology"].to_numpy()[valid]
+    dur_low, dur_high = (limit[valid] for limit in duration_limits(df, range_metrics))
+    params = scenario_parameters(bounds, assumptions, scenario)
+
+    best = np.full((len(durations), len(cycles)), np.inf)
+    best_idx = np.full((len(durations), len(cycles)), -1, dtype=np.int64)
+    grid_size = max(len(durations) * len(cycles), 1)
+    block = max(1, SWEEP_BLOCK_ELEMENTS // grid_size)
+
+    d = durations[None, :, None]
+    c = cycles[None, None, :]
+    for start in range(0, len(technologies), block):
+        sl = slice(start, start + block)
+        p = {k: v[sl][:, None, None] for k, v in params.items()}
+        capex = p["capex"] * d if assumptions["capex_basis"] == "energy" else p["capex"]
+        values = lcos(
+            capex, p["opex"], p["rte"], p["cycle_life"], p["degradation"],
+            d, c, assumptions["discount_rate"], assumptions["project_life_years"], assumptions["charge_price"]
+        )
+        feasible = (d >= dur_low[sl][:, None, None]) & (d <= dur_high[sl][:, None, None])
+        values = np.where(feasible & np.isfinite(values), values, np.inf)
+
+        block_idx = values.argmin(axis=0)
+        block_best = np.take_along_axis(values, block_idx[None], axis=0)[0]
+        better = block_best < best
+        best = np.where(better, block_best, best)
+        best_idx = np.where(better, block_idx + start, best_idx)
+
+    return {
+        "technologies": technologies,
+        "durations": durations,
+        "cycles": cycles,
+        "cheapest": best_idx,
+        "cheapest_lcos": np.where(np.isfinite(best), best, np.nan),
+    }
+
+
+def sweep_axes(df, range_metrics, points, cycles_range=(10, 730)):
+    """
+    Log-spaced durations spanning the filtered technologies' duration
+    ranges and linearly spaced annual cycle counts.
+    """
+    dur_low, dur_high = duration_limits(df, range_metrics)
+    lo = np.nanmin(dur_low) if np.isfinite(dur_low).any() else 1.0
+    hi = np.nanmax(dur_high) if np.isfinite(dur_high).any() else 24.0
+    lo, hi = max(lo, 0.05), max(hi, lo * 1.01)
+    durations = np.geomspace(lo, hi, points)
+    cycles = np.linspace(cycles_range[0], cycles_range[1], points)
+    return durations, cycles
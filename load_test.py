@@ -0,0 +1,310 @@
+"""
+Concurrent-session load test that drives LDES_tool_v2.py headlessly.
+
+    python load_test.py load_scenarios.json --sessions 100 --iterations 3
+
+Each simulated session is a Streamlit AppTest replaying one recorded
+scenario at a time, in its own thread; all sessions share this process's
+caches, as browser sessions share the server's. The report gives rerun
+latency percentiles per step, throughput and process RSS over time.
+"""
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from streamlit import config as streamlit_config
+from streamlit import logger as streamlit_logger
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+import memory_budget
+
+
+APP_PATH = "LDES_tool_v2.py"
+
+# Scenario action -> AppTest element list it looks widgets up in
+WIDGETS = {
+    "select": "selectbox",
+    "multiselect": "multiselect",
+    "slider": "slider",
+    "pills": "button_group",
+    "checkbox": "checkbox",
+    "toggle": "toggle",
+    "radio": "radio",
+    "number": "number_input",
+    "click": "button",
+}
+
+PERCENTILES = [50, 90, 95, 99]
+
+# Seconds between RSS samples, and the width of each timeline bucket
+SAMPLE_SECONDS = 1.0
+
+
+def read_scenarios(path):
+    """
+    Scenarios from a JSON file: a list of {"name", "steps"} entries. A step
+    is {"action": "open", "page": "metric"}, {"action": "think", "seconds":
+    s} or a widget action from WIDGETS with a "key" or "label" and, except
+    for clicks, the "value" to set.
+    """
+    with open(path) as f:
+        scenarios = json.load(f)
+    for scenario in scenarios:
+        for step in scenario["steps"]:
+            action = step.get("action")
+            if action not in WIDGETS and action not in ("open", "think"):
+                raise ValueError(f"Unknown action in scenario {scenario.get('name')!r}: {action}")
+            if action in WIDGETS and "key" not in step and "label" not in step:
+                raise ValueError(f"Step {step} needs a widget key or label")
+    return scenarios
+
+
+def find_widget(at, step):
+    """
+    The widget a step targets, by key or else by label.
+    """
+    elements = getattr(at, WIDGETS[step["action"]])
+    for element in elements:
+        if "key" in step and element.key == step["key"]:
+            return element
+        if "key" not in step and element.label == step["label"]:
+            return element
+    raise LookupError(f"No {WIDGETS[step['action']]} with {step.get('key') or step.get('label')!r}")
+
+
+def share_runtime_between_runs():
+    """
+    Make AppTest safe to run from many threads, the way one server runs
+    many sessions.
+
+    AppTest installs a mock Runtime for each run and clears it when the run
+    ends; with parallel runs, one run's clear pulls the runtime out from
+    under the others, so lookups fall back to the most recently installed
+    one instead. AppTest also recompiles the script on every run, which
+    the server does once and which is not thread-safe on every Python
+    version, so compiled scripts are shared by all runs.
+    """
+    if getattr(Runtime.instance, "_shared", False):
+        return
+    original_instance = Runtime.instance.__func__
+    original_bytecode = ScriptCache.get_bytecode
+    last = {}
+    compiled = {}
+    lock = threading.Lock()
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+            return cls._instance
+        return last["runtime"] if "runtime" in last else original_instance(cls)
+
+    def get_bytecode(self, script_path):
+        with lock:
+            if script_path not in compiled:
+                compiled[script_path] = original_bytecode(self, script_path)
+            return compiled[script_path]
+
+    instance._shared = True
+    Runtime.instance = classmethod(instance)
+    ScriptCache.get_bytecode = get_bytecode
+
+
+def step_name(step):
+    target = step.get("page") or step.get("key") or step.get("label") or ""
+    return f"{step['action']} {target}".strip()
+
+
+class SimulatedSession:
+    """
+    One user replaying scenarios. Like a browser following a ?p= link,
+    an "open" step starts a new session; other steps rerun the current one.
+    """
+
+    def __init__(self, number, scenarios, iterations, app_path, timeout, results):
+        self.number = number
+        self.scenarios = scenarios
+        self.iterations = iterations
+        self.app_path = app_path
+        self.timeout = timeout
+        self.results = results
+        self.at = None
+
+    def _open(self, page):
+        self.at = AppTest.from_file(self.app_path, default_timeout=self.timeout)
+        self.at.query_params["p"] = page
+        self.at.run()
+
+    def _apply(self, step):
+        if step["action"] == "open":
+            self._open(step["page"])
+            return
+        widget = find_widget(self.at, step)
+        if step["action"] == "click":
+            widget.click()
+        else:
+            value = step["value"]
+            widget.set_value(tuple(value) if step["action"] == "slider" else value)
+        self.at.run()
+
+    def run(self, started):
+        for iteration in range(self.iterations):
+            # Sessions start at different scenarios so the mix stays even
+            scenario = self.scenarios[(self.number + iteration) % len(self.scenarios)]
+            for step in scenario["steps"]:
+                if step["action"] == "think":
+                    time.sleep(step["seconds"])
+                    continue
+                start = time.perf_counter()
+                try:
+                    self._apply(step)
+                    errors = [str(e.value) for e in self.at.exception] + [str(e.value) for e in self.at.error]
+                    error = "; ".join(errors)[:200] or None
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"[:200]
+                end = time.perf_counter()
+                self.results.append({
+                    "Session": self.number,
+                    "Scenario": scenario.get("name", ""),
+                    "Step": step_name(step),
+                    "Start (s)": start - started,
+                    "Latency (s)": end - start,
+                    "Error": error,
+                })
+                if error and self.at is None:
+                    break
+
+
+def sample_rss(samples, started, stop):
+    while not stop.wait(SAMPLE_SECONDS):
+        samples.append((time.perf_counter() - started, memory_budget.process_rss()))
+
+
+def run_load_test(scenarios, sessions, iterations=1, ramp_seconds=0.0, app_path=APP_PATH, timeout=300):
+    """
+    Run `sessions` simulated users concurrently, each replaying
+    `iterations` scenarios, starting evenly over ramp_seconds.
+    Returns (step results, RSS samples) as DataFrames.
+    """
+    share_runtime_between_runs()
+    results = []
+    samples = []
+    started = time.perf_counter()
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_rss, args=(samples, started, stop), daemon=True)
+    sampler.start()
+    samples.append((0.0, memory_budget.process_rss()))
+
+    threads = []
+    for number in range(sessions):
+        session = SimulatedSession(number, scenarios, iterations, app_path, timeout, results)
+        thread = threading.Thread(target=session.run, args=(started,), daemon=True)
+        threads.append(thread)
+        thread.start()
+        if ramp_seconds and sessions > 1:
+            time.sleep(ramp_seconds / (sessions - 1))
+    for thread in threads:
+        thread.join()
+
+    stop.set()
+    sampler.join()
+    samples.append((time.perf_counter() - started, memory_budget.process_rss()))
+    return pd.DataFrame(results), pd.DataFrame(samples, columns=["Elapsed (s)", "RSS (bytes)"])
+
+
+def latency_summary(results):
+    """
+    Latency percentiles per step and overall, in seconds.
+    """
+    def row(latencies, errors):
+        values = np.percentile(latencies, PERCENTILES) if len(latencies) else [np.nan] * len(PERCENTILES)
+        return {
+            "Reruns": len(latencies),
+            "Errors": int(errors),
+            **{f"p{p}": v for p, v in zip(PERCENTILES, values)},
+            "Max": max(latencies, default=np.nan),
+        }
+
+    rows = {}
+    for step, group in results.groupby("Step", sort=False):
+        rows[step] = row(group["Latency (s)"].tolist(), group["Error"].notna().sum())
+    rows["All steps"] = row(results["Latency (s)"].tolist(), results["Error"].notna().sum())
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def timeline(results, samples, bucket_seconds=None):
+    """
+    Completed reruns per second, p95 latency and peak RSS per time bucket.
+    """
+    end = max(results["Start (s)"].add(results["Latency (s)"]).max(), samples["Elapsed (s)"].max())
+    bucket_seconds = bucket_seconds or max(SAMPLE_SECONDS, np.ceil(end / 20))
+    edges = np.arange(0, end + bucket_seconds, bucket_seconds)
+    finished = results["Start (s)"] + results["Latency (s)"]
+    buckets = pd.cut(finished, edges, include_lowest=True)
+    rss = samples.groupby(pd.cut(samples["Elapsed (s)"], edges, include_lowest=True), observed=False)["RSS (bytes)"].max()
+    grouped = results.groupby(buckets, observed=False)["Latency (s)"]
+    return pd.DataFrame({
+        "Until (s)": edges[1:],
+        "Reruns/s": grouped.count().to_numpy() / bucket_seconds,
+        "p95 (s)": grouped.quantile(0.95).to_numpy(),
+        "Peak RSS (MB)": rss.to_numpy() / 1e6,
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded interaction scenarios across many concurrent app sessions.")
+    parser.add_argument("scenarios", help="JSON file of interaction scenarios")
+    parser.add_argument("-n", "--sessions", type=int, default=10, help="concurrent sessions (default: 10)")
+    parser.add_argument("-i", "--iterations", type=int, default=1, help="scenarios each session replays (default: 1)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which sessions start (default: 0)")
+    parser.add_argument("--app", default=APP_PATH, help="app script")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds allowed per rerun")
+    parser.add_argument("--json", help="also write the summary, timeline and raw results here")
+    args = parser.parse_args(argv)
+
+    # Per-rerun deprecation and cache notices would drown the report.
+    # Streamlit re-applies logger.level when it first parses its config,
+    # which AppTest triggers, so parse it now and set the option as well.
+    streamlit_config.get_config_options()
+    streamlit_config.set_option("logger.level", "error")
+    streamlit_logger.set_log_level("error")
+    started = time.perf_counter()
+    results, samples = run_load_test(read_scenarios(args.scenarios), args.sessions, args.iterations, args.ramp, args.app, args.timeout)
+    elapsed = time.perf_counter() - started
+    if len(results) == 0:
+        print("No steps ran")
+        return
+
+    summary = latency_summary(results)
+    trend = timeline(results, samples)
+    rss = samples["RSS (bytes)"].dropna() / 1e6
+    with pd.option_context("display.float_format", "{:,.3f}".format, "display.width", 160):
+        print(f"{args.sessions} sessions, {len(results)} reruns in {elapsed:.1f} s ({len(results) / elapsed:.2f} reruns/s)")
+        if len(rss):
+            print(f"RSS: start {rss.iloc[0]:,.0f} MB, peak {rss.max():,.0f} MB, end {rss.iloc[-1]:,.0f} MB")
+        print("\nLatency (s)")
+        print(summary.to_string())
+        print("\nOver time")
+        print(trend.to_string(index=False))
+        errors = results["Error"].dropna()
+        if len(errors):
+            print("\nFirst errors")
+            print("\n".join(errors.drop_duplicates().head(5)))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "sessions": args.sessions,
+                "elapsed_seconds": elapsed,
+                "summary": summary.reset_index(names="Step").to_dict(orient="records"),
+                "timeline": trend.to_dict(orient="records"),
+                "results": results.to_dict(orient="records"),
+            }, f, indent=1, default=float)
+
+
+if __name__ == "__main__":
+    main()
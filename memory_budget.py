@@ -0,0 +1,193 @@
+import gc
+import io
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+BUDGET_ENV = "LDES_MEMORY_BUDGET_MB"
+IDLE_ENV = "LDES_IDLE_SECONDS"
+
+DEFAULT_IDLE_SECONDS = 300
+
+# Sessions unseen this long are dropped from the ledger regardless of budget
+FORGET_SECONDS = 3600
+
+# Minimum gap between budget checks, and between global cache clears
+CHECK_INTERVAL_SECONDS = 5
+SHED_COOLDOWN_SECONDS = 60
+
+CATEGORIES = ["frames", "figures", "exports", "state"]
+
+
+def estimate_bytes(obj, _depth=0):
+    """
+    Rough deep size of an object: exact for frames and arrays, recursive
+    for containers, sys.getsizeof for anything else.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray, str)):
+        return len(obj)
+    if isinstance(obj, io.BytesIO):
+        return obj.getbuffer().nbytes
+    if _depth > 6:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_bytes(k, _depth + 1) + estimate_bytes(v, _depth + 1) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_bytes(v, _depth + 1) for v in obj)
+    if hasattr(obj, "to_plotly_json"):
+        return estimate_bytes(obj.to_plotly_json(), _depth + 1)
+    return sys.getsizeof(obj)
+
+
+def process_rss():
+    """
+    Resident set size of this process in bytes (None when unavailable).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS, but the best the platform offers
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    except ImportError:
+        return None
+
+
+def configured_budget():
+    """
+    Memory budget in bytes from LDES_MEMORY_BUDGET_MB (None: no budget).
+    """
+    value = os.environ.get(BUDGET_ENV)
+    try:
+        return int(float(value) * 1024 * 1024) if value else None
+    except ValueError:
+        return None
+
+
+def configured_idle_seconds():
+    value = os.environ.get(IDLE_ENV)
+    try:
+        return float(value) if value else DEFAULT_IDLE_SECONDS
+    except ValueError:
+        return DEFAULT_IDLE_SECONDS
+
+
+class MemoryLedger:
+    """
+    Process-wide record of the bytes each session holds, by category:
+    its filtered frames, the figures it built, its export buffers and its
+    session state. Figures are read from the FigureCache owner tags.
+
+    enforce() checks the process RSS against the budget and, when over,
+    first evicts the figures of sessions idle for idle_seconds, then runs
+    the registered shedders (global cache clears) at most once per
+    SHED_COOLDOWN_SECONDS.
+    """
+
+    def __init__(self, budget_bytes=None, idle_seconds=DEFAULT_IDLE_SECONDS):
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self.history = []
+        self._sessions = {}
+        self._shedders = {}
+        self._last_check = 0.0
+        self._last_global_shed = 0.0
+        self._lock = threading.Lock()
+
+    def touch(self, session_id, page):
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, {"page": page, "seen": 0.0, "bytes": {}})
+            entry["page"] = page
+            entry["seen"] = time.time()
+
+    def record(self, session_id, category, name, nbytes):
+        with self._lock:
+            entry = self._sessions.setdefault(session_id, {"page": None, "seen": time.time(), "bytes": {}})
+            entry["bytes"][(category, name)] = int(nbytes)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def register_shedder(self, name, shed):
+        self._shedders[name] = shed
+
+    def snapshot(self, figure_cache=None):
+        """
+        One row per session with bytes per category and idle seconds.
+        """
+        figure_bytes = figure_cache.bytes_by_owner() if figure_cache is not None else {}
+        now = time.time()
+        with self._lock:
+            sessions = {sid: (e["page"], e["seen"], dict(e["bytes"])) for sid, e in self._sessions.items()}
+        rows = []
+        for sid, (page, seen, held) in sessions.items():
+            row = {"Session": sid[:8], "Page": page, "Idle (s)": round(now - seen)}
+            for category in CATEGORIES:
+                row[category.title() + " (MB)"] = sum(b for (c, _), b in held.items() if c == category) / 1e6
+            row["Figures (MB)"] += figure_bytes.get(sid, 0) / 1e6
+            row["Total (MB)"] = sum(row[c.title() + " (MB)"] for c in CATEGORIES)
+            rows.append(row)
+        columns = ["Session", "Page", "Idle (s)"] + [c.title() + " (MB)" for c in CATEGORIES] + ["Total (MB)"]
+        return pd.DataFrame(rows, columns=columns).sort_values("Total (MB)", ascending=False, ignore_index=True)
+
+    def _log(self, action):
+        self.history = (self.history + [(time.strftime("%H:%M:%S"), action)])[-50:]
+
+    def enforce(self, figure_cache=None, force=False):
+        """
+        Shed cached artifacts while the process is over budget. Cheap to
+        call on every rerun: checks run at most every CHECK_INTERVAL_SECONDS.
+        """
+        now = time.time()
+        if not force and now - self._last_check < CHECK_INTERVAL_SECONDS:
+            return
+        self._last_check = now
+
+        with self._lock:
+            stale = [sid for sid, e in self._sessions.items() if now - e["seen"] > FORGET_SECONDS]
+            idle = [sid for sid, e in self._sessions.items() if now - e["seen"] > self.idle_seconds]
+        for sid in stale:
+            self.forget(sid)
+
+        rss = process_rss()
+        if self.budget_bytes is None or rss is None or rss <= self.budget_bytes:
+            return
+
+        freed = 0
+        for sid in idle:
+            if figure_cache is not None:
+                freed += figure_cache.evict_owner(sid)
+            with self._lock:
+                entry = self._sessions.get(sid)
+                if entry:
+                    entry["bytes"] = {k: v for k, v in entry["bytes"].items() if k[0] == "state"}
+        if idle:
+            self._log(f"Over budget ({rss / 1e6:,.0f} MB): dropped {freed} figures of {len(idle)} idle session(s)")
+
+        gc.collect()
+        rss = process_rss()
+        if rss is not None and rss > self.budget_bytes and (force or now - self._last_global_shed >= SHED_COOLDOWN_SECONDS):
+            self._last_global_shed = now
+            for name, shed in self._shedders.items():
+                shed()
+            gc.collect()
+            self._log(f"Still over budget ({rss / 1e6:,.0f} MB): cleared {', '.join(self._shedders) or 'nothing'}")
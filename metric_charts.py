@@ -0,0 +1,911 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+import capacity_fade
+import derived_metrics
+import dispatch
+import figure_encoding
+import lcos
+import pareto
+import site_sizing
+
+
+# Mapping of combined metrics to their low/high column names
+RANGE_METRICS = {
+    "Duration (hr)": ("Duration - Low (hr)", "Duration - High (hr)"),
+    "RTE (%)": ("RTE - Low (%)", "RTE - High (%)"),
+    "Degradation (%/cycle)": ("Degradation - Low (%/cycle)", "Degradation - High (%/cycle)"),
+    "Cycle Life (#)": ("Cycle Life - Low (#)", "Cycle Life - High (#)"),
+    "Ramp Rate (% rated power/sec)": ("Ramp Rate - Low (% rated power/sec)", "Ramp Rate - High (% rated power/sec)"),
+    "Response Time (s)": ("Response Time - Low (s)", "Response Time - High (s)"),
+    "Energy Density (acre/MWhe)": ("Energy Density - Low (acre/MWhe)", "Energy Density - High (acre/MWhe)"),
+    "Power Density (acre/MW)": ("Power Density - Low (acre/MW)", "Power Density - High (acre/MW)"),
+    "CAPEX Energy Basis ($/kWhe)": ("CAPEX Energy Basis - Low ($/kWhe)", "CAPEX Energy Basis - High ($/kWhe)"),
+    "CAPEX Power Basis ($/kWe)": ("CAPEX Power Basis - Low ($/kWe)", "CAPEX Power Basis - High ($/kWe)"),
+    "OPEX ($/kW-year)": ("OPEX - Low ($/kW-year)", "OPEX - High ($/kW-year)")
+}
+
+# Chart title -> range metric drawn by create_range_bar
+RANGE_CHARTS = {
+    "Duration Range (hr)": "Duration (hr)",
+    "Round-Trip Efficiency (RTE) Range (%)": "RTE (%)",
+    "Degradation Rate Range (%/cycle)": "Degradation (%/cycle)",
+    "Cycle Life Range (#)": "Cycle Life (#)",
+    "Ramp Rate Range (% rated power/sec)": "Ramp Rate (% rated power/sec)",
+    "Response Time Range (s)": "Response Time (s)",
+    "Energy Density Range (acre/MWhe)": "Energy Density (acre/MWhe)",
+    "Power Density Range (acre/MW)": "Power Density (acre/MW)",
+    "CAPEX Energy Basis Range ($/kWhe)": "CAPEX Energy Basis ($/kWhe)",
+    "CAPEX Power Basis Range ($/kWe)": "CAPEX Power Basis ($/kWe)",
+    "OPEX Range ($/kW-year)": "OPEX ($/kW-year)",
+}
+
+# Chart title -> derived range metric (see derived_metrics), drawn like
+# RANGE_CHARTS once its columns are computed
+DERIVED_CHARTS = {derived_metrics.range_title(name): name for name in derived_metrics.DERIVED_METRICS}
+
+# Chart title -> single-value readiness column
+LEVEL_CHARTS = {
+    "Technology Readiness Level (TRL)": "TRL",
+    "Application Readiness Level (ARL)": "ARL",
+    "Manufacturing Readiness Level (MRL)": "MRL",
+}
+
+# Chart title -> categorical column (stacked count bars with a legend)
+CATEGORY_CHARTS = {
+    "Geological Feature Requirement": "Geological Req.",
+    "Historical Fire Events": "Fire Incidents",
+    "Environmental Impact": "Environmental Impact",
+    "Separate Power & Energy": "Separate Power & Energy ",
+}
+
+PARETO_CHART = "Pareto Frontier"
+
+RECTANGLE_CHART = "Range Trade-Off (Two Metrics)"
+
+LCOS_CHART = "LCOS Distribution (Monte Carlo)"
+
+SWEEP_CHART = "Cheapest Technology Map (LCOS Sweep)"
+
+SIZING_CHART = "Site Sizing Screener"
+
+DISPATCH_CHART = "Dispatch Simulation (8760)"
+
+FADE_CHART = "Capacity Fade Trajectories"
+
+DASHBOARD_CHART = "All Range Metrics (Dashboard)"
+
+# Dashboard subplot columns and height per row; rows are added to fit
+# every range and derived metric
+DASHBOARD_COLUMNS = 3
+DASHBOARD_ROW_HEIGHT = 350
+
+# Larger sweep grids drop per-cell technology names from the hover payload
+SWEEP_HOVER_NAME_CELLS = 10_000
+
+# Default frontier: the trade-off users ask about most
+DEFAULT_PARETO_METRICS = ["RTE (%)", "CAPEX Energy Basis ($/kWhe)", "Cycle Life (#)"]
+
+# Default axes of the range trade-off chart
+DEFAULT_RECTANGLE_METRICS = ("CAPEX Energy Basis ($/kWhe)", "RTE (%)")
+
+# Order of the "Select Graph to View" options
+CHART_NAMES = [DASHBOARD_CHART] + list(RANGE_CHARTS) + list(DERIVED_CHARTS) + list(LEVEL_CHARTS) + list(CATEGORY_CHARTS) + ["Off-Gassing", PARETO_CHART, RECTANGLE_CHART, LCOS_CHART, SWEEP_CHART, SIZING_CHART, DISPATCH_CHART, FADE_CHART]
+
+# Charts drawn from the filtered data alone (no per-chart controls), which
+# can be built ahead of time for any filter state
+STATIC_CHARTS = [DASHBOARD_CHART] + list(RANGE_CHARTS) + list(DERIVED_CHARTS) + list(LEVEL_CHARTS) + list(CATEGORY_CHARTS) + ["Off-Gassing"]
+
+# Shared hover payload: the numbers behind the RTE, TRL and CAPEX lines,
+# one row per technology. Sent as numeric customdata and formatted by the
+# template, so it compacts to a typed array like the bars themselves.
+# Missing cells are left out of their row and show as HOVER_FALLBACK.
+HOVER_COLUMNS = ["hover_rte_low", "hover_rte_high", "hover_trl", "hover_capex_low", "hover_capex_high"]
+
+HOVER_VALUES = (
+    "RTE: %{customdata[0]:,.3~f} - %{customdata[1]:,.3~f}%<br>"
+    "TRL: %{customdata[2]:,.3~f}<br>"
+    "CAPEX: %{customdata[3]:$,.3~f} - %{customdata[4]:$,.3~f}/kWhe<br>"
+)
+
+# Bars are named by their technology category on x; scatters, whose x is
+# a metric, carry the names as hovertext
+HOVER_TEMPLATE = "<b>%{x}</b><br><br>" + HOVER_VALUES
+SCATTER_HOVER_TEMPLATE = "<b>%{hovertext}</b><br><br>" + HOVER_VALUES
+HOVER_FALLBACK = "N/A"
+
+BAR_COLORS = px.colors.qualitative.Plotly
+
+
+def _column(df, col):
+    if col in df.columns:
+        return df[col]
+    return pd.Series(np.nan, index=df.index)
+
+
+def build_hover_data(df):
+    """
+    Precompute the hover values shared by every metric chart, as floats.
+    Built once per dataset version; charts select rows by index.
+    """
+    columns = ["RTE - Low (%)", "RTE - High (%)", "TRL", "CAPEX Energy Basis - Low ($/kWhe)", "CAPEX Energy Basis - High ($/kWhe)"]
+    return pd.DataFrame(
+        {name: pd.to_numeric(_column(df, col), errors="coerce").to_numpy(dtype=float) for name, col in zip(HOVER_COLUMNS, columns)},
+        index=df.index
+    )
+
+
+def hover_customdata(values):
+    """
+    Customdata for one trace from its float hover rows. Rows with missing
+    cells go as objects without those cells, which plotly.js fills with
+    the trace's hovertemplatefallback; complete rows stay plain arrays,
+    so a trace without gaps still compacts to a typed array.
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+    return [
+        {str(i): v for i, (v, gap) in enumerate(zip(row, gaps)) if not gap} if any(gaps) else row
+        for row, gaps in zip(values.tolist(), missing.tolist())
+    ]
+
+
+def filter_fingerprint(version, filtered_df, active_filter_ranges):
+    """
+    Stable key for one filter state: dataset version, surviving rows and
+    active slider ranges. Every per-filter cache is keyed by this.
+    """
+    digest = hashlib.sha1(str(version).encode())
+    digest.update(pd.util.hash_pandas_object(filtered_df.index, index=False).to_numpy().tobytes())
+    ranges = sorted((k, float(v[0]), float(v[1])) for k, v in active_filter_ranges.items())
+    digest.update(repr(ranges).encode())
+    return digest.hexdigest()
+
+
+def _bar_colors(n):
+    """
+    Cycle the default Plotly colorway so single-trace charts look like
+    the one-trace-per-technology charts they replace.
+    """
+    return [BAR_COLORS[i % len(BAR_COLORS)] for i in range(n)]
+
+
+def create_range_bar(df, x_col, y_low_col, y_high_col, title, clip_range=None, hover_data=None):
+    """
+    Draw one floating bar per technology spanning its low/high range,
+    clipped to clip_range when a slider filter is active.
+    All bars are emitted as a single trace sharing one hovertemplate.
+    """
+    fig = go.Figure()
+    if len(df) == 0:
+        fig.update_layout(title=title, xaxis_title=x_col)
+        return fig
+
+    low = df[y_low_col].to_numpy(dtype=float)
+    high = df[y_high_col].to_numpy(dtype=float)
+    if clip_range:
+        low = np.maximum(low, clip_range[0])
+        high = np.minimum(high, clip_range[1])
+
+    # Skip rows with NaN values or ranges clipped away entirely
+    keep = ~(np.isnan(low) | np.isnan(high)) & (low <= high)
+    if hover_data is None:
+        hover_data = build_hover_data(df)
+
+    fig.add_trace(go.Bar(
+        x=df[x_col].to_numpy()[keep],
+        y=(high - low)[keep],
+        base=low[keep],
+        marker_color=_bar_colors(int(keep.sum())),
+        customdata=hover_customdata(hover_data.loc[df.index[keep]]),
+        hovertemplate=HOVER_TEMPLATE + "<extra></extra>",
+        hovertemplatefallback=HOVER_FALLBACK
+    ))
+
+    fig.update_layout(title=title, barmode='group')
+    return fig
+
+
+def create_range_dashboard(df, active_filter_ranges=None, hover_data=None, range_metrics=None):
+    """
+    Every range metric (range_metrics, RANGE_METRICS by default) as a
+    floating-bar subplot of one figure, on as many rows as they need.
+
+    The low/high columns are stacked into (technology, metric) arrays and
+    clipped to the active slider ranges in one pass; each subplot is then
+    a single trace sliced from them. A technology keeps the same color and
+    x position in every subplot.
+    """
+    range_metrics = range_metrics or RANGE_METRICS
+    metrics = list(range_metrics)
+    cols = DASHBOARD_COLUMNS
+    rows = -(-len(metrics) // cols)
+    fig = make_subplots(
+        rows=rows, cols=cols, subplot_titles=metrics, shared_xaxes=True,
+        vertical_spacing=0.24 / rows, horizontal_spacing=0.06
+    )
+    fig.update_layout(
+        title="All Range Metrics", height=rows * DASHBOARD_ROW_HEIGHT, margin=dict(l=50, r=50, t=80, b=50),
+        font=dict(size=12), showlegend=False
+    )
+    if len(df) == 0:
+        return fig
+
+    low = np.column_stack([_column(df, range_metrics[m][0]).to_numpy(dtype=float) for m in metrics])
+    high = np.column_stack([_column(df, range_metrics[m][1]).to_numpy(dtype=float) for m in metrics])
+    active_filter_ranges = active_filter_ranges or {}
+    clip_low = np.array([active_filter_ranges.get(m, (-np.inf, np.inf))[0] for m in metrics], dtype=float)
+    clip_high = np.array([active_filter_ranges.get(m, (-np.inf, np.inf))[1] for m in metrics], dtype=float)
+    low = np.maximum(low, clip_low)
+    high = np.minimum(high, clip_high)
+    keep = ~(np.isnan(low) | np.isnan(high)) & (low <= high)
+
+    if hover_data is None:
+        hover_data = build_hover_data(df)
+    names = df["Detailed Technology"].to_numpy()
+    colors = np.array(_bar_colors(len(df)), dtype=object)
+    hover = hover_data.loc[df.index].to_numpy()
+
+    for j, metric in enumerate(metrics):
+        rows_kept = keep[:, j]
+        fig.add_trace(go.Bar(
+            x=names[rows_kept],
+            y=(high - low)[rows_kept, j],
+            base=low[rows_kept, j],
+            marker_color=colors[rows_kept],
+            customdata=hover_customdata(np.column_stack([hover[rows_kept], low[rows_kept, j], high[rows_kept, j]])),
+            hovertemplate=HOVER_TEMPLATE + f"{metric}: %{{customdata[5]:,.4g}} - %{{customdata[6]:,.4g}}<extra></extra>",
+            hovertemplatefallback=HOVER_FALLBACK
+        ), row=j // cols + 1, col=j % cols + 1)
+
+    fig.update_xaxes(categoryorder="array", categoryarray=names, tickangle=-45)
+    return fig
+
+
+def create_level_bar(df, level_col, title, hover_data=None):
+    """
+    Bar chart of a single-value readiness level (TRL/ARL/MRL) per technology.
+    """
+    fig = go.Figure()
+    if len(df) == 0:
+        fig.update_layout(title=title, xaxis_title="Detailed Technology", yaxis_title=level_col)
+        return fig
+
+    if hover_data is None:
+        hover_data = build_hover_data(df)
+
+    fig.add_trace(go.Bar(
+        x=df["Detailed Technology"].to_numpy(),
+        y=df[level_col].to_numpy(dtype=float),
+        marker_color=_bar_colors(len(df)),
+        customdata=hover_customdata(hover_data.loc[df.index]),
+        hovertemplate=HOVER_TEMPLATE + f"{level_col}: %{{y}}<extra></extra>",
+        hovertemplatefallback=HOVER_FALLBACK
+    ))
+    fig.update_layout(title=title, xaxis_title="Detailed Technology", yaxis_title=level_col)
+    return fig
+
+
+def create_category_bar(df, category_col, title, hover_data=None):
+    """
+    Count bars per technology colored by a categorical column.
+    """
+    if hover_data is None:
+        hover_data = build_hover_data(df)
+    fig = px.bar(
+        df.join(hover_data),
+        x="Detailed Technology",
+        color=category_col,
+        title=title,
+        custom_data=HOVER_COLUMNS
+    )
+    fig.update_traces(
+        hovertemplate=HOVER_TEMPLATE + f"{category_col.strip()}: %{{fullData.name}}<extra></extra>",
+        hovertemplatefallback=HOVER_FALLBACK
+    )
+    for trace in fig.data:
+        trace.customdata = hover_customdata(trace.customdata)
+    return fig
+
+
+def offgassing_display(series):
+    """
+    Reduce the free-text Off-Gassing column to Yes/No.
+    """
+    return pd.Series(
+        np.where(series.fillna("").astype(str).str.strip().str.startswith("Yes"), "Yes", "No"),
+        index=series.index
+    )
+
+
+# Create custom Off-Gassing chart with Yes/No colors and hover details
+def create_offgassing_chart(df):
+    fig = go.Figure()
+    if len(df) == 0:
+        # Return empty figure if no data
+        fig.update_layout(
+            title="Off-Gassing",
+            xaxis_title="Detailed Technology",
+            yaxis_title="Count"
+        )
+        return fig
+
+    display = offgassing_display(df["Off-Gassing "])
+    details = df["Off-Gassing "].fillna("").astype(str).to_numpy()
+
+    # Define colors for Yes/No
+    color_map = {"Yes": "#EF553B", "No": "#00CC96"}  # Plotly default colors
+
+    # One trace per Yes/No value; full explanation rides along in customdata
+    for value in ["No", "Yes"]:
+        mask = (display == value).to_numpy()
+        if not mask.any():
+            continue
+        fig.add_trace(go.Bar(
+            x=df["Detailed Technology"].to_numpy()[mask],
+            y=np.ones(int(mask.sum())),
+            name=value,
+            marker_color=color_map[value],
+            customdata=details[mask],
+            hovertemplate=(
+                "<b>%{x}</b><br><br>"
+                f"Off-Gassing: {value}<br>"
+                "Details: %{customdata}<br>"
+                "<extra></extra>"
+            )
+        ))
+
+    fig.update_layout(
+        title="Off-Gassing",
+        yaxis_title="Count",
+        xaxis_title="Detailed Technology",
+        margin=dict(l=50, r=50, t=80, b=50),
+        font=dict(size=12),
+        autosize=True,
+        barmode='group'
+    )
+    return fig
+
+
+def default_pareto_options(df):
+    """
+    Frontier settings used when the caller has not chosen any.
+    """
+    metrics = [m for m in DEFAULT_PARETO_METRICS if m in pareto.pareto_metrics(df, RANGE_METRICS)]
+    return {
+        "metrics": metrics,
+        "directions": {m: pareto.DEFAULT_DIRECTIONS[m] for m in metrics},
+        "mode": "optimistic",
+    }
+
+
+def create_pareto_chart(df, pareto_options=None, hover_data=None, range_metrics=None):
+    """
+    Scatter of the first two frontier metrics with non-dominated
+    technologies highlighted. A precomputed mask may be passed in
+    pareto_options["front"]; otherwise it is computed here. range_metrics
+    (RANGE_METRICS by default) must cover any derived metric chosen.
+    """
+    range_metrics = range_metrics or RANGE_METRICS
+    options = pareto_options or default_pareto_options(df)
+    metrics = options["metrics"]
+    directions = options["directions"]
+    mode = options["mode"]
+
+    fig = go.Figure()
+    if len(df) == 0 or not metrics:
+        fig.update_layout(title=PARETO_CHART, xaxis_title="Detailed Technology")
+        return fig
+
+    front = options.get("front")
+    if front is None:
+        front = pareto.pareto_front(df, range_metrics, metrics, directions, mode)
+    front = front.reindex(df.index, fill_value=False).to_numpy()
+    if hover_data is None:
+        hover_data = build_hover_data(df)
+
+    # Plot the same end of each range the frontier was computed on
+    values = [pareto.metric_values(df, range_metrics, m, directions[m], mode) for m in metrics[:2]]
+    if len(metrics) >= 2:
+        x, y = values
+        x_title, y_title = metrics[0], metrics[1]
+    else:
+        x, y = df["Detailed Technology"].to_numpy(), values[0]
+        x_title, y_title = "Detailed Technology", metrics[0]
+
+    customdata = hover_data.loc[df.index].to_numpy()
+    names = df["Detailed Technology"].to_numpy()
+    template = SCATTER_HOVER_TEMPLATE + f"{x_title}: %{{x}}<br>{y_title}: %{{y}}<extra></extra>"
+
+    # WebGL scatter keeps large variant catalogs interactive
+    dominated = ~front
+    fig.add_trace(go.Scattergl(
+        x=x[dominated], y=y[dominated],
+        mode="markers",
+        name="Dominated",
+        marker=dict(color="rgba(150,150,150,0.5)", size=8),
+        customdata=hover_customdata(customdata[dominated]),
+        hovertext=names[dominated],
+        hovertemplate=template,
+        hovertemplatefallback=HOVER_FALLBACK
+    ))
+
+    order = np.argsort(x[front], kind="stable") if len(metrics) == 2 else np.arange(int(front.sum()))
+    fig.add_trace(go.Scattergl(
+        x=x[front][order], y=y[front][order],
+        mode="lines+markers" if len(metrics) == 2 else "markers",
+        line=dict(color="#c8a415"),
+        name="Pareto frontier",
+        marker=dict(color="#0076a9", size=12, line=dict(color="#c8a415", width=2)),
+        customdata=hover_customdata(customdata[front][order]),
+        hovertext=names[front][order],
+        hovertemplate=template,
+        hovertemplatefallback=HOVER_FALLBACK
+    ))
+
+    label = "best" if mode == "optimistic" else "worst"
+    fig.update_layout(
+        title=f"{PARETO_CHART}: {int(front.sum())} of {len(df)} technologies non-dominated on {', '.join(metrics)} ({label}-end values)",
+        xaxis_title=x_title,
+        yaxis_title=y_title
+    )
+    return fig
+
+
+def default_rectangle_options():
+    """
+    Trade-off chart axes used when the caller has not chosen any.
+    """
+    x_metric, y_metric = DEFAULT_RECTANGLE_METRICS
+    return {"x": x_metric, "y": y_metric}
+
+
+def _clipped_range(df, metric, clip_range):
+    low_col, high_col = {**RANGE_METRICS, **derived_metrics.DERIVED_RANGE_METRICS}[metric]
+    low = _column(df, low_col).to_numpy(dtype=float)
+    high = _column(df, high_col).to_numpy(dtype=float)
+    if clip_range:
+        low = np.maximum(low, clip_range[0])
+        high = np.minimum(high, clip_range[1])
+    return low, high
+
+
+def create_rectangle_chart(df, rectangle_options=None, active_filter_ranges=None, hover_data=None):
+    """
+    Each technology as a rectangle spanning its low/high range on two
+    metrics, clipped to active slider ranges like create_range_bar.
+
+    All rectangles are one filled scatter trace: five corners per
+    technology with a NaN gap between them, which plotly.js fills as
+    separate polygons. One SVG path stays responsive for thousands of
+    technologies, where a layout shape per rectangle does not. A marker
+    at each center carries the hover.
+    """
+    options = rectangle_options or default_rectangle_options()
+    x_metric, y_metric = options["x"], options["y"]
+    active_filter_ranges = active_filter_ranges or {}
+    title = f"{RECTANGLE_CHART}: {y_metric} vs {x_metric}"
+
+    fig = go.Figure()
+    fig.update_layout(title=title, xaxis_title=x_metric, yaxis_title=y_metric, showlegend=False)
+    if len(df) == 0 or x_metric is None or y_metric is None:
+        return fig
+
+    x_low, x_high = _clipped_range(df, x_metric, active_filter_ranges.get(x_metric))
+    y_low, y_high = _clipped_range(df, y_metric, active_filter_ranges.get(y_metric))
+    keep = ~np.isnan(x_low + x_high + y_low + y_high) & (x_low <= x_high) & (y_low <= y_high)
+    x_low, x_high, y_low, y_high = x_low[keep], x_high[keep], y_low[keep], y_high[keep]
+
+    # (technology, corner) grid flattened into one path: 4 corners, the
+    # first again to close the outline, then the gap
+    gap = np.full(len(x_low), np.nan)
+    x = np.column_stack([x_low, x_high, x_high, x_low, x_low, gap]).ravel()
+    y = np.column_stack([y_low, y_low, y_high, y_high, y_low, gap]).ravel()
+    fig.add_trace(go.Scatter(
+        x=x, y=y,
+        mode="lines",
+        fill="toself",
+        fillcolor="rgba(0,118,169,0.15)",
+        line=dict(color="rgba(0,118,169,0.8)", width=1),
+        hoverinfo="skip"
+    ))
+
+    if hover_data is None:
+        hover_data = build_hover_data(df)
+    fig.add_trace(go.Scattergl(
+        x=(x_low + x_high) / 2,
+        y=(y_low + y_high) / 2,
+        mode="markers",
+        marker=dict(color="#0076a9", size=5),
+        customdata=hover_customdata(np.column_stack([hover_data.loc[df.index[keep]].to_numpy(), x_low, x_high, y_low, y_high])),
+        hovertemplatefallback=HOVER_FALLBACK,
+        hovertext=df["Detailed Technology"].to_numpy()[keep],
+        hovertemplate=SCATTER_HOVER_TEMPLATE + (
+            f"{x_metric}: %{{customdata[5]:,.3~f}} - %{{customdata[6]:,.3~f}}<br>"
+            f"{y_metric}: %{{customdata[7]:,.3~f}} - %{{customdata[8]:,.3~f}}<extra></extra>"
+        )
+    ))
+    fig.update_layout(title=f"{title} ({int(keep.sum())} technologies)")
+    return fig
+
+
+def default_lcos_options():
+    """
+    Monte Carlo settings used when the caller has not chosen any.
+    """
+    return {"n_samples": 10_000, "seed": 42, "assumptions": dict(lcos.DEFAULT_ASSUMPTIONS)}
+
+
+def create_lcos_chart(df, lcos_options=None):
+    """
+    Box plot of the Monte Carlo LCOS distribution per technology
+    (whiskers at P5/P95). A precomputed result may be passed in
+    lcos_options["result"]; otherwise a run is made here.
+    """
+    options = lcos_options or default_lcos_options()
+    result = options.get("result")
+    if result is None:
+        result = lcos.monte_carlo_lcos(
+            df, RANGE_METRICS, options["n_samples"], options["seed"], options["assumptions"],
+            workers=lcos.default_workers(options["n_samples"])
+        )
+    summary = result["summary"]
+
+    fig = go.Figure()
+    title = "Levelized Cost of Storage ($/MWh)"
+    if len(summary) == 0:
+        fig.update_layout(title=title, xaxis_title="Detailed Technology")
+        return fig
+
+    # Precomputed box statistics: one small trace regardless of sample count
+    fig.add_trace(go.Box(
+        x=summary["Detailed Technology"],
+        q1=summary["P25"],
+        median=summary["P50"],
+        q3=summary["P75"],
+        lowerfence=summary["P5"],
+        upperfence=summary["P95"],
+        mean=summary["Mean"],
+        marker_color="#0076a9",
+        name="LCOS",
+        customdata=summary[["Min", "Max"]].to_numpy(),
+        hovertemplate="<b>%{x}</b><br>Sample range: $%{customdata[0]:.0f} - $%{customdata[1]:.0f}/MWh<extra></extra>"
+    ))
+
+    assumptions = options["assumptions"]
+    fig.update_layout(
+        title=(
+            f"{title}: {options['n_samples']:,} samples, {assumptions['duration_hr']:g} h, "
+            f"{assumptions['cycles_per_year']:g} cycles/yr"
+        ),
+        xaxis_title="Detailed Technology",
+        yaxis_title="LCOS ($/MWh)",
+        yaxis_type="log"
+    )
+    return fig
+
+
+def default_sweep_options():
+    """
+    LCOS sweep settings used when the caller has not chosen any.
+    """
+    return {"points": 100, "scenario": "midpoint", "cycles_range": (10, 730), "assumptions": dict(lcos.DEFAULT_ASSUMPTIONS)}
+
+
+def create_sweep_chart(df, sweep_options=None):
+    """
+    Heatmap of the cheapest technology in each duration x annual-cycles
+    cell. A precomputed sweep may be passed in sweep_options["result"].
+    """
+    options = sweep_options or default_sweep_options()
+    result = options.get("result")
+    if result is None:
+        durations, cycles = lcos.sweep_axes(df, RANGE_METRICS, options["points"], options["cycles_range"])
+        result = lcos.sweep_lcos(df, RANGE_METRICS, durations, cycles, options["scenario"], options["assumptions"])
+
+    fig = go.Figure()
+    title = "Cheapest Technology by Duration and Annual Cycles"
+    technologies = result["technologies"]
+    if len(technologies) == 0:
+        fig.update_layout(title=title, xaxis_title="Discharge Duration (hr)", yaxis_title="Annual Cycles")
+        return fig
+
+    # Heatmap rows are cycles, columns durations
+    cheapest = result["cheapest"].T
+    z = np.where(cheapest >= 0, cheapest, np.nan).astype(float)
+    n = len(technologies)
+
+    # Per-cell names dominate the payload, so big grids point at the colorbar
+    if cheapest.size <= SWEEP_HOVER_NAME_CELLS:
+        names = np.append(technologies, "None feasible")[cheapest]
+        name_hover = "Cheapest: <b>%{text}</b><br>"
+    else:
+        names = None
+        name_hover = "Cheapest: see colorbar<br>"
+
+    # Discrete colorscale: one flat band per technology index
+    colors = [BAR_COLORS[i % len(BAR_COLORS)] for i in range(n)]
+    colorscale = []
+    for i, color in enumerate(colors):
+        colorscale += [[i / n, color], [(i + 1) / n, color]]
+
+    fig.add_trace(go.Heatmap(
+        x=result["durations"],
+        y=result["cycles"],
+        z=z,
+        zmin=-0.5,
+        zmax=n - 0.5,
+        colorscale=colorscale,
+        text=names,
+        customdata=np.round(result["cheapest_lcos"].T),
+        colorbar=dict(tickmode="array", tickvals=list(range(n)), ticktext=list(technologies)),
+        hovertemplate=(
+            "Duration: %{x:.2f} h<br>Cycles/yr: %{y:.0f}<br>"
+            + name_hover +
+            "LCOS: $%{customdata:.0f}/MWh<extra></extra>"
+        )
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title="Discharge Duration (hr)",
+        xaxis_type="log",
+        yaxis_title="Annual Cycles"
+    )
+    return fig
+
+
+def default_sizing_options():
+    """
+    Site sizing settings used when the caller has not chosen any.
+    """
+    return {**site_sizing.DEFAULT_REQUIREMENT, "capex_basis": "energy"}
+
+
+def create_sizing_chart(df, sizing_options=None):
+    """
+    Land envelope (low to high acres) needed to build the whole site with
+    each technology, colored by whether it fits the available land.
+    A precomputed envelope table may be passed in sizing_options["envelopes"].
+    """
+    options = sizing_options or default_sizing_options()
+    envelopes = options.get("envelopes")
+    if envelopes is None:
+        envelopes = site_sizing.technology_envelopes(
+            df, RANGE_METRICS, options["power_mw"], options["energy_mwh"], options["land_acres"], options["capex_basis"]
+        )
+
+    fig = go.Figure()
+    title = f"Land Needed for {options['power_mw']:g} MW / {options['energy_mwh']:g} MWh vs {options['land_acres']:g} Acres Available"
+    known = envelopes[envelopes["Fits"] != "Unknown"]
+    if len(known) == 0:
+        fig.update_layout(title=title, xaxis_title="Detailed Technology")
+        return fig
+
+    fit_colors = {"Yes": "#00CC96", "Maybe": "#c8a415", "No": "#EF553B"}
+    low = known["Land Low (acre)"].to_numpy()
+    high = known["Land High (acre)"].to_numpy()
+    fig.add_trace(go.Bar(
+        x=known["Detailed Technology"].to_numpy(),
+        y=np.maximum(high - low, high * 0.02),
+        base=low,
+        marker_color=known["Fits"].map(fit_colors).to_numpy(),
+        customdata=known[["Fits", "Duration OK", "Cost Low ($M)", "Cost High ($M)", "Land Low (acre)", "Land High (acre)"]].to_numpy(),
+        hovertemplate=(
+            "<b>%{x}</b><br><br>"
+            "Land: %{customdata[4]:,.1f} - %{customdata[5]:,.1f} acres<br>"
+            "Fits: %{customdata[0]}<br>"
+            "Duration OK: %{customdata[1]}<br>"
+            "Cost: $%{customdata[2]:,.0f}M - $%{customdata[3]:,.0f}M<extra></extra>"
+        )
+    ))
+    fig.add_hline(y=options["land_acres"], line_dash="dash", line_color="#0076a9", annotation_text="Available land")
+    fig.update_layout(title=title, xaxis_title="Detailed Technology", yaxis_title="Land (acres)", yaxis_type="log", barmode="group")
+    return fig
+
+
+def default_dispatch_options():
+    """
+    Dispatch settings used when the caller has not chosen any: one year of
+    the synthetic sample price profile.
+    """
+    return {"profiles": dispatch.sample_profile(), "kind": "price", "assumptions": dict(dispatch.DEFAULT_ASSUMPTIONS)}
+
+
+def create_dispatch_chart(df, dispatch_options=None):
+    """
+    Floating bars spanning each technology's pessimistic-to-optimistic
+    dispatch value, one trace per profile. A precomputed result may be
+    passed in dispatch_options["result"]; otherwise a run is made here.
+    """
+    options = dispatch_options or default_dispatch_options()
+    result = options.get("result")
+    if result is None:
+        result = dispatch.simulate_dispatch(df, RANGE_METRICS, options["profiles"], options["kind"], options["assumptions"])
+
+    value = "Revenue ($/kW-year)" if options["kind"] == "price" else "Peak Reduction (MW)"
+    title = "Arbitrage Revenue per Year" if options["kind"] == "price" else "Average Daily Peak Reduction"
+    fig = go.Figure()
+    if len(result) == 0:
+        fig.update_layout(title=title, xaxis_title="Detailed Technology")
+        return fig
+
+    for i, (profile, rows) in enumerate(result.groupby("Profile", sort=False)):
+        low = rows[f"{value} - Low"].to_numpy()
+        high = rows[f"{value} - High"].to_numpy()
+        fig.add_trace(go.Bar(
+            x=rows["Detailed Technology"].to_numpy(),
+            y=high - low,
+            base=low,
+            name=str(profile),
+            marker_color=BAR_COLORS[i % len(BAR_COLORS)],
+            customdata=rows[[
+                f"{value} - Low", f"{value} - High", "Cycles per Year - Low", "Cycles per Year - High",
+                "End Capacity (%) - Low", "End Capacity (%) - High"
+            ]].to_numpy(),
+            hovertemplate=(
+                "<b>%{x}</b><br><br>"
+                f"{value}: %{{customdata[0]:,.2f}} - %{{customdata[1]:,.2f}}<br>"
+                "Cycles per year: %{customdata[2]:,.0f} - %{customdata[3]:,.0f}<br>"
+                "End capacity: %{customdata[4]:.1f}% - %{customdata[5]:.1f}%<extra></extra>"
+            )
+        ))
+    fig.update_layout(title=title, xaxis_title="Detailed Technology", yaxis_title=value, barmode="group")
+    return fig
+
+
+def default_fade_options():
+    """
+    Capacity-fade settings used when the caller has not chosen any.
+    """
+    return {**capacity_fade.DEFAULT_SETTINGS, "axis": "cycles"}
+
+
+def create_fade_chart(df, fade_options=None):
+    """
+    Remaining capacity against cycles (or years) per technology: a solid
+    line for the optimistic bound and a dashed one for the pessimistic
+    bound. A downsampled projection may be passed in fade_options["result"].
+    """
+    options = fade_options or default_fade_options()
+    result = options.get("result")
+    if result is None:
+        result = capacity_fade.downsample(capacity_fade.project_fade(df, RANGE_METRICS, options))
+
+    in_years = options["axis"] == "years"
+    x_title = "Years" if in_years else "Cycles"
+    title = "Remaining Capacity over " + x_title
+    fig = go.Figure()
+    if len(result["technologies"]) == 0:
+        fig.update_layout(title=title, xaxis_title=x_title)
+        return fig
+
+    x = result["cycles"] / options["cycles_per_year"] if in_years else result["cycles"]
+    capacity = result["capacity"] * 100
+    for i, tech in enumerate(result["technologies"]):
+        color = BAR_COLORS[i % len(BAR_COLORS)]
+        for bound, dash, label in [(1, "solid", "optimistic"), (0, "dash", "pessimistic")]:
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=capacity[i, bound],
+                mode="lines",
+                name=tech,
+                legendgroup=tech,
+                showlegend=bound == 1,
+                line=dict(color=color, dash=dash, width=2),
+                hovertemplate=f"<b>{tech}</b> ({label})<br>{x_title}: %{{x:,.0f}}<br>Capacity: %{{y:.1f}}%<extra></extra>"
+            ))
+    fig.add_hline(
+        y=options["eol_threshold"] * 100, line_dash="dot", line_color="gray",
+        annotation_text="End-of-life threshold"
+    )
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title="Remaining Capacity (%)", yaxis_range=[0, 102])
+    return fig
+
+
+def set_figure_size(fig):
+    fig.update_layout(
+        height=800,
+        margin=dict(l=50, r=50, t=80, b=50),
+        font=dict(size=12),
+        showlegend=False
+    )
+    return fig
+
+
+def set_figure_size_with_legend(fig):
+    fig.update_layout(
+        height=800,
+        margin=dict(l=50, r=50, t=80, b=50),
+        font=dict(size=12),
+    )
+    return fig
+
+
+def make_figure_builders(filtered_df, active_filter_ranges, hover_data, chart_options=None, compact=True, derived_columns=None):
+    """
+    Lazy figure builders: each entry is a zero-argument function that
+    constructs ONE figure. Only the builder for the selected chart is
+    ever called, so a rerun rebuilds 1 figure instead of all 19.
+    With compact, every figure is passed through
+    figure_encoding.compact_figure to shrink what is sent to the browser.
+    Derived metric charts, and the dashboard's derived subplots, attach
+    their columns when built, from derived_columns(name) (a per-version
+    cache) if given.
+    """
+    chart_options = chart_options or {}
+    builders = {}
+    for title, metric in RANGE_CHARTS.items():
+        low_col, high_col = RANGE_METRICS[metric]
+        builders[title] = (
+            lambda title=title, metric=metric, low_col=low_col, high_col=high_col: set_figure_size(create_range_bar(
+                filtered_df, "Detailed Technology", low_col, high_col, title,
+                clip_range=active_filter_ranges.get(metric), hover_data=hover_data
+            ))
+        )
+    for title, metric in DERIVED_CHARTS.items():
+        low_col, high_col = derived_metrics.DERIVED_RANGE_METRICS[metric]
+        builders[title] = (
+            lambda title=title, metric=metric, low_col=low_col, high_col=high_col: set_figure_size(create_range_bar(
+                derived_metrics.attach(filtered_df, RANGE_METRICS, [metric], derived_columns),
+                "Detailed Technology", low_col, high_col, title,
+                clip_range=active_filter_ranges.get(metric), hover_data=hover_data
+            ))
+        )
+    for title, level_col in LEVEL_CHARTS.items():
+        builders[title] = lambda title=title, level_col=level_col: set_figure_size(
+            create_level_bar(filtered_df, level_col, title, hover_data=hover_data)
+        )
+    for title, category_col in CATEGORY_CHARTS.items():
+        builders[title] = lambda title=title, category_col=category_col: set_figure_size_with_legend(
+            create_category_bar(filtered_df, category_col, title, hover_data=hover_data)
+        )
+    def build_range_dashboard():
+        derived = derived_metrics.available(filtered_df, RANGE_METRICS)
+        return create_range_dashboard(
+            derived_metrics.attach(filtered_df, RANGE_METRICS, list(derived), derived_columns),
+            active_filter_ranges, hover_data=hover_data, range_metrics={**RANGE_METRICS, **derived}
+        )
+    builders[DASHBOARD_CHART] = build_range_dashboard
+    builders["Off-Gassing"] = lambda: create_offgassing_chart(filtered_df)
+    def build_pareto_chart():
+        options = chart_options.get(PARETO_CHART)
+        derived = derived_metrics.available(filtered_df, RANGE_METRICS)
+        chosen = [m for m in options["metrics"] if m in derived] if options else []
+        return set_figure_size_with_legend(create_pareto_chart(
+            derived_metrics.attach(filtered_df, RANGE_METRICS, chosen, derived_columns),
+            options, hover_data=hover_data, range_metrics={**RANGE_METRICS, **derived}
+        ))
+    builders[PARETO_CHART] = build_pareto_chart
+    def build_rectangle_chart():
+        options = chart_options.get(RECTANGLE_CHART) or default_rectangle_options()
+        derived = [m for m in (options["x"], options["y"]) if m in derived_metrics.DERIVED_METRICS]
+        return set_figure_size(create_rectangle_chart(
+            derived_metrics.attach(filtered_df, RANGE_METRICS, derived, derived_columns),
+            options, active_filter_ranges, hover_data=hover_data
+        ))
+    builders[RECTANGLE_CHART] = build_rectangle_chart
+    builders[LCOS_CHART] = lambda: set_figure_size(
+        create_lcos_chart(filtered_df, chart_options.get(LCOS_CHART))
+    )
+    builders[SWEEP_CHART] = lambda: set_figure_size_with_legend(
+        create_sweep_chart(filtered_df, chart_options.get(SWEEP_CHART))
+    )
+    builders[SIZING_CHART] = lambda: set_figure_size(
+        create_sizing_chart(filtered_df, chart_options.get(SIZING_CHART))
+    )
+    builders[DISPATCH_CHART] = lambda: set_figure_size_with_legend(
+        create_dispatch_chart(filtered_df, chart_options.get(DISPATCH_CHART))
+    )
+    builders[FADE_CHART] = lambda: set_figure_size_with_legend(
+        create_fade_chart(filtered_df, chart_options.get(FADE_CHART))
+    )
+    if compact:
+        builders = {name: (lambda build=build: figure_encoding.compact_figure(build())) for name, build in builders.items()}
+    return builders
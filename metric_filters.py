@@ -0,0 +1,361 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import data_catalog
+import derived_metrics
+
+
+SINGLE_VALUE_COLUMNS = ["TRL", "ARL", "MRL"]
+
+# Categorical column -> display name in the filter picker
+CATEGORICAL_FILTERS = {
+    "Geological Req.": "Geological Feature Requirement",
+    "Fire Incidents": "Historical Fire Events",
+    "Environmental Impact": "Environmental Impact",
+    "Off-Gassing ": "Off-Gassing"
+}
+
+# Fixed pill order for categorical filters that have a natural order
+ORDERED_VALUES = {
+    "Geological Feature Requirement": ["No", "Yes"],
+    "Historical Fire Events": ["Low", "Medium", "High"],
+    "Environmental Impact": ["Low", "Medium", "High"],
+}
+
+# Seconds without a filter edit before batched filters apply themselves
+DEBOUNCE_SECONDS = 1.5
+
+# Session state keys of the filter widgets drawn by draw_filter_widgets
+FILTER_STATE_PREFIXES = ("filter_", "slider_", "metric_tech_", "metric_detailed_")
+
+
+def available_filters(df, range_metrics):
+    """
+    Filter names offered in the picker, in display order.
+    """
+    derived = derived_metrics.available(df, range_metrics)
+    names = [
+        m for m, (low_col, high_col) in range_metrics.items()
+        if (low_col in df.columns and high_col in df.columns) or m in derived
+    ]
+    names += [col for col in SINGLE_VALUE_COLUMNS if col in df.columns]
+    names += [name for col, name in CATEGORICAL_FILTERS.items() if col in df.columns]
+    return names
+
+
+def offgassing_values(series):
+    """
+    Yes/No from the free-text Off-Gassing column; None when neither.
+    """
+    text = series.astype("string").str.strip()
+    return pd.Series(
+        np.select([text.str.startswith("Yes").fillna(False), text.str.startswith("No").fillna(False)], ["Yes", "No"], None),
+        index=series.index
+    )
+
+
+def filter_mask(df, spec):
+    """
+    Boolean row mask for one filter spec. Specs are hashable tuples:
+
+    ("range", low_col, high_col, low, high)  interval overlaps [low, high]
+    ("level", col, low, high)                 value inside [low, high]
+    ("isin", col, values)                     value is one of values
+    ("offgassing", col, values)               Yes/No prefix is one of values
+    """
+    kind = spec[0]
+    if kind == "range":
+        _, low_col, high_col, low, high = spec
+        mask = (df[low_col] <= high) & (df[high_col] >= low)
+    elif kind == "level":
+        _, col, low, high = spec
+        mask = (df[col] >= low) & (df[col] <= high)
+    elif kind == "isin":
+        _, col, values = spec
+        mask = df[col].isin(values)
+    elif kind == "offgassing":
+        _, col, values = spec
+        mask = offgassing_values(df[col]).isin(values)
+    else:
+        raise ValueError(f"Unknown filter kind: {kind}")
+    return mask.to_numpy(dtype=bool)
+
+
+def filter_catalog(df, range_metrics):
+    """
+    Statistics catalog for the filter widgets, with the Yes/No values of
+    the Off-Gassing column as a derived column.
+    """
+    derived = {
+        ("offgassing", col): offgassing_values(df[col])
+        for col, name in CATEGORICAL_FILTERS.items() if name == "Off-Gassing" and col in df.columns
+    }
+    return data_catalog.build_catalog(df, range_metrics, derived)
+
+
+def extend_catalog(catalog, extra):
+    """
+    catalog with the column stats and range bounds of other catalogs (such
+    as one built over a derived metric's columns) added.
+    """
+    columns, ranges = dict(catalog["columns"]), dict(catalog["ranges"])
+    for part in extra:
+        columns.update(part["columns"])
+        ranges.update(part["ranges"])
+    return {**catalog, "columns": columns, "ranges": ranges}
+
+
+def estimate_rows(catalog, spec):
+    """
+    Estimated rows one filter spec keeps on its own, from the catalog's
+    histograms and value counts rather than a scan.
+    """
+    kind = spec[0]
+    columns = catalog["columns"]
+    if kind == "range":
+        _, low_col, high_col, low, high = spec
+        return data_catalog.count_overlapping(columns[low_col], columns[high_col], catalog["rows"], low, high)
+    if kind == "level":
+        _, col, low, high = spec
+        return data_catalog.count_between(columns[col], low, high)
+    if kind == "isin":
+        _, col, values = spec
+        return data_catalog.count_values(columns[col], values)
+    if kind == "offgassing":
+        _, col, values = spec
+        return data_catalog.count_values(catalog["derived"][("offgassing", col)], values)
+    raise ValueError(f"Unknown filter kind: {kind}")
+
+
+def combined_mask(n_rows, specs, mask_for):
+    """
+    AND of the masks for every spec; mask_for(spec) supplies (cached) masks.
+    """
+    mask = np.ones(n_rows, dtype=bool)
+    for spec in specs:
+        mask &= mask_for(spec)
+    return mask
+
+
+def preset_specs(df, range_metrics, filters, preset=None):
+    """
+    (specs, active_filter_ranges) for a saved filter preset, the headless
+    counterpart of draw_filter_widgets. filters maps the sidebar names to
+    values: a range metric or TRL/ARL/MRL to [low, high], a categorical
+    filter, "Technology Type" or "Detailed Technology" to a list of values.
+    A malformed filter raises ValueError naming the filter, and the
+    preset when given.
+    """
+    display_to_column = {name: col for col, name in CATEGORICAL_FILTERS.items()}
+    specs = []
+    active_filter_ranges = {}
+    for name, value in filters.items():
+        if name in range_metrics:
+            low_col, high_col = range_metrics[name]
+            low, high = _preset_range(preset, name, value)
+            active_filter_ranges[name] = (low, high)
+            specs.append(("range", low_col, high_col, low, high))
+        elif name in SINGLE_VALUE_COLUMNS:
+            specs.append(("level", name, *_preset_range(preset, name, value)))
+        elif name in display_to_column:
+            kind = "offgassing" if name == "Off-Gassing" else "isin"
+            specs.append((kind, display_to_column[name], tuple(_preset_values(preset, name, value))))
+        elif name in ("Technology Type", "Detailed Technology"):
+            # Presets may spell technologies without the sheet's trailing spaces
+            present = {str(v).strip(): v for v in df[name].dropna().unique()}
+            specs.append(("isin", name, tuple(present.get(str(v).strip(), v) for v in _preset_values(preset, name, value))))
+        else:
+            raise ValueError(f"Unknown filter {name!r}{_in_preset(preset)}")
+    return tuple(specs), active_filter_ranges
+
+
+def _preset_range(preset, name, value):
+    # [low, high] as two floats
+    if (not isinstance(value, (list, tuple)) or len(value) != 2
+            or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)):
+        raise ValueError(f"Filter {name!r}{_in_preset(preset)} must be [low, high] numbers, got {json.dumps(value)}")
+    return float(value[0]), float(value[1])
+
+
+def _preset_values(preset, name, value):
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f"Filter {name!r}{_in_preset(preset)} must be a list of values, got {json.dumps(value)}")
+    return value
+
+
+def _in_preset(preset):
+    return f" in preset {preset!r}" if preset is not None else ""
+
+
+def draw_filter_widgets(df, range_metrics, mask_for, tech_options, catalog, derived_catalog=None):
+    """
+    Draw the metric filter widgets into the current container and return
+    (specs, active_filter_ranges) for the current widget values.
+
+    Slider bounds and pill options are read from the statistics catalog.
+    Categorical pills only offer values still present after the filters
+    above them, as before, looked up from the cached masks and the
+    catalog's value codes. Each filter is captioned with an estimate of
+    the rows left, treating filters as independent. The technology
+    checkboxes and pills come from tech_options (Technology Type ->
+    detailed technologies, from the taxonomy index). Derived metrics are
+    only computed once picked: derived_catalog(name) then supplies their
+    catalog, and mask_for must attach their columns.
+    """
+    filter_columns = st.multiselect("Select data to filter by", options=available_filters(df, range_metrics), key="filter_columns")
+    picked = [c for c in filter_columns if c in derived_metrics.DERIVED_METRICS and c not in catalog["ranges"]]
+    if picked and derived_catalog is not None:
+        catalog = extend_catalog(catalog, [derived_catalog(name) for name in picked])
+    display_to_column = {name: col for col, name in CATEGORICAL_FILTERS.items()}
+    columns = catalog["columns"]
+    rows = catalog["rows"]
+
+    specs = []
+    active_filter_ranges = {}
+    remaining = float(rows)
+    for filter_col in filter_columns:
+        n_specs = len(specs)
+        if filter_col in display_to_column:
+            actual_col = display_to_column[filter_col]
+            if actual_col not in df.columns:
+                continue
+            if filter_col == "Off-Gassing":
+                # Ordered: No -> Yes
+                options = ["No", "Yes"]
+            else:
+                present = data_catalog.present_values(catalog, actual_col, combined_mask(len(df), specs, mask_for))
+                if filter_col in ORDERED_VALUES:
+                    options = [v for v in ORDERED_VALUES[filter_col] if v in present]
+                else:
+                    options = present
+            selected_values = st.pills(
+                f"Filter by {filter_col}",
+                options=options,
+                default=options,
+                selection_mode="multi",
+                key=f"filter_{actual_col}"
+            )
+            kind = "offgassing" if filter_col == "Off-Gassing" else "isin"
+            specs.append((kind, actual_col, tuple(selected_values)))
+
+        elif filter_col in range_metrics:
+            low_col, high_col = range_metrics[filter_col]
+            if filter_col in catalog["ranges"]:
+                overall_min, overall_max = catalog["ranges"][filter_col]
+                selected_range = st.slider(
+                    f"Filter by {filter_col}",
+                    min_value=float(overall_min),
+                    max_value=float(overall_max),
+                    value=(float(overall_min), float(overall_max)),
+                    key=f"slider_{filter_col}"
+                )
+                active_filter_ranges[filter_col] = selected_range
+                specs.append(("range", low_col, high_col, float(selected_range[0]), float(selected_range[1])))
+
+        elif filter_col in SINGLE_VALUE_COLUMNS and filter_col in df.columns:
+            stats = columns[filter_col]
+            if stats["kind"] == "numeric" and stats["min"] is not None:
+                min_val = stats["min"]
+                max_val = stats["max"]
+                selected_range = st.slider(
+                    f"Filter by {filter_col}",
+                    min_value=float(min_val),
+                    max_value=float(max_val),
+                    value=(float(min_val), float(max_val)),
+                    key=f"slider_{filter_col}"
+                )
+                specs.append(("level", filter_col, float(selected_range[0]), float(selected_range[1])))
+
+        if len(specs) > n_specs and rows:
+            remaining *= estimate_rows(catalog, specs[-1]) / rows
+            st.caption(f"≈ {remaining:.0f} of {rows} rows remain")
+
+    # Filter by "Technology Type"
+    selected_technology_types = []
+    if "Technology Type" in df.columns:
+        for tech_type in tech_options:
+            if st.checkbox(tech_type, value=True, key=f"metric_tech_{tech_type}"):
+                selected_technology_types.append(tech_type)
+        specs.append(("isin", "Technology Type", tuple(selected_technology_types)))
+
+    # Filter by "Detailed Technology" using pills organized by category
+    if "Detailed Technology" in df.columns:
+        all_selected_detailed = []
+        for tech_type in selected_technology_types:
+            available_techs = tech_options.get(tech_type, [])
+            if available_techs:
+                st.markdown(f"**{tech_type}**")
+                selected_techs = st.pills(
+                    f"{tech_type}_detailed",
+                    options=available_techs,
+                    default=available_techs,
+                    selection_mode="multi",
+                    label_visibility="collapsed",
+                    key=f"metric_detailed_{tech_type}"
+                )
+                all_selected_detailed.extend(selected_techs)
+        # No detailed technology selected means no rows
+        specs.append(("isin", "Detailed Technology", tuple(all_selected_detailed)))
+
+    return tuple(specs), active_filter_ranges
+
+
+def reset_filter_state():
+    """
+    Forget the filter widget values and held filters, for when the dataset
+    under them changes: keyed widgets would otherwise keep selections the
+    new options no longer contain.
+    """
+    for key in [k for k in st.session_state if isinstance(k, str) and k.startswith(FILTER_STATE_PREFIXES)]:
+        del st.session_state[key]
+    for key in ("applied_filters", "pending_filters", "pending_filters_since"):
+        st.session_state.pop(key, None)
+
+
+def batched_filter_panel(df, range_metrics, mask_for, tech_options, catalog, auto_apply, derived_catalog=None):
+    """
+    Filter widgets whose edits are held back until applied.
+
+    Meant to run as a fragment: each edit reruns only this panel, which
+    shows how many rows the pending filters keep. The pending filters are
+    copied to st.session_state.applied_filters, and the app rerun, when
+    Apply is clicked or, with auto_apply, once edits pause for
+    DEBOUNCE_SECONDS. The auto-apply timer only runs while there are
+    unapplied edits; an idle panel does not rerun.
+    """
+    specs, active_filter_ranges = draw_filter_widgets(df, range_metrics, mask_for, tech_options, catalog, derived_catalog)
+    pending = (specs, tuple(sorted(active_filter_ranges.items())))
+
+    now = time.monotonic()
+    if st.session_state.get("pending_filters") != pending:
+        st.session_state.pending_filters = pending
+        st.session_state.pending_filters_since = now
+    if "applied_filters" not in st.session_state:
+        st.session_state.applied_filters = pending
+
+    matches = int(combined_mask(len(df), specs, mask_for).sum())
+    dirty = st.session_state.applied_filters != pending
+    st.caption(f"Preview: {matches} of {len(df)} technologies match" + (" (not applied yet)" if dirty else ""))
+
+    clicked = st.button("Apply filters", type="primary", disabled=not dirty, key="apply_filters")
+    if dirty and clicked:
+        st.session_state.applied_filters = pending
+        st.rerun()
+    if dirty and auto_apply:
+        # Declared only while dirty: Streamlit stops the timer of a nested
+        # fragment once a rerun no longer declares it, and the full rerun
+        # after applying clears it too
+        st.fragment(_apply_when_settled, run_every=DEBOUNCE_SECONDS)()
+
+
+def _apply_when_settled():
+    pending = st.session_state.get("pending_filters")
+    if pending is None or st.session_state.get("applied_filters") == pending:
+        return
+    if time.monotonic() - st.session_state.pending_filters_since >= DEBOUNCE_SECONDS:
+        st.session_state.applied_filters = pending
+        st.rerun(scope="app")
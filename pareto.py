@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+
+LEVEL_METRICS = ["TRL", "ARL", "MRL"]
+
+# Which way is "better" for each metric ("max" or "min")
+DEFAULT_DIRECTIONS = {
+    "Duration (hr)": "max",
+    "RTE (%)": "max",
+    "Degradation (%/cycle)": "min",
+    "Cycle Life (#)": "max",
+    "Ramp Rate (% rated power/sec)": "max",
+    "Response Time (s)": "min",
+    "Energy Density (acre/MWhe)": "min",
+    "Power Density (acre/MW)": "min",
+    "CAPEX Energy Basis ($/kWhe)": "min",
+    "CAPEX Power Basis ($/kWe)": "min",
+    "OPEX ($/kW-year)": "min",
+    "TRL": "max",
+    "ARL": "max",
+    "MRL": "max",
+}
+
+MODES = ["optimistic", "pessimistic"]
+
+# Candidates compared against the running skyline per NumPy batch
+BATCH_SIZE = 1024
+
+# Skyline points compared per vectorized step
+SKYLINE_BLOCK = 128
+
+
+def pareto_metrics(df, range_metrics):
+    """
+    Metrics available for the frontier in this dataset.
+    """
+    metrics = [m for m, (low, high) in range_metrics.items() if low in df.columns and high in df.columns]
+    return metrics + [m for m in LEVEL_METRICS if m in df.columns]
+
+
+def metric_values(df, range_metrics, metric, direction, mode):
+    """
+    Representative value of one metric per row.
+
+    Range metrics use the best end of the low/high interval in optimistic
+    mode and the worst end in pessimistic mode.
+    """
+    if metric not in range_metrics:
+        return df[metric].to_numpy(dtype=float)
+    low_col, high_col = range_metrics[metric]
+    low = df[low_col].to_numpy(dtype=float)
+    high = df[high_col].to_numpy(dtype=float)
+    best_is_high = (direction == "max") == (mode == "optimistic")
+    return high if best_is_high else low
+
+
+def objective_matrix(df, range_metrics, metrics, directions, mode="optimistic"):
+    """
+    Stack the chosen metrics into an (n, k) array where smaller is better.
+    """
+    columns = []
+    for metric in metrics:
+        direction = directions.get(metric, DEFAULT_DIRECTIONS.get(metric, "min"))
+        values = metric_values(df, range_metrics, metric, direction, mode)
+        columns.append(-values if direction == "max" else values)
+    return np.column_stack(columns) if columns else np.empty((len(df), 0))
+
+
+def _front_2d(points):
+    # Unique points sorted by (x, y): a point is dominated iff some earlier
+    # point has a y no larger than its own.
+    order = np.lexsort((points[:, 1], points[:, 0]))
+    y = points[order, 1]
+    running_min = np.minimum.accumulate(y)
+    dominated = np.empty(len(y), dtype=bool)
+    dominated[0] = False
+    dominated[1:] = running_min[:-1] <= y[1:]
+    mask = np.empty(len(y), dtype=bool)
+    mask[order] = ~dominated
+    return mask
+
+
+def _front_nd(points):
+    # Sort-filter-skyline: order by the sum of per-metric dense ranks, so any
+    # dominator precedes the points it dominates, then filter batches of
+    # candidates against the skyline found so far with vectorized compares.
+    ranks = np.column_stack([np.unique(points[:, j], return_inverse=True)[1] for j in range(points.shape[1])])
+    order = np.argsort(ranks.sum(axis=1), kind="stable")
+    ordered = points[order]
+
+    skyline = np.empty((0, points.shape[1]))
+    keep = np.zeros(len(ordered), dtype=bool)
+    for start in range(0, len(ordered), BATCH_SIZE):
+        batch = ordered[start:start + BATCH_SIZE]
+        # Earlier skyline points have the lowest rank sums and eliminate the
+        # most candidates, so compare block by block and shrink as we go.
+        survivors = np.arange(len(batch))
+        for block_start in range(0, len(skyline), SKYLINE_BLOCK):
+            if not len(survivors):
+                break
+            block = skyline[block_start:block_start + SKYLINE_BLOCK]
+            dominated = (block[:, None, :] <= batch[survivors][None, :, :]).all(axis=2).any(axis=0)
+            survivors = survivors[~dominated]
+        if len(survivors) > 1:
+            cand = batch[survivors]
+            le = (cand[:, None, :] <= cand[None, :, :]).all(axis=2)
+            np.fill_diagonal(le, False)
+            survivors = survivors[~le.any(axis=0)]
+        keep[start + survivors] = True
+        skyline = np.vstack([skyline, batch[survivors]])
+
+    mask = np.empty(len(ordered), dtype=bool)
+    mask[order] = keep
+    return mask
+
+
+def pareto_mask(points):
+    """
+    Boolean mask of non-dominated rows of an (n, k) array (smaller is better).
+
+    Duplicate points are collapsed first, so identical rows share a result.
+    Two objectives use an exact O(n log n) sort-and-sweep; more objectives use
+    a presorted, batched skyline filter that costs O(n log n + n * |front|).
+    Rows containing NaN are never on the frontier.
+    """
+    points = np.asarray(points, dtype=float)
+    mask = np.zeros(len(points), dtype=bool)
+    valid = ~np.isnan(points).any(axis=1)
+    if not valid.any() or points.shape[1] == 0:
+        return mask
+
+    unique, inverse = np.unique(points[valid], axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    if unique.shape[1] == 1:
+        unique_mask = unique[:, 0] == unique[:, 0].min()
+    elif unique.shape[1] == 2:
+        unique_mask = _front_2d(unique)
+    else:
+        unique_mask = _front_nd(unique)
+
+    mask[valid] = unique_mask[inverse]
+    return mask
+
+
+def pareto_front(df, range_metrics, metrics, directions=None, mode="optimistic"):
+    """
+    Boolean Series (aligned with df) marking technologies not dominated on
+    the chosen metrics.
+    """
+    directions = directions or {}
+    points = objective_matrix(df, range_metrics, metrics, directions, mode)
+    return pd.Series(pareto_mask(points), index=df.index, name="Pareto Frontier")
@@ -3,6 +3,92 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+import figure_encoding
+
+
+# Values treated as missing in the project tracking sheet
+NULL_SENTINELS = ['', 'NA', 'N/A', 'nan', 'None']
+
+NUMERIC_COLUMNS = ['Power [MW]', 'Energy  [MWh]', 'Duration [h]']
+
+# Precomputed display strings, keyed by the source column they are derived from
+DETAIL_FIELDS = {
+    '_state': 'State',
+    '_technology_type': 'Technology Type',
+    '_detailed_technology': 'Detailed Technology',
+    '_provider': 'Tech provider ',
+    '_owner': 'Customer/Owner',
+    '_status': 'Status',
+}
+
+DISPLAY_COLUMNS = ['_name', '_meta', '_label', '_power', '_energy', '_duration'] + list(DETAIL_FIELDS)
+
+
+def _format_number(series):
+    """
+    Format a float column for display, dropping a trailing '.0'.
+    """
+    text = series.round(3).astype(str).str.removesuffix('.0')
+    return text.mask(series.isna())
+
+
+def normalize_projects_data(df):
+    """
+    Normalize raw project rows once at load time.
+
+    Text sentinels ('NA', blanks) become real nulls, numeric columns become
+    floats, and the strings used by the project list and detail panel are
+    precomputed as columns so the renderers only look values up.
+    """
+    df = df.copy()
+
+    for col in df.columns:
+        if col in NUMERIC_COLUMNS or pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        values = df[col].where(df[col].isna(), df[col].astype(str).str.strip())
+        df[col] = values.mask(values.isin(NULL_SENTINELS))
+
+    for col in NUMERIC_COLUMNS:
+        if col not in df.columns:
+            df[col] = float('nan')
+        elif not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype('string').str.replace(',', '', regex=False)
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+
+    for display_col, source_col in DETAIL_FIELDS.items():
+        if source_col in df.columns:
+            df[display_col] = df[source_col].fillna('N/A').astype(str)
+        else:
+            df[display_col] = 'N/A'
+
+    name = df['Project name'] if 'Project name' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    df['_name'] = name.fillna('Unnamed Project').astype(str)
+
+    power = _format_number(df['Power [MW]'])
+    energy = _format_number(df['Energy  [MWh]'])
+    duration = _format_number(df['Duration [h]'])
+    df['_power'] = (power + ' MW').fillna('N/A')
+    df['_energy'] = (energy + ' MWh').fillna('N/A')
+    df['_duration'] = (duration + ' h').fillna('N/A')
+
+    # Metadata line: state | technology | power / energy (specs only when known)
+    tech = df['Detailed Technology'] if 'Detailed Technology' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    if 'Technology Type' in df.columns:
+        tech = tech.fillna(df['Technology Type'])
+    separator = pd.Series('', index=df.index).mask(power.notna() & energy.notna(), ' / ')
+    specs = (power + ' MW').fillna('') + separator + (energy + ' MWh').fillna('')
+    df['_meta'] = df['_state'] + ' | ' + tech.fillna('N/A').astype(str) + (' | ' + specs).where(specs != '', '')
+    df['_label'] = df['_name'] + '\n\n' + df['_meta']
+
+    return df
+
+
+def public_columns(df):
+    """
+    Return df without the precomputed display columns (for tables and exports).
+    """
+    return df.drop(columns=[c for c in DISPLAY_COLUMNS if c in df.columns])
+
 
 def prepare_map_data(df):
     """
@@ -21,16 +107,12 @@ def prepare_map_data(df):
         'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY'
     }
 
-    # Clean data
-    df_clean = df[df['State'].notna()].copy()
-    df_clean = df_clean[df_clean['State'] != 'NA']
+    # Sentinel states ('NA', blanks) are already nulls after normalize_projects_data
+    df_clean = df[df['State'].notna()]
 
     # Count projects per state
     state_counts = df_clean.groupby('State').size().reset_index(name='project_count')
 
-    # Cap project counts at 10 for color scaling
-    state_counts['project_count_capped'] = state_counts['project_count'].clip(upper=10)
-
     # Map state abbreviations
     state_counts['state_code'] = state_counts['State'].map(state_abbrev)
     state_counts = state_counts[state_counts['state_code'].notna()]
@@ -49,12 +131,14 @@ def create_choropleth_map(state_counts):
 
     fig = go.Figure(data=go.Choropleth(
         locations=state_counts['state_code'],
-        z=state_counts['project_count_capped'],
+        # Counts past zmax take the top color, so the raw count serves both
+        # the color and the hover
+        z=state_counts['project_count'],
         zmin=1,
         zmax=10,
         locationmode='USA-states',
         colorscale=custom_blue_scale,
-        customdata=state_counts[['State', 'project_count']],
+        text=state_counts['State'],
         colorbar=dict(
             title=dict(
                 text="Number of Projects<br>",
@@ -67,8 +151,8 @@ def create_choropleth_map(state_counts):
             bgcolor='rgba(0,0,0,0.5)'
         ),
         hovertemplate=(
-            '<b>%{customdata[0]}</b><br>'
-            'Projects: %{customdata[1]}<br>'
+            '<b>%{text}</b><br>'
+            'Projects: %{z}<br>'
             '<i>Click to view projects</i><extra></extra>'
         ),
         marker_line_color='white',
@@ -105,72 +189,88 @@ def create_choropleth_map(state_counts):
     return fig
 
 
-def display_project_detail(project_row):
+def display_project_detail(project_row, metric_ranges=None):
     """
     Display detailed information for a selected project in the side panel.
+    Expects a row produced by normalize_projects_data; metric_ranges is the
+    (Metric, Range) table of its technology, when the metrics data has one.
     """
     st.markdown("### Project Details")
     
     # Project Name
-    project_name = project_row.get('Project name', 'Unnamed Project')
-    if pd.isna(project_name) or str(project_name).strip() == '':
-        project_name = "Unnamed Project"
-    st.markdown(f"**{project_name}**")
+    st.markdown(f"**{project_row['_name']}**")
     
     st.divider()
     
     # Location
     st.markdown("**Location**")
-    state = project_row.get('State', 'N/A')
-    st.write(f"State: {state if not pd.isna(state) else 'N/A'}")
+    st.write(f"State: {project_row['_state']}")
     
     st.divider()
     
     # Technology
     st.markdown("**Technology**")
-    tech_type = project_row.get('Technology Type', 'N/A')
-    detailed_tech = project_row.get('Detailed Technology', 'N/A')
-    st.write(f"Type: {tech_type if not pd.isna(tech_type) else 'N/A'}")
-    st.write(f"Details: {detailed_tech if not pd.isna(detailed_tech) else 'N/A'}")
+    st.write(f"Type: {project_row['_technology_type']}")
+    st.write(f"Details: {project_row['_detailed_technology']}")
+    if metric_ranges is not None and len(metric_ranges):
+        with st.expander("Technology metric ranges"):
+            st.dataframe(metric_ranges, hide_index=True, width="stretch")
     
     st.divider()
     
     # Specifications
     st.markdown("**Specifications**")
-    power = project_row.get('Power [MW]', None)
-    energy = project_row.get('Energy  [MWh]', None)
-    duration = project_row.get('Duration [h]', None)
-    
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Power", f"{power} MW" if not pd.isna(power) and power != '' else "N/A")
-        st.metric("Duration", f"{duration} h" if not pd.isna(duration) and duration != '' else "N/A")
+        st.metric("Power", project_row['_power'])
+        st.metric("Duration", project_row['_duration'])
     with col2:
-        st.metric("Energy", f"{energy} MWh" if not pd.isna(energy) and energy != '' else "N/A")
+        st.metric("Energy", project_row['_energy'])
     
     st.divider()
     
     # Ownership & Status
     st.markdown("**Ownership & Status**")
-    tech_provider = project_row.get('Tech provider ', 'N/A')
-    customer = project_row.get('Customer/Owner', 'N/A')
-    status = project_row.get('Status', 'N/A')
+    st.write(f"Provider: {project_row['_provider']}")
+    st.write(f"Owner: {project_row['_owner']}")
+    st.write(f"Status: {project_row['_status']}")
     
-    st.write(f"Provider: {tech_provider if not pd.isna(tech_provider) and str(tech_provider).strip() != '' else 'N/A'}")
-    st.write(f"Owner: {customer if not pd.isna(customer) and str(customer).strip() != '' and str(customer) != 'NA' else 'N/A'}")
-    st.write(f"Status: {status if not pd.isna(status) else 'N/A'}")
-    
-    # Website link
-    website = project_row.get('Website', '')
-    if not pd.isna(website) and str(website).strip() != '':
+    # Website link (already null when blank)
+    website = project_row.get('Website')
+    if pd.notna(website):
         st.divider()
         st.markdown(f"[Visit Website]({website})")
 
 
-def display_project_list(df_clean, selected_state=None):
+def _select_project(idx):
+    st.session_state.selected_project_idx = idx
+
+
+def _set_show_all(show_all):
+    st.session_state.show_all_projects = show_all
+
+
+def _select_state(state):
+    st.session_state.selected_state = state
+    st.session_state.selected_project_idx = None
+    st.session_state.show_all_projects = False
+    if state is None:
+        # Reopen the manual picker empty rather than on the cleared state
+        st.session_state.manual_state_select = None
+
+
+def _select_manual_state():
+    if st.session_state.manual_state_select:
+        _select_state(st.session_state.manual_state_select)
+
+
+@st.fragment
+def display_project_list(df_clean, selected_state=None, technology_ranges=None):
     """
     Display interactive project list with side panel detail view.
     Shows first 10 projects by default with expand option.
+    Runs as a fragment: selecting a project reruns only this panel.
+    technology_ranges maps Detailed Technology to its metric range table.
     """
     # Initialize selected project in session state
     if 'selected_project_idx' not in st.session_state:
@@ -182,9 +282,9 @@ def display_project_list(df_clean, selected_state=None):
     
     # Filter by state if provided
     if selected_state:
-        display_df = df_clean[df_clean['State'] == selected_state].copy()
+        display_df = df_clean[df_clean['State'] == selected_state]
     else:
-        display_df = df_clean.copy()
+        display_df = df_clean
     
     if len(display_df) == 0:
         st.info("No projects found matching the current filters.")
@@ -209,66 +309,40 @@ def display_project_list(df_clean, selected_state=None):
     with list_col:
         st.markdown("### Projects")
         
-        # Display project list items
-        for idx in range(projects_to_show):
-            row = display_df.iloc[idx]
-            
-            project_name = row.get('Project name', 'Unnamed Project')
-            if pd.isna(project_name) or str(project_name).strip() == '':
-                project_name = "Unnamed Project"
-            
-            state = row.get('State', 'N/A')
-            tech_type = row.get('Detailed Technology', row.get('Technology Type', 'N/A'))
-            power = row.get('Power [MW]', '')
-            energy = row.get('Energy  [MWh]', '')
-            
-            # Build metadata line
-            meta_parts = []
-            meta_parts.append(str(state) if not pd.isna(state) else 'N/A')
-            meta_parts.append(str(tech_type) if not pd.isna(tech_type) else 'N/A')
-            
-            specs = []
-            if not pd.isna(power) and power != '':
-                specs.append(f"{power} MW")
-            if not pd.isna(energy) and energy != '':
-                specs.append(f"{energy} MWh")
-            if specs:
-                meta_parts.append(" / ".join(specs))
-            
-            meta_line = " | ".join(meta_parts)
-            
+        # Display project list items (labels are precomputed at load)
+        labels = display_df['_label'].iloc[:projects_to_show].tolist()
+        for idx, label in enumerate(labels):
             # Create clickable button for each project
-            if st.button(
-                f"{project_name}\n\n{meta_line}",
+            st.button(
+                label,
                 key=f"project_{idx}_{selected_state}",
-                use_container_width=True,
-                type="primary" if st.session_state.selected_project_idx == idx else "secondary"
-            ):
-                st.session_state.selected_project_idx = idx
-                st.rerun()
+                width="stretch",
+                type="primary" if st.session_state.selected_project_idx == idx else "secondary",
+                on_click=_select_project,
+                args=(idx,)
+            )
         
         # Show expand/collapse button if more than 10 projects
         if total_projects > 10:
             if st.session_state.show_all_projects:
-                if st.button("Show Less", use_container_width=True):
-                    st.session_state.show_all_projects = False
-                    st.rerun()
+                st.button("Show Less", width="stretch", on_click=_set_show_all, args=(False,))
             else:
-                if st.button(f"Show All {total_projects} Projects", use_container_width=True):
-                    st.session_state.show_all_projects = True
-                    st.rerun()
+                st.button(f"Show All {total_projects} Projects", width="stretch", on_click=_set_show_all, args=(True,))
     
     with detail_col:
         if st.session_state.selected_project_idx is not None and st.session_state.selected_project_idx < len(display_df):
             selected_row = display_df.iloc[st.session_state.selected_project_idx]
-            display_project_detail(selected_row)
+            display_project_detail(selected_row, (technology_ranges or {}).get(selected_row.get('Detailed Technology')))
         else:
             st.info("Select a project from the list to view details")
 
 
-def render_project_map(projects_df):
+@st.fragment
+def render_project_map(projects_df, technology_ranges=None):
     """
     Render interactive project map with click selection.
+    Runs as a fragment: map clicks and state selection rerun only the map
+    and the project list below it, not the filters and table.
     """
     st.header("LDES Project Map")
 
@@ -277,14 +351,14 @@ def render_project_map(projects_df):
     if 'selected_state' not in st.session_state:
         st.session_state.selected_state = None
 
-    fig = create_choropleth_map(state_counts)
+    fig = figure_encoding.compact_figure(create_choropleth_map(state_counts))
 
     # Use selected_state as part of the key to force re-render when selection changes
     map_key = f"state_map_{st.session_state.selected_state}"
 
     selected_points = st.plotly_chart(
         fig,
-        use_container_width=True,
+        width="stretch",
         key=map_key,
         on_select="rerun",
         selection_mode="points",
@@ -295,17 +369,14 @@ def render_project_map(projects_df):
     if selected_points and hasattr(selected_points, 'selection'):
         if selected_points.selection and 'points' in selected_points.selection and len(selected_points.selection['points']) > 0:
             clicked_point = selected_points.selection['points'][0]
-            if 'customdata' in clicked_point:
-                new_state = clicked_point['customdata'][0]
+            state_names = dict(zip(state_counts['state_code'], state_counts['State']))
+            if clicked_point.get('location') in state_names:
+                new_state = state_names[clicked_point['location']]
                 # If clicking the same state, deselect it
                 if st.session_state.selected_state == new_state:
-                    st.session_state.selected_state = None
-                    st.session_state.selected_project_idx = None
-                    st.session_state.show_all_projects = False
+                    _select_state(None)
                 else:
-                    st.session_state.selected_state = new_state
-                    st.session_state.selected_project_idx = None
-                    st.session_state.show_all_projects = False
+                    _select_state(new_state)
 
     if st.session_state.selected_state:
         st.subheader(f"Projects in {st.session_state.selected_state}")
@@ -314,28 +385,19 @@ def render_project_map(projects_df):
         with col1:
             st.info(f"Currently viewing: **{st.session_state.selected_state}**")
         with col2:
-            if st.button("Clear Selection", key="clear_btn"):
-                st.session_state.selected_state = None
-                st.session_state.selected_project_idx = None
-                st.session_state.show_all_projects = False
-                st.rerun()
+            st.button("Clear Selection", key="clear_btn", on_click=_select_state, args=(None,))
 
-        display_project_list(df_clean, st.session_state.selected_state)
+        display_project_list(df_clean, st.session_state.selected_state, technology_ranges)
 
     else:
         st.info("Click on a state in the map above to view projects by state")
 
         with st.expander("Select a state manually"):
-            selected_state = st.selectbox(
+            st.selectbox(
                 "Select a state:",
                 options=sorted(state_counts['State'].unique()),
                 index=None,
                 placeholder="Choose a state...",
-                key="manual_state_select"
-            )
-
-            if selected_state:
-                st.session_state.selected_state = selected_state
-                st.session_state.selected_project_idx = None
-                st.session_state.show_all_projects = False
-                st.rerun()
\ No newline at end of file
+                key="manual_state_select",
+                on_change=_select_manual_state
+            )
\ No newline at end of file
@@ -0,0 +1,309 @@
+"""
+Local HTTP JSON service over the screened metrics and project data.
+
+    python query_service.py --port 8600
+
+Endpoints (all GET):
+
+    /health                       dataset versions
+    /metrics?filters={...}        filtered metric rows; filters as in
+                                  metric_filters.preset_specs (derived
+                                  metrics included), columns=a,b to pick
+                                  columns, derived columns included
+    /projects/states              project counts per state
+    /projects                     project list; ?state=&technology_type=
+                                  &technology= filter both project endpoints
+    /projects/<id>                one project with its technology's metric
+                                  ranges
+
+Responses carry an ETag built from the dataset versions and the query, so
+a client sending it back in If-None-Match gets a 304 without the service
+filtering or serializing anything. Datasets are reloaded when the CSVs
+change, with the same fingerprint the app uses for its caches.
+"""
+import argparse
+import functools
+import hashlib
+import json
+import re
+import threading
+import traceback
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import data_files
+import derived_metrics
+import metric_charts
+import metric_filters
+import project_map
+import taxonomy
+
+
+# Filter masks kept per dataset version, as the app's filter_mask cache
+MASK_CACHE_SIZE = 512
+
+PROJECT_PATH = re.compile(r"^/projects/(\d+)$")
+
+
+def records(df):
+    """
+    DataFrame rows as JSON-ready dicts, with nulls as None.
+    """
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+class Datasets:
+    """
+    The metrics and projects data with their lookups, reloaded when either
+    file changes. Each load gets its own filter mask cache.
+    """
+
+    def __init__(self, metrics_path=data_files.METRICS_PATH, projects_path=data_files.PROJECTS_PATH):
+        self.metrics_path = metrics_path
+        self.projects_path = projects_path
+        self._lock = threading.Lock()
+        self._loaded = None
+
+    def current(self):
+        """
+        (versions, data) for the files as they are now.
+        """
+        versions = (data_files.data_version(self.metrics_path), data_files.data_version(self.projects_path))
+        with self._lock:
+            if self._loaded is None or self._loaded[0] != versions:
+                self._loaded = (versions, self._load())
+            return self._loaded
+
+    def _load(self):
+        metrics = data_files.read_metrics(self.metrics_path)
+        projects = data_files.read_projects(self.projects_path)
+
+        # Derived metric columns, computed the first time a query needs them
+        @functools.lru_cache(maxsize=None)
+        def derived(name):
+            return derived_metrics.compute(metrics, metric_charts.RANGE_METRICS, name)
+
+        @functools.lru_cache(maxsize=MASK_CACHE_SIZE)
+        def mask_for(spec):
+            return metric_filters.filter_mask(derived_metrics.frame_for_spec(metrics, spec, metric_charts.RANGE_METRICS, derived), spec)
+
+        return {
+            "metrics": metrics,
+            "range_metrics": derived_metrics.with_derived(metrics, metric_charts.RANGE_METRICS),
+            "derived": derived,
+            "projects": projects,
+            "index": taxonomy.build_index(metrics, projects, metric_charts.RANGE_METRICS),
+            "mask_for": mask_for,
+        }
+
+
+def query_fingerprint(path, params):
+    """
+    Canonical form of a request: the path plus its parameters with keys
+    and repeated values sorted, and filters JSON re-serialized, so
+    equivalent queries share an ETag.
+    """
+    canonical = {}
+    for key, values in params.items():
+        if key == "filters":
+            values = [json.dumps(parse_filters(v), sort_keys=True, separators=(",", ":")) for v in values]
+        canonical[key] = sorted(values)
+    return json.dumps([path, sorted(canonical.items())], separators=(",", ":"))
+
+
+def make_etag(versions, path, params):
+    digest = hashlib.sha256("|".join([*versions, query_fingerprint(path, params)]).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _matches(etag, header):
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def parse_filters(value):
+    """
+    The filters parameter as a dict; ValueError with a message fit for the
+    client when it is not a JSON object.
+    """
+    try:
+        filters = json.loads(value)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"filters is not valid JSON: {e.msg} at position {e.pos}") from None
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be a JSON object")
+    return filters
+
+
+def filtered_metrics(data, params):
+    filters = parse_filters(params["filters"][0]) if "filters" in params else {}
+    metrics = data["metrics"]
+    specs, _ = metric_filters.preset_specs(metrics, data["range_metrics"], filters)
+    filtered = metrics[metric_filters.combined_mask(len(metrics), specs, data["mask_for"])]
+    if "columns" in params:
+        columns = [c for value in params["columns"] for c in value.split(",") if c]
+        derived = [derived_metrics.DERIVED_COLUMNS[c] for c in columns if c in derived_metrics.DERIVED_COLUMNS]
+        unknown = [c for c in columns if c not in metrics.columns and c not in derived_metrics.DERIVED_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        filtered = derived_metrics.attach(filtered, metric_charts.RANGE_METRICS, derived, data["derived"])[columns]
+    return {"total": len(metrics), "count": len(filtered), "rows": records(filtered)}
+
+
+def filtered_projects(data, params):
+    """
+    Projects matching the state, technology_type and technology parameters
+    (each repeatable; technologies match by taxonomy id, so spellings from
+    either dataset work).
+    """
+    projects = data["projects"]
+    mask = np.ones(len(projects), dtype=bool)
+    if "state" in params:
+        mask &= projects["State"].isin(params["state"]).to_numpy()
+    if "technology_type" in params:
+        mask &= projects["Technology Type"].isin(params["technology_type"]).to_numpy()
+    if "technology" in params:
+        wanted = set(taxonomy.resolve(params["technology"]).dropna())
+        names = set(params["technology"])
+        ids = data["index"]["project_ids"]
+        mask &= (ids.isin(wanted).fillna(False) | projects["Detailed Technology"].isin(names)).to_numpy()
+    return projects[mask]
+
+
+def state_counts(data, params):
+    counts, _ = project_map.prepare_map_data(filtered_projects(data, params))
+    return {"states": records(counts[["State", "state_code", "project_count"]])}
+
+
+def project_list(data, params):
+    projects = filtered_projects(data, params)
+    listing = pd.DataFrame({
+        "id": projects.index,
+        "name": projects["_name"].to_numpy(),
+        "state": projects["State"].to_numpy(),
+        "technology_type": projects["Technology Type"].to_numpy(),
+        "technology": projects["Detailed Technology"].to_numpy(),
+    })
+    return {"count": len(listing), "projects": records(listing)}
+
+
+def project_detail(data, project_id):
+    projects = data["projects"]
+    if project_id not in projects.index:
+        return None
+    row = projects.loc[[project_id]]
+    detail = records(project_map.public_columns(row))[0]
+    ranges = data["index"]["project_ranges"].get(row["Detailed Technology"].iloc[0])
+    return {
+        "id": int(project_id),
+        "project": detail,
+        "metric_ranges": records(ranges) if ranges is not None else [],
+    }
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    datasets = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        try:
+            params = parse_qs(url.query)
+            versions, data = self.datasets.current()
+            etag = make_etag(versions, path, params)
+        except ValueError as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+        if _matches(etag, self.headers.get("If-None-Match")):
+            self._send(HTTPStatus.NOT_MODIFIED, b"", etag)
+            return
+
+        try:
+            payload = self._route(path, params, data)
+        except ValueError as e:
+            # Request validation (parse_filters, preset_specs, columns)
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+        except Exception:
+            self.log_error("Error serving %s\n%s", self.path, traceback.format_exc())
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal error"})
+            return
+        if payload is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Not found: {path}"})
+            return
+        payload = {"metrics_version": versions[0], "projects_version": versions[1], **payload}
+        self._send_json(HTTPStatus.OK, payload, etag)
+
+    def _route(self, path, params, data):
+        if path == "/health":
+            return {"status": "ok"}
+        if path == "/metrics":
+            return filtered_metrics(data, params)
+        if path == "/projects/states":
+            return state_counts(data, params)
+        if path == "/projects":
+            return project_list(data, params)
+        match = PROJECT_PATH.match(path)
+        if match:
+            return project_detail(data, int(match.group(1)))
+        return None
+
+    def _send_json(self, status, payload, etag=None):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self._send(status, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host="127.0.0.1", port=8600, metrics_path=data_files.METRICS_PATH, projects_path=data_files.PROJECTS_PATH, quiet=False):
+    """
+    A threaded server bound to host:port (port 0 picks a free one); call
+    serve_forever() on it.
+    """
+    handler = type("Handler", (QueryHandler,), {"datasets": Datasets(metrics_path, projects_path)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the screened metrics and project data as JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8600, help="port (default: 8600)")
+    parser.add_argument("--metrics", default=data_files.METRICS_PATH, help="metrics CSV")
+    parser.add_argument("--projects", default=data_files.PROJECTS_PATH, help="project tracking CSV")
+    parser.add_argument("--quiet", action="store_true", help="do not log each request")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.metrics, args.projects, args.quiet)
+    print(f"Serving on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Launch the app with its caches warmed before it takes traffic.
+
+    streamlit run serve.py
+
+Serves LDES_tool_v2.py as usual. On startup, each page in WARMUP_PAGES is
+rendered once in a headless session, so the CSV loads, lookup indexes,
+filter catalogs, default figures and the unfiltered project map are all
+cached before the first visitor arrives. Load balancers and health checks
+poll /ready: 503 while warming (or if a page failed), 200 once every page
+has rendered, with per-page timings in the JSON body either way.
+/_stcore/health stays the plain liveness check.
+"""
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import streamlit as st
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from streamlit import runtime
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+
+
+APP_SCRIPT = "LDES_tool_v2.py"
+
+# Pages rendered at startup, as their ?p= values: the Metric page fills the
+# metrics caches and builds the default chart, the Project page the map
+WARMUP_PAGES = ["metric", "tracking"]
+
+# Seconds one page may take to render before warmup gives up on it
+PAGE_TIMEOUT_SECONDS = 300
+
+
+class Readiness:
+    """
+    Warmup progress, shared by the warmup task and the /ready probe.
+    """
+
+    def __init__(self, pages):
+        self._lock = threading.Lock()
+        self._pages = {page: {"status": "pending"} for page in pages}
+        self._started = None
+        self._finished = None
+
+    def start(self):
+        with self._lock:
+            self._started = time.monotonic()
+
+    def page_done(self, page, seconds, errors):
+        with self._lock:
+            self._pages[page] = {"status": "failed" if errors else "ready", "seconds": round(seconds, 2), "errors": errors}
+
+    def finish(self):
+        with self._lock:
+            self._finished = time.monotonic()
+
+    def snapshot(self):
+        """
+        JSON-ready state: ready only once every page rendered without errors.
+        """
+        with self._lock:
+            pages = {page: dict(state) for page, state in self._pages.items()}
+            ready = self._finished is not None and all(state["status"] == "ready" for state in pages.values())
+            if ready:
+                status = "ready"
+            elif self._finished is not None:
+                status = "failed"
+            else:
+                status = "warming" if self._started is not None else "starting"
+            elapsed = None
+            if self._started is not None:
+                elapsed = round((self._finished or time.monotonic()) - self._started, 2)
+        return {"ready": ready, "status": status, "seconds": elapsed, "pages": pages}
+
+
+class WarmupClient:
+    """
+    Session client for a headless page render: discards the page and
+    records how the script run ended.
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self.finished = asyncio.Event()
+        self.errors = []
+
+    def write_forward_msg(self, msg):
+        # Uncaught exceptions, and the pages' own "could not be loaded" errors
+        element = msg.delta.new_element if msg.HasField("delta") and msg.delta.HasField("new_element") else None
+        if element is not None and element.HasField("exception"):
+            self.errors.append(element.exception.message)
+        elif element is not None and element.HasField("alert") and element.alert.format == Alert.ERROR:
+            self.errors.append(element.alert.body)
+        if msg.HasField("script_finished"):
+            self._loop.call_soon_threadsafe(self.finished.set)
+
+
+async def render_page(app_runtime, page, timeout=PAGE_TIMEOUT_SECONDS):
+    """
+    Run the app script once for ?p=page in a throwaway session; returns
+    the errors it showed.
+    """
+    client = WarmupClient(asyncio.get_running_loop())
+    session_id = app_runtime.connect_session(client, user_info={})
+    try:
+        msg = BackMsg()
+        msg.rerun_script.query_string = f"p={page}"
+        app_runtime.handle_backmsg(session_id, msg)
+        await asyncio.wait_for(client.finished.wait(), timeout)
+        return client.errors
+    except asyncio.TimeoutError:
+        return client.errors + [f"Not rendered within {timeout} s"]
+    finally:
+        app_runtime.close_session(session_id)
+
+
+async def warm(app_runtime, readiness, pages=WARMUP_PAGES):
+    """
+    Render every warmup page in turn, recording each in readiness.
+    """
+    readiness.start()
+    for page in pages:
+        start = time.perf_counter()
+        try:
+            errors = await render_page(app_runtime, page)
+        except Exception as e:
+            errors = [f"{type(e).__name__}: {e}"]
+        readiness.page_done(page, time.perf_counter() - start, errors)
+    readiness.finish()
+
+
+readiness = Readiness(WARMUP_PAGES)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    task = asyncio.create_task(warm(runtime.get_instance(), readiness))
+    try:
+        yield
+    finally:
+        task.cancel()
+
+
+async def ready(request):
+    snapshot = readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503, headers={"Cache-Control": "no-store"})
+
+
+app = st.App(APP_SCRIPT, lifespan=lifespan, routes=[Route("/ready", ready)])
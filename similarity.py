@@ -0,0 +1,193 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+
+LEVEL_COLUMNS = ["TRL", "ARL", "MRL"]
+
+# Range metrics whose values span more than this ratio are compared on a
+# log scale, so 1 s vs 10 s weighs like 10 min vs 100 min
+LOG_SPAN = 100
+
+# Points per KD-tree leaf; leaves are scanned with one vectorized step
+LEAF_SIZE = 64
+
+
+def _scaled(values):
+    # Map to [0, 1] over the column's observed bounds; missing values sit
+    # at the median so they neither attract nor repel
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return np.zeros_like(values)
+    values = np.where(np.isfinite(values), values, np.median(finite))
+    low, high = finite.min(), finite.max()
+    return (values - low) / (high - low) if high > low else np.zeros_like(values)
+
+
+def range_feature(df, low_col, high_col):
+    """
+    One value per row for a range metric: the midpoint of the low/high
+    interval, geometric when the metric spans orders of magnitude.
+    """
+    low = pd.to_numeric(df[low_col], errors="coerce").to_numpy(dtype=float)
+    high = pd.to_numeric(df[high_col], errors="coerce").to_numpy(dtype=float)
+    low, high = np.where(np.isnan(low), high, low), np.where(np.isnan(high), low, high)
+    ends = np.concatenate([low, high])
+    ends = ends[np.isfinite(ends)]
+    if len(ends) and ends.min() > 0 and ends.max() / ends.min() > LOG_SPAN:
+        return (np.log10(low) + np.log10(high)) / 2
+    return (low + high) / 2
+
+
+def feature_matrix(df, range_metrics, category_columns):
+    """
+    Normalized feature vectors, one row per technology.
+
+    Range metrics and readiness levels become one [0, 1] column each.
+    Categorical attributes are one-hot encoded and scaled so a mismatch
+    adds 1 to the squared distance, as much as the full span of a numeric
+    metric. Returns (matrix, groups), groups naming the metric behind each
+    column so distances can be broken down per metric.
+    """
+    columns = []
+    groups = []
+    for metric, (low_col, high_col) in range_metrics.items():
+        if low_col in df.columns and high_col in df.columns:
+            columns.append(_scaled(range_feature(df, low_col, high_col)))
+            groups.append(metric)
+    for col in LEVEL_COLUMNS:
+        if col in df.columns:
+            columns.append(_scaled(pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)))
+            groups.append(col)
+    for col in category_columns:
+        if col not in df.columns:
+            continue
+        codes, values = pd.factorize(df[col].astype("string").str.strip(), sort=True)
+        for i in range(len(values)):
+            columns.append((codes == i) / np.sqrt(2))
+            groups.append(col.strip())
+    matrix = np.column_stack(columns) if columns else np.empty((len(df), 0))
+    return np.ascontiguousarray(matrix, dtype=np.float32), groups
+
+
+class KDTree:
+    """
+    Static KD-tree over the rows of a float matrix.
+
+    Nodes split at the median of their widest dimension and keep their
+    bounding box; queries visit nodes nearest-box-first and stop once no
+    box can hold a closer point, so they only touch a few leaves of a
+    large catalog.
+    """
+
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        self.points = points
+        self.order = np.arange(len(points))
+        self.lower = []
+        self.upper = []
+        self.span = []
+        self.children = []
+
+        stack = [(0, len(points), None, 0)]
+        while stack:
+            start, end, parent, side = stack.pop()
+            node = len(self.span)
+            block = points[self.order[start:end]]
+            self.lower.append(block.min(axis=0) if end > start else np.zeros(points.shape[1], dtype=points.dtype))
+            self.upper.append(block.max(axis=0) if end > start else np.zeros(points.shape[1], dtype=points.dtype))
+            self.span.append((start, end))
+            self.children.append(None)
+            if parent is not None:
+                self.children[parent][side] = node
+            if end - start <= leaf_size or points.shape[1] == 0:
+                continue
+            dim = int(np.argmax(self.upper[node] - self.lower[node]))
+            if self.upper[node][dim] == self.lower[node][dim]:
+                continue
+            middle = (start + end) // 2
+            part = np.argpartition(block[:, dim], middle - start)
+            self.order[start:end] = self.order[start:end][part]
+            self.children[node] = [None, None]
+            stack.append((middle, end, node, 1))
+            stack.append((start, middle, node, 0))
+
+        self.lower = np.array(self.lower)
+        self.upper = np.array(self.upper)
+
+    def _box_distance(self, node, query):
+        gap = np.maximum(self.lower[node] - query, 0) + np.maximum(query - self.upper[node], 0)
+        return float(gap @ gap)
+
+    def query(self, query, k, allowed=None):
+        """
+        Row numbers and squared distances of the k points nearest to
+        query, nearest first. With allowed (a boolean mask over rows),
+        only those rows are candidates.
+        """
+        query = np.asarray(query, dtype=self.points.dtype)
+        best = []  # max-heap of (-distance, row)
+        frontier = [(0.0, 0)]
+        while frontier:
+            bound, node = heapq.heappop(frontier)
+            if len(best) == k and bound >= -best[0][0]:
+                break
+            if self.children[node] is not None:
+                for child in self.children[node]:
+                    heapq.heappush(frontier, (self._box_distance(child, query), child))
+                continue
+            start, end = self.span[node]
+            rows = self.order[start:end]
+            if allowed is not None:
+                rows = rows[allowed[rows]]
+            if len(rows) == 0:
+                continue
+            diff = self.points[rows] - query
+            distances = np.einsum("ij,ij->i", diff, diff)
+            for row, distance in zip(rows.tolist(), distances.tolist()):
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, row))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, row))
+        best.sort(key=lambda item: (-item[0], item[1]))
+        return np.array([row for _, row in best], dtype=int), np.array([-d for d, _ in best])
+
+
+def build_index(df, range_metrics, category_columns):
+    """
+    Feature vectors and their KD-tree, built once per dataset version.
+    """
+    matrix, groups = feature_matrix(df, range_metrics, category_columns)
+    codes, metrics = pd.factorize(pd.Series(groups, dtype=object))
+    return {
+        "matrix": matrix,
+        "metrics": list(metrics),
+        # Feature column -> metric, summing squared differences per metric
+        "metric_sums": np.eye(len(metrics))[codes],
+        "tree": KDTree(matrix),
+        "names": df["Detailed Technology"].to_numpy(),
+    }
+
+
+def similar_technologies(index, row, k=5, allowed=None):
+    """
+    The k technologies nearest to the one at position row, excluding itself.
+
+    Returns a DataFrame with each neighbor's row position, name, distance
+    and the share of its squared distance contributed by every metric
+    (shares sum to 100%).
+    """
+    matrix = index["matrix"]
+    candidates = np.ones(len(matrix), dtype=bool) if allowed is None else np.array(allowed, dtype=bool)
+    candidates[row] = False
+    rows, distances = index["tree"].query(matrix[row], k, candidates)
+
+    contributions = ((matrix[rows] - matrix[row]).astype(float) ** 2) @ index["metric_sums"]
+    total = contributions.sum(axis=1, keepdims=True)
+    shares = np.divide(contributions * 100, total, out=np.zeros_like(contributions), where=total > 0)
+    return pd.DataFrame({
+        "Row": rows,
+        "Technology": index["names"][rows],
+        "Distance": np.sqrt(distances),
+        **{f"{metric} (%)": shares[:, i] for i, metric in enumerate(index["metrics"])},
+    })
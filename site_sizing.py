@@ -0,0 +1,317 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+
+SEPARATE_COLUMN = "Separate Power & Energy "
+
+DEFAULT_REQUIREMENT = {
+    "power_mw": 200.0,
+    "energy_mwh": 2000.0,
+    "land_acres": 40.0,
+}
+
+# (combination x split x member) elements evaluated per vectorized batch
+BATCH_ELEMENTS = 2_000_000
+
+
+def separate_flags(df):
+    """
+    Whether each technology keeps its power and energy blocks separate
+    (a "Yes..." answer in SEPARATE_COLUMN).
+    """
+    if SEPARATE_COLUMN not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return df[SEPARATE_COLUMN].fillna("").astype(str).str.strip().str.startswith("Yes").to_numpy()
+
+
+def technology_arrays(df, range_metrics, capex_basis="energy"):
+    """
+    Per-technology low/high arrays used by the sizing engine.
+    Cost is $/kWhe on the energy basis and $/kWe on the power basis.
+    """
+    def bounds(metric):
+        low_col, high_col = range_metrics[metric]
+        return df[low_col].to_numpy(dtype=float), df[high_col].to_numpy(dtype=float)
+
+    capex_metric = "CAPEX Energy Basis ($/kWhe)" if capex_basis == "energy" else "CAPEX Power Basis ($/kWe)"
+    return {
+        "technologies": df["Detailed Technology"].to_numpy(),
+        "power_density": bounds("Power Density (acre/MW)"),
+        "energy_density": bounds("Energy Density (acre/MWhe)"),
+        "duration": bounds("Duration (hr)"),
+        "capex": bounds(capex_metric),
+        "separate": separate_flags(df),
+        "capex_basis": capex_basis,
+    }
+
+
+def land_required(power_mw, energy_mwh, power_density, energy_density, separate):
+    """
+    Acres needed for a power/energy allocation (all arguments broadcast).
+
+    Separate power and energy blocks need both footprints; integrated
+    systems report the same footprint per MW and per MWh, so the larger
+    of the two governs.
+    """
+    power_land = power_mw * power_density
+    energy_land = energy_mwh * energy_density
+    return np.where(separate, power_land + energy_land, np.maximum(power_land, energy_land))
+
+
+def capital_cost(power_mw, energy_mwh, capex, capex_basis):
+    """
+    Installed cost in $M for a power/energy allocation.
+    """
+    basis = energy_mwh if capex_basis == "energy" else power_mw
+    return basis * capex / 1000
+
+
+def technology_envelopes(df, range_metrics, power_mw, energy_mwh, land_acres, capex_basis="energy"):
+    """
+    Land and cost envelope for building the whole site with each technology.
+
+    "Fits" is Yes when even the high land density fits the site, Maybe when
+    only the low density does, No when neither does and Unknown when
+    densities are missing. "Duration OK" checks energy/power against the
+    technology's Duration - Low/High range.
+    """
+    arrays = technology_arrays(df, range_metrics, capex_basis)
+    land_low = land_required(power_mw, energy_mwh, arrays["power_density"][0], arrays["energy_density"][0], arrays["separate"])
+    land_high = land_required(power_mw, energy_mwh, arrays["power_density"][1], arrays["energy_density"][1], arrays["separate"])
+    cost_low = capital_cost(power_mw, energy_mwh, arrays["capex"][0], capex_basis)
+    cost_high = capital_cost(power_mw, energy_mwh, arrays["capex"][1], capex_basis)
+
+    duration = energy_mwh / power_mw if power_mw else np.inf
+    dur_low, dur_high = arrays["duration"]
+    duration_ok = (dur_low <= duration) & (duration <= dur_high)
+
+    fits = np.select(
+        [np.isnan(land_low) | np.isnan(land_high), land_high <= land_acres, land_low <= land_acres],
+        ["Unknown", "Yes", "Maybe"],
+        default="No"
+    )
+    return pd.DataFrame({
+        "Detailed Technology": arrays["technologies"],
+        "Fits": fits,
+        "Duration OK": np.where(np.isnan(dur_low) | np.isnan(dur_high), "Unknown", np.where(duration_ok, "Yes", "No")),
+        "Land Low (acre)": land_low,
+        "Land High (acre)": land_high,
+        "Cost Low ($M)": cost_low,
+        "Cost High ($M)": cost_high,
+    }, index=df.index)
+
+
+def share_grid(k, step):
+    """
+    All ways to split 1.0 into k strictly positive multiples of step, as
+    an (n_splits, k) array.
+    """
+    units = int(round(1 / step))
+    return np.array(list(_compositions(units, k)), dtype=float) / units
+
+
+def _compositions(total, parts):
+    if parts == 1:
+        yield (total,)
+        return
+    for first in range(1, total - parts + 2):
+        for rest in _compositions(total - first, parts - 1):
+            yield (first,) + rest
+
+
+def _fill_cheapest(rates, low, high, total):
+    # Minimize sum(rates * x) over low <= x <= high with sum(x) == total,
+    # row by row: every x at its low end, the rest poured into the
+    # cheapest member first. Returns (x, whether the total was reachable)
+    order = np.argsort(rates, axis=1, kind="stable")
+    low, high = (np.take_along_axis(a, order, axis=1) for a in (low, high))
+    x = low.copy()
+    remaining = total - low.sum(axis=1)
+    for j in range(rates.shape[1]):
+        extra = np.minimum(np.maximum(remaining, 0), np.maximum(high[:, j] - low[:, j], 0))
+        x[:, j] += extra
+        remaining = remaining - extra
+    reachable = (low <= high).all(axis=1) & (np.abs(remaining) <= 1e-9 * total)
+    x_unsorted = np.empty_like(x)
+    np.put_along_axis(x_unsorted, order, x, axis=1)
+    return x_unsorted, reachable
+
+
+def cost_lower_bounds(combos, arrays, capex, power_density, energy_density, power_mw, energy_mwh, land_acres, step):
+    """
+    Least cost in $M any split on the share grid can reach, per row of
+    combos (an (n, k) array of technology indices).
+
+    Each member's power and energy are relaxed to continuous amounts: at
+    least one step of each, no more than what is left after the others
+    take theirs, and what the duration range allows given that. A member's
+    footprint is then at least its density times either amount, with the
+    other side tied to it by the duration range (energy >= low duration *
+    power, power >= energy / high duration).
+
+    The costed side (energy or power, by capex basis) must share out the
+    site within the land budget. That constraint is priced in (Lagrangian
+    relaxation): for every multiplier, filling cheapest first at rates
+    capex + multiplier * footprint is a valid bound, and the best one is at
+    0 or where two members swap order. inf where no allocation meets the
+    duration ranges and the land budget on either side.
+    """
+    k = combos.shape[1]
+    # Largest share one member can take when each of the others has a step
+    most = 1 - (k - 1) * step
+    dur_low, dur_high = (d[combos] for d in arrays["duration"])
+    separate = arrays["separate"][combos]
+    pd_, ed_ = power_density[combos], energy_density[combos]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sides = {
+            "energy": (
+                energy_mwh,
+                np.maximum(step * energy_mwh, dur_low * step * power_mw),
+                np.minimum(most * energy_mwh, dur_high * most * power_mw),
+                np.where(separate, ed_ + pd_ / dur_high, np.maximum(ed_, pd_ / dur_high)),
+            ),
+            "power": (
+                power_mw,
+                np.maximum(step * power_mw, step * energy_mwh / dur_high),
+                np.minimum(most * power_mw, most * energy_mwh / dur_low),
+                np.where(separate, pd_ + ed_ * dur_low, np.maximum(pd_, ed_ * dur_low)),
+            ),
+        }
+
+    feasible = np.ones(len(combos), dtype=bool)
+    for total, low, high, footprint in sides.values():
+        low[np.isnan(low)] = np.inf
+        high[np.isnan(high)] = -np.inf
+        footprint[np.isnan(footprint)] = np.inf
+        # Smallest footprint any allocation can have; over budget rules it out
+        x, reachable = _fill_cheapest(footprint, low, high, total)
+        with np.errstate(invalid="ignore"):
+            least_land = (footprint * x).sum(axis=1)
+        feasible &= reachable & (least_land <= land_acres * (1 + 1e-9))
+
+    total, low, high, footprint = sides[arrays["capex_basis"]]
+    rates = capex[combos] / 1000
+    footprint = np.where(np.isfinite(footprint), footprint, 0)
+    multipliers = [np.zeros(len(combos))]
+    for i, j in combinations(range(k), 2):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            swap = (rates[:, j] - rates[:, i]) / (footprint[:, i] - footprint[:, j])
+        multipliers.append(np.where(np.isfinite(swap) & (swap > 0), swap, 0))
+
+    bound = np.full(len(combos), -np.inf)
+    with np.errstate(invalid="ignore"):
+        for multiplier in multipliers:
+            x, _ = _fill_cheapest(rates + multiplier[:, None] * footprint, low, high, total)
+            value = (rates * x).sum(axis=1) + multiplier * ((footprint * x).sum(axis=1) - land_acres)
+            bound = np.maximum(bound, value)
+    return np.where(feasible, bound, np.inf)
+
+
+def search_portfolios(df, range_metrics, power_mw, energy_mwh, land_acres, capex_basis="energy",
+                      max_size=3, step=0.1, top_n=10, conservative=True):
+    """
+    Cheapest mixes of two or three technologies that fit the site.
+
+    Each member gets its own share of the site's power and of its energy,
+    so members may run at different durations, but each must stay inside
+    its Duration - Low/High range. Land uses the high densities when
+    `conservative`, else the low ones; mixes are ranked by midpoint cost.
+
+    Combinations are pruned before evaluation with two lower bounds that
+    hold for every split: land >= max(P * min power density,
+    E * min energy density) over the members, and cost >=
+    cost_lower_bounds (which also rules out combinations whose duration
+    ranges or footprints cannot be met together). Surviving combinations are evaluated in
+    vectorized batches (combination x power split x energy split) in order
+    of their cost bound, and the search stops once the bound reaches the
+    top_n-th best cost found. Pairs run first, so their cutoff already
+    prunes most triples before any of their splits are enumerated.
+
+    Returns (portfolios DataFrame, stats dict).
+    """
+    arrays = technology_arrays(df, range_metrics, capex_basis)
+    side = 1 if conservative else 0
+    pd_ = arrays["power_density"][side]
+    ed_ = arrays["energy_density"][side]
+    capex_mid = (arrays["capex"][0] + arrays["capex"][1]) / 2
+    dur_low, dur_high = arrays["duration"]
+
+    usable = ~(np.isnan(pd_) | np.isnan(ed_) | np.isnan(capex_mid) | np.isnan(dur_low) | np.isnan(dur_high))
+    candidates = np.flatnonzero(usable)
+    stats = {"combinations": 0, "pruned_land": 0, "pruned_cost": 0, "evaluated": 0, "splits": 0}
+    results = []
+
+    for k in range(2, max_size + 1):
+        if len(candidates) < k:
+            break
+        combos = np.array(list(combinations(candidates, k)), dtype=np.int64)
+        stats["combinations"] += len(combos)
+
+        # Land lower bound prunes combinations that cannot fit at any split
+        land_lb = np.maximum(power_mw * pd_[combos].min(axis=1), energy_mwh * ed_[combos].min(axis=1))
+        fits = land_lb <= land_acres
+        stats["pruned_land"] += int((~fits).sum())
+        combos = combos[fits]
+
+        cost_lb = cost_lower_bounds(combos, arrays, capex_mid, pd_, ed_, power_mw, energy_mwh, land_acres, step)
+        if len(results) >= top_n:
+            cost_lb[cost_lb >= results[-1]["cost"]] = np.inf
+        finite = np.isfinite(cost_lb)
+        order = np.argsort(cost_lb[finite], kind="stable")
+        combos, cost_lb = combos[finite][order], cost_lb[finite][order]
+
+        shares = share_grid(k, step)
+        # Every (power split, energy split) pair: (S, k) each
+        p_share = np.repeat(shares, len(shares), axis=0)
+        e_share = np.tile(shares, (len(shares), 1))
+        stats["splits"] = max(stats["splits"], len(p_share))
+        batch_size = max(1, BATCH_ELEMENTS // (len(p_share) * k))
+
+        for start in range(0, len(combos), batch_size):
+            batch = combos[start:start + batch_size]
+            if len(results) >= top_n:
+                # Combinations are sorted by cost bound, so once one cannot
+                # beat the current top_n neither can any that follow
+                live = cost_lb[start:start + batch_size] < results[-1]["cost"]
+                batch = batch[live]
+                if not len(batch):
+                    break
+            stats["evaluated"] += len(batch)
+
+            p = power_mw * p_share[None, :, :]
+            e = energy_mwh * e_share[None, :, :]
+            members = batch[:, None, :]
+            land = land_required(p, e, pd_[members], ed_[members], arrays["separate"][members]).sum(axis=2)
+            duration = e / p
+            duration_ok = ((duration >= dur_low[members]) & (duration <= dur_high[members])).all(axis=2)
+            cost = capital_cost(p, e, capex_mid[members], capex_basis).sum(axis=2)
+
+            feasible = duration_ok & (land <= land_acres)
+            cost = np.where(feasible, cost, np.inf)
+            best = cost.argmin(axis=1)
+            best_cost = cost[np.arange(len(batch)), best]
+            for i in np.flatnonzero(np.isfinite(best_cost)):
+                results.append({
+                    "members": batch[i],
+                    "power_share": p_share[best[i]],
+                    "energy_share": e_share[best[i]],
+                    "land": land[i, best[i]],
+                    "cost": best_cost[i],
+                })
+
+            results = sorted(results, key=lambda r: r["cost"])[:top_n]
+
+    stats["pruned_cost"] = stats["combinations"] - stats["pruned_land"] - stats["evaluated"]
+    rows = []
+    for r in results:
+        names = arrays["technologies"][r["members"]]
+        rows.append({
+            "Technologies": " + ".join(names),
+            "Power Split (MW)": " / ".join(f"{power_mw * s:g}" for s in r["power_share"]),
+            "Energy Split (MWh)": " / ".join(f"{energy_mwh * s:g}" for s in r["energy_share"]),
+            "Land (acre)": r["land"],
+            "Midpoint Cost ($M)": r["cost"],
+        })
+    return pd.DataFrame(rows, columns=["Technologies", "Power Split (MW)", "Energy Split (MWh)", "Land (acre)", "Midpoint Cost ($M)"]), stats
@@ -0,0 +1,160 @@
+import pandas as pd
+
+
+# Canonical technologies: (id, Technology Type, name, aliases). Matching
+# ignores case, surrounding whitespace and hyphen/space differences, so
+# aliases only list spellings that differ beyond that.
+TAXONOMY = [
+    ("lithium-ion", "Electrochemical", "Lithium-ion", []),
+    ("sodium-ion", "Electrochemical", "Sodium-ion", []),
+    ("lead-acid", "Electrochemical", "Lead-acid", []),
+    ("zinc-anode", "Electrochemical", "Zinc-Anode", []),
+    ("iron-flow", "Electrochemical", "Iron-Flow", []),
+    ("vanadium-flow", "Electrochemical", "Vanadium-Flow", []),
+    ("organic-solid-flow", "Electrochemical", "Organic-Solid Flow", []),
+    ("molten-salt-tes", "Thermal", "Molten Salt TES", []),
+    ("pumped-tes", "Thermal", "Solid Media TES - Pumped TES", []),
+    ("tpv-tes", "Thermal", "Solid Media TES - TPV", []),
+    ("thermochemical-tes", "Thermal", "Thermochemical", []),
+    ("latent-heat-tes", "Thermal", "Latent Heat TES", []),
+    ("sensible-heat-tes", "Thermal", "Sensible Heat TES", []),
+    ("sodium-sulfur-tes", "Thermal", "Sodium-Sulfur TES", []),
+    ("psh", "Mechanical", "Pumped Storage Hydropower (PSH)", ["Pumped Hydro Storage"]),
+    ("caes", "Mechanical", "Compressed Air Energy Storage (Caverns)", ["Compressed Air Storage"]),
+    ("compressed-gas", "Mechanical", "Compressed Gas Energy Storage", []),
+    ("liquid-air", "Mechanical", "Liquid Air", []),
+    ("gravity-blocks", "Mechanical", "Gravitational Storage (Blocks)", []),
+    ("gravity-railcars", "Mechanical", "Gravitational Storage (Railcars)", []),
+    ("ggs", "Mechanical", "Geopressured Geothermal System (GGS)", []),
+    ("hydrogen", "Chemical", "Hydrogen", []),
+]
+
+
+def normalize_names(names):
+    """
+    Matching keys for technology names: trimmed, lowercase, with runs of
+    hyphens and whitespace collapsed to one space.
+    """
+    text = pd.Series(names, dtype="string")
+    return text.str.strip().str.lower().str.replace(r"[\s\-]+", " ", regex=True)
+
+
+def taxonomy_table():
+    """
+    The canonical taxonomy as a DataFrame indexed by technology id.
+    """
+    return pd.DataFrame(
+        [(tech_id, tech_type, name) for tech_id, tech_type, name, _ in TAXONOMY],
+        columns=["Technology ID", "Technology Type", "Technology"]
+    ).set_index("Technology ID")
+
+
+def alias_index():
+    """
+    Normalized name or alias -> technology id.
+    """
+    index = {}
+    for tech_id, _, name, aliases in TAXONOMY:
+        for key in normalize_names([name, *aliases]):
+            index[key] = tech_id
+    return index
+
+
+def resolve(names, index=None):
+    """
+    Technology id for each name (NA where the taxonomy has no match).
+    """
+    names = pd.Series(names)
+    ids = normalize_names(names.to_numpy()).map(index or alias_index())
+    return pd.Series(ids.to_numpy(), index=names.index, dtype="string")
+
+
+def pill_options(df, ids):
+    """
+    Detailed technologies per Technology Type, as they are spelled in df.
+
+    Names the taxonomy resolves are grouped under their canonical type,
+    whatever type the row itself gives; only unknown names fall back to
+    the row's type. Every type in df keeps a group, in order of appearance
+    (so its checkbox stays), followed by canonical types df never names.
+    Within a type, names follow the canonical names alphabetically, with
+    names the taxonomy does not know appended in alphabetical order.
+    """
+    table = taxonomy_table()
+    names = pd.DataFrame({
+        "row_type": df["Technology Type"].to_numpy(),
+        "name": df["Detailed Technology"].to_numpy(),
+        "canonical": ids.map(table["Technology"]).to_numpy(),
+        "canonical_type": ids.map(table["Technology Type"]).to_numpy(),
+    })
+    names["type"] = names["canonical_type"].fillna(names["row_type"])
+    types = pd.unique(pd.concat([names["row_type"], names["type"]]).dropna())
+    names = names.dropna(subset=["type"]).drop_duplicates(["type", "name"])
+    names["unknown"] = names["canonical"].isna()
+    names["sort"] = names["canonical"].fillna(names["name"]).str.strip().str.lower()
+    options = {}
+    for tech_type in types:
+        group = names[names["type"] == tech_type].sort_values(["unknown", "sort"])
+        options[tech_type] = group["name"].dropna().tolist()
+    return options
+
+
+def _format_range(low, high):
+    """
+    "low - high" text for one range; a single value when the ends match,
+    None when both are missing.
+    """
+    ends = [f"{v:,.6g}" for v in (low, high) if pd.notna(v)]
+    if not ends:
+        return None
+    return ends[0] if len(set(ends)) == 1 else " - ".join(ends)
+
+
+def metric_ranges(metrics_df, metric_ids, range_metrics):
+    """
+    Metric ranges per technology id: one small (Metric, Range) table each.
+    Rows sharing an id are merged to the widest range.
+    """
+    ranges = {}
+    for tech_id, rows in metrics_df.groupby(metric_ids.to_numpy(), dropna=True):
+        table = []
+        for metric, (low_col, high_col) in range_metrics.items():
+            if low_col not in rows.columns or high_col not in rows.columns:
+                continue
+            text = _format_range(rows[low_col].min(), rows[high_col].max())
+            if text is not None:
+                table.append((metric, text))
+        ranges[tech_id] = pd.DataFrame(table, columns=["Metric", "Range"])
+    return ranges
+
+
+def build_index(metrics_df, projects_df, range_metrics):
+    """
+    Resolve both datasets to technology ids and join projects to the
+    metric ranges of their technology. Built once per pair of dataset
+    versions.
+
+    Returns a dict with the per-row "metric_ids" and "project_ids", the
+    sidebar "metric_options" and "project_options" (see pill_options),
+    "ranges" (technology id -> metric range table), "project_ranges" (the
+    same tables keyed by the projects' own spelling) and "unmatched", the
+    names neither dataset could resolve.
+    """
+    index = alias_index()
+    metric_ids = resolve(metrics_df["Detailed Technology"], index)
+    project_ids = resolve(projects_df["Detailed Technology"], index)
+    unmatched = pd.concat([
+        metrics_df["Detailed Technology"][metric_ids.isna()],
+        projects_df["Detailed Technology"][project_ids.isna()],
+    ]).dropna().unique()
+    ranges = metric_ranges(metrics_df, metric_ids, range_metrics)
+    spellings = pd.DataFrame({"name": projects_df["Detailed Technology"], "id": project_ids}).dropna().drop_duplicates()
+    return {
+        "metric_ids": metric_ids,
+        "project_ids": project_ids,
+        "metric_options": pill_options(metrics_df, metric_ids),
+        "project_options": pill_options(projects_df, project_ids),
+        "ranges": ranges,
+        "project_ranges": {name: ranges[tech_id] for name, tech_id in zip(spellings["name"], spellings["id"]) if tech_id in ranges},
+        "unmatched": sorted(unmatched),
+    }
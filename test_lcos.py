@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+import lcos
+import metric_charts
+
+
+def catalog(copies):
+    """
+    The built-in metrics repeated copies times, with distinct names.
+    """
+    df = pd.read_csv("ldes_real_data_v1.csv")
+    n = len(df)
+    df = pd.concat([df] * copies, ignore_index=True)
+    df["Detailed Technology"] = df["Detailed Technology"] + " #" + (df.index // n).astype(str)
+    return df
+
+
+def test_chunk_samples_shrink_as_technologies_grow():
+    sizes = [lcos.chunk_samples(n) for n in (1, 18, 540, 1800, 10**7)]
+    assert sizes == sorted(sizes, reverse=True)
+    assert sizes[-1] == 1
+    for n, size in zip((1, 18, 540, 1800), sizes):
+        assert size * n <= lcos.MC_BLOCK_ELEMENTS
+
+
+def test_monte_carlo_chunks_stay_within_block(monkeypatch):
+    seen = []
+    run_chunk = lcos._run_chunk
+
+    def recording_chunk(task):
+        bounds, n = task[0], task[1]
+        seen.append(n * len(bounds["capex"][0]))
+        return run_chunk(task)
+
+    monkeypatch.setattr(lcos, "_run_chunk", recording_chunk)
+    for copies in (1, 30):
+        seen.clear()
+        result = lcos.monte_carlo_lcos(catalog(copies), metric_charts.RANGE_METRICS, n_samples=5_000, seed=1)
+        assert len(result["summary"]) > 0
+        assert max(seen) <= lcos.MC_BLOCK_ELEMENTS
+        assert result["counts"].sum(axis=1).tolist() == [5_000] * len(result["summary"])
+
+
+def test_chunking_does_not_change_the_distribution_shape():
+    df = catalog(1)
+    small = lcos.monte_carlo_lcos(df, metric_charts.RANGE_METRICS, n_samples=20_000, seed=3, chunk_size=1_000)
+    large = lcos.monte_carlo_lcos(df, metric_charts.RANGE_METRICS, n_samples=20_000, seed=3)
+    assert np.allclose(small["summary"]["P50"], large["summary"]["P50"], rtol=0.05)
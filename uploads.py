@@ -0,0 +1,282 @@
+import functools
+import hashlib
+import os
+import threading
+import time
+
+import pandas as pd
+
+import derived_metrics
+import memory_budget
+import metric_filters
+import project_map
+
+
+UPLOAD_MEMORY_ENV = "LDES_UPLOAD_MEMORY_MB"
+
+# Parsed size allowed per uploaded dataset, when the environment sets none
+DEFAULT_UPLOAD_MEMORY_MB = 1024
+
+# Rows parsed and validated per step
+CHUNK_ROWS = 50_000
+
+# Uploads parsed at once across all sessions; others wait their turn
+PARSE_SLOTS = 1
+
+# Example rows reported per validation problem
+MAX_EXAMPLES = 5
+
+# Filter masks kept per uploaded dataset, as the shared filter_mask cache
+MASK_CACHE_SIZE = 128
+
+KINDS = ["metrics", "projects"]
+
+REQUIRED_COLUMNS = {
+    "metrics": ["Technology Type", "Detailed Technology"],
+    "projects": ["Project name", "State", "Technology Type", "Detailed Technology"],
+}
+
+LEVEL_RANGE = (1, 9)
+
+
+def configured_upload_memory():
+    """
+    Per-upload parsed size cap in bytes from LDES_UPLOAD_MEMORY_MB.
+    """
+    value = os.environ.get(UPLOAD_MEMORY_ENV)
+    try:
+        return int(float(value) * 1024 * 1024) if value else DEFAULT_UPLOAD_MEMORY_MB * 1024 * 1024
+    except ValueError:
+        return DEFAULT_UPLOAD_MEMORY_MB * 1024 * 1024
+
+
+def numeric_columns(kind, columns, range_metrics):
+    """
+    Columns of an upload parsed as numbers: the range metric ends and
+    readiness levels for metrics, the size columns for projects.
+    """
+    if kind == "projects":
+        return [c for c in project_map.NUMERIC_COLUMNS if c in columns]
+    ends = [col for pair in range_metrics.values() for col in pair]
+    return [c for c in ends + metric_filters.SINGLE_VALUE_COLUMNS if c in columns]
+
+
+def check_header(kind, columns, range_metrics):
+    """
+    Schema problems visible from the header alone.
+    """
+    issues = [f"Missing required column: {col}" for col in REQUIRED_COLUMNS[kind] if col not in columns]
+    if kind == "metrics":
+        for metric, (low_col, high_col) in range_metrics.items():
+            if (low_col in columns) != (high_col in columns):
+                missing = high_col if low_col in columns else low_col
+                issues.append(f"{metric}: {missing} is missing (range metrics need both ends)")
+    return issues
+
+
+class ChunkValidator:
+    """
+    Accumulates validation problems over the chunks of one upload,
+    counting every offending row and keeping a few examples of each.
+    """
+
+    def __init__(self):
+        self.problems = {}
+
+    def flag(self, problem, mask, first_row):
+        count = int(mask.sum())
+        if not count:
+            return
+        entry = self.problems.setdefault(problem, [0, []])
+        entry[0] += count
+        if len(entry[1]) < MAX_EXAMPLES:
+            # Spreadsheet row numbers: 1-based, after the header
+            rows = mask.to_numpy().nonzero()[0][:MAX_EXAMPLES - len(entry[1])]
+            entry[1].extend(int(r) + first_row + 2 for r in rows)
+
+    def issues(self):
+        return [
+            f"{problem}: {count:,} row(s), e.g. row {', '.join(map(str, examples))}"
+            for problem, (count, examples) in self.problems.items()
+        ]
+
+
+def convert_chunk(kind, chunk, numeric, range_metrics, validator, first_row):
+    """
+    Finish parsing one chunk and flag rows that break the schema. Numeric
+    columns the CSV parser could not read as numbers are coerced here,
+    with the offending cells reported. Returns the converted chunk.
+    """
+    for col in REQUIRED_COLUMNS[kind]:
+        if col in ("Technology Type", "Detailed Technology", "Project name"):
+            validator.flag(f"{col} is empty", chunk[col].isna(), first_row)
+    for col in numeric:
+        if pd.api.types.is_numeric_dtype(chunk[col]):
+            chunk[col] = chunk[col].astype(float)
+            continue
+        text = chunk[col].astype("string").str.strip()
+        if kind == "projects":
+            text = text.str.replace(",", "", regex=False)
+        values = pd.to_numeric(text, errors="coerce").astype(float)
+        validator.flag(f"{col} is not a number", text.notna() & (text != "") & values.isna(), first_row)
+        chunk[col] = values
+    if kind == "metrics":
+        for metric, (low_col, high_col) in range_metrics.items():
+            if low_col in chunk.columns and high_col in chunk.columns:
+                validator.flag(f"{metric}: low end above high end", chunk[low_col] > chunk[high_col], first_row)
+        for col in metric_filters.SINGLE_VALUE_COLUMNS:
+            if col in chunk.columns:
+                values = chunk[col]
+                validator.flag(f"{col} outside {LEVEL_RANGE[0]}-{LEVEL_RANGE[1]}", values.notna() & ~values.between(*LEVEL_RANGE), first_row)
+    return chunk
+
+
+def read_upload(file, kind, range_metrics, memory_cap=None, progress=None):
+    """
+    Stream a CSV upload in chunks of CHUNK_ROWS rows, validating each one.
+
+    The header is checked against the schema before any rows are read.
+    Text columns stay text; numeric columns are parsed by the CSV reader
+    and, in chunks where some cell is not a number, coerced with that
+    cell reported by row. Parsing stops early when the parsed data
+    outgrows memory_cap bytes. progress, if given, is called with the
+    bytes read so far.
+
+    Returns (frame, issues): the frame is None when there are any issues.
+    """
+    memory_cap = memory_cap or configured_upload_memory()
+    options = {"encoding": "utf-8-sig", "encoding_errors": "replace"}
+    try:
+        columns = list(pd.read_csv(file, nrows=0, **options).columns)
+        file.seek(0)
+    except (ValueError, pd.errors.ParserError) as e:
+        return None, [f"Could not read the file as CSV: {e}"]
+    issues = check_header(kind, columns, range_metrics)
+    if issues:
+        return None, issues
+    numeric = numeric_columns(kind, columns, range_metrics)
+    reader = pd.read_csv(
+        file, dtype={c: str for c in columns if c not in numeric}, chunksize=CHUNK_ROWS,
+        keep_default_na=False, na_values=project_map.NULL_SENTINELS,
+        thousands="," if kind == "projects" else None, **options
+    )
+
+    validator = ChunkValidator()
+    chunks = []
+    parsed_bytes = 0
+    first_row = 0
+    try:
+        for chunk in reader:
+            chunk = convert_chunk(kind, chunk, numeric, range_metrics, validator, first_row)
+            parsed_bytes += memory_budget.estimate_bytes(chunk)
+            if parsed_bytes > memory_cap:
+                return None, [f"The parsed data exceeds the {memory_cap / 1e6:,.0f} MB upload limit after {first_row + len(chunk):,} rows"]
+            chunks.append(chunk)
+            first_row += len(chunk)
+            if progress is not None:
+                progress(file.tell())
+            # Let other sessions' threads in between chunks
+            time.sleep(0)
+    except (ValueError, pd.errors.ParserError) as e:
+        return None, [f"Could not read the file as CSV near row {first_row + 2:,}: {e}"]
+    finally:
+        reader.close()
+
+    if not chunks:
+        return None, ["The file has no rows"]
+    issues = validator.issues()
+    if issues:
+        return None, issues
+    frame = pd.concat(chunks, ignore_index=True)
+    del chunks
+    if kind == "projects":
+        frame = project_map.normalize_projects_data(frame)
+    return frame, []
+
+
+class UploadedDataset:
+    """
+    One session's uploaded dataset and everything derived from it.
+
+    Derived artifacts (hover strings, catalogs, indexes, derived metric
+    columns) live in this namespace rather than the shared caches, so they
+    go when the upload or its session does.
+    """
+
+    def __init__(self, kind, name, file_id, frame, range_metrics=None):
+        self.kind = kind
+        self.name = name
+        self.file_id = file_id
+        self.frame = frame
+        self.range_metrics = range_metrics or {}
+        self.frame_bytes = memory_budget.estimate_bytes(frame)
+        digest = hashlib.sha256(f"{name}|{file_id}|{len(frame)}".encode("utf-8")).hexdigest()[:16]
+        self.version = f"upload-{kind}-{digest}"
+        self._artifacts = {}
+        # Reentrant: builds may read other artifacts
+        self._lock = threading.RLock()
+
+        @functools.lru_cache(maxsize=MASK_CACHE_SIZE)
+        def mask_for(spec):
+            return metric_filters.filter_mask(derived_metrics.frame_for_spec(frame, spec, self.range_metrics, self.derived_columns), spec)
+
+        self.mask_for = mask_for
+
+    def derived_columns(self, name):
+        """
+        One derived metric's columns over the whole upload, computed once.
+        """
+        return self.artifact(("derived", name), lambda: derived_metrics.compute(self.frame, self.range_metrics, name))
+
+    def artifact(self, key, build):
+        """
+        build() once per key for this dataset.
+        """
+        with self._lock:
+            if key not in self._artifacts:
+                self._artifacts[key] = build()
+            return self._artifacts[key]
+
+
+class SessionUploads:
+    """
+    Uploaded datasets by session and kind, and the slots that limit how
+    many uploads are parsed at once.
+    """
+
+    def __init__(self, parse_slots=PARSE_SLOTS):
+        self._datasets = {}
+        self._lock = threading.Lock()
+        self.parse_slots = threading.BoundedSemaphore(parse_slots)
+
+    def get(self, session_id, kind):
+        with self._lock:
+            return self._datasets.get(session_id, {}).get(kind)
+
+    def put(self, session_id, dataset):
+        with self._lock:
+            self._datasets.setdefault(session_id, {})[dataset.kind] = dataset
+
+    def drop(self, session_id, kind=None):
+        with self._lock:
+            held = self._datasets.get(session_id, {})
+            if kind is None:
+                held.clear()
+            else:
+                held.pop(kind, None)
+            if not held:
+                self._datasets.pop(session_id, None)
+
+    def sessions(self):
+        with self._lock:
+            return list(self._datasets)
+
+    def evict_inactive(self, is_active):
+        """
+        Drop the uploads of every session is_active(session_id) rejects;
+        returns the evicted session ids.
+        """
+        evicted = [sid for sid in self.sessions() if not is_active(sid)]
+        for sid in evicted:
+            self.drop(sid)
+        return evicted
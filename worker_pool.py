@@ -0,0 +1,103 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import context, forkserver, popen_forkserver, reduction, spawn, util
+
+
+# Worker processes shared by every parallel run in this process, however
+# many sessions start one at once
+MAX_WORKERS = 4
+
+# Modules the forkserver imports once, so every worker forked from it
+# starts with them (and numpy and pandas) already loaded
+WORKER_MODULES = ["dispatch", "lcos"]
+
+_lock = threading.Lock()
+_executor = None
+
+
+def pool_size():
+    """
+    Workers in the shared pool, or None when the host has a single CPU and
+    runs are faster in-process.
+    """
+    cpus = os.cpu_count() or 1
+    return min(MAX_WORKERS, cpus) if cpus >= 2 else None
+
+
+def shared_executor():
+    """
+    The process-wide pool, created on first use.
+
+    Workers start from a forkserver (spawn where unavailable) rather than
+    forking the multithreaded server. Concurrent runs queue their tasks
+    on the same workers instead of starting pools of their own.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                mp_context = _WorkerContext()
+                mp_context.set_forkserver_preload(WORKER_MODULES)
+            else:
+                mp_context = multiprocessing.get_context("spawn")
+            _executor = ProcessPoolExecutor(max_workers=pool_size() or 1, mp_context=mp_context)
+        return _executor
+
+
+class _WorkerPopen(popen_forkserver.Popen):
+    """
+    Forkserver launch that leaves __main__ out of the worker's preparation
+    data. Under Streamlit __main__ is the app script, which each worker
+    would otherwise re-run before taking a task; tasks are functions of
+    importable modules and never need it. Otherwise as the base _launch.
+    """
+
+    def _launch(self, process_obj):
+        prep_data = spawn.get_preparation_data(process_obj._name)
+        prep_data.pop("init_main_from_name", None)
+        prep_data.pop("init_main_from_path", None)
+        buf = io.BytesIO()
+        context.set_spawning_popen(self)
+        try:
+            reduction.dump(prep_data, buf)
+            reduction.dump(process_obj, buf)
+        finally:
+            context.set_spawning_popen(None)
+        self.sentinel, w = forkserver.connect_to_new_process(self._fds)
+        # The child watches a duplicate of the data pipe for parent exit
+        parent_w = os.dup(w)
+        self.finalizer = util.Finalize(self, util.close_fds, (parent_w, self.sentinel))
+        with open(w, "wb", closefd=True) as f:
+            f.write(buf.getbuffer())
+        self.pid = forkserver.read_signed(self.sentinel)
+
+
+class _WorkerProcess(context.ForkServerProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        return _WorkerPopen(process_obj)
+
+
+class _WorkerContext(context.ForkServerContext):
+    Process = _WorkerProcess
+
+
+def iter_tasks(function, tasks, parallel):
+    """
+    function(task) for each task, in order, as an iterator: across the
+    shared pool when parallel and there is more than one task. Callers
+    that fold results as they arrive keep only one at a time.
+    """
+    if parallel and len(tasks) > 1:
+        return shared_executor().map(function, tasks)
+    return map(function, tasks)
+
+
+def run_tasks(function, tasks, parallel):
+    """
+    [function(task) for task in tasks], see iter_tasks.
+    """
+    return list(iter_tasks(function, tasks, parallel))